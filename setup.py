@@ -13,7 +13,7 @@ setup(
     maintainer='Michael Knowles',
     maintainer_email='mknowles@fulcrum.net',
     license='MIT',
-    install_requires=['requests', 'six'],
+    install_requires=['requests', 'six', 'futures; python_version < "3"'],
     scripts=['bin/skytap'],
     url='https://github.com/FulcrumIT/skytap',
     download_url='https://github.com/FulcrumIT/skytap/tarball/v1.2.0',
@@ -76,12 +76,21 @@ from skytap.models.SkytapGroup import SkytapGroup
 class Environments(SkytapGroup):
     """Set of Skytap environments."""
 
-    def __init__(self):
-        """Build an initial list of environments."""
-        super(Environments, self).__init__()
-        self.load_list_from_api('/v2/configurations',
-                                Environment,
-                                {'scope': 'company'})
+    _list_url = '/v2/configurations'
+    _list_params = {'scope': 'company'}
+    _list_target = Environment
+
+    def __init__(self, json_list=None, client=None):
+        """Build an initial list of environments.
+
+        If the first parameter is missing, go to the API to get the full list.
+        """
+        super(Environments, self).__init__(client=client)
+        if json_list is None:
+            self.load_list_from_api(self._list_url, self._list_target,
+                                    self._list_params)
+        else:
+            self.load_list_from_json(json_list, self._list_target)
         self.search_fields.append('runstate')
         self.search_fields.append('region')
 
@@ -46,7 +46,6 @@ information there.
 import json
 import sys
 
-from skytap.framework.ApiClient import ApiClient
 import skytap.framework.Utils as Utils
 from skytap.models.Group import Group
 from skytap.models.SkytapGroup import SkytapGroup
@@ -67,16 +66,20 @@ class Groups(SkytapGroup):
             print(g.name)
     """
 
-    def __init__(self, json_list=None):
+    _list_url = '/v2/groups'
+    _list_target = Group
+
+    def __init__(self, json_list=None, client=None):
         """Build an initial list of groups.
 
         If the first parameter is missing, go to the API to get the full list.
         """
-        super(Groups, self).__init__()
+        super(Groups, self).__init__(client=client)
         if json_list is None:
-            self.load_list_from_api('/v2/groups', Group)
+            self.load_list_from_api(self._list_url, self._list_target,
+                                    self._list_params)
         else:
-            self.load_list_from_json(json_list, Group)
+            self.load_list_from_json(json_list, self._list_target)
 
     def add(self, group, description=''):
         """Add one group.
@@ -97,18 +100,16 @@ class Groups(SkytapGroup):
             print(groups[new_group].name)
         """
         Utils.info('Adding group: ' + group)
-        api = ApiClient()
         data = {"name": group,
                 "description": description}
         url = self.url + '.json'
-        response = api.rest(url, data, 'POST')
-        new_group = json.loads(response)
+        new_group = self.client.rest_json(url, data, 'POST')
         self.refresh()
         if 'id' in new_group:
             return int(new_group['id'])
         Utils.warning('Trying to create group (' + group + '), but ' +
                       'got an unexpected return from Skytap. Response:\n' +
-                      response)
+                      json.dumps(new_group, indent=4))
         return 0
 
     def delete(self, group):
@@ -1,5 +1,4 @@
 """Support for Skytap API access to the labels."""
-from skytap.framework.ApiClient import ApiClient
 import skytap.framework.Utils as Utils
 from skytap.models.Label import Label
 from skytap.models.SkytapGroup import SkytapGroup
@@ -8,10 +7,10 @@ from skytap.models.SkytapGroup import SkytapGroup
 class Labels(SkytapGroup):
     """Set of Skytap labels."""
 
-    def __init__(self, labels_json=None, url=None):
+    def __init__(self, labels_json=None, url=None, client=None):
         """Build an initial list of labels."""
-        super(Labels, self).__init__()
-        if not labels_json:
+        super(Labels, self).__init__(client=client)
+        if labels_json is None:
             self.load_list_from_api('/v2/label_categories', Label,
                                     {'scope': 'company'})
         else:
@@ -26,9 +25,8 @@ class Labels(SkytapGroup):
 
         Utils.info("Creating Label: " + name + ""
                    ". Single-value: " + str(single_value))
-        api = ApiClient()
         data = [{"name": name, "single-value": single_value}]
-        response = api.rest(self.url, data, "POST")
+        response = self.client.rest(self.url, data, "POST")
         self.refresh()
         return response
 
@@ -41,9 +39,8 @@ class Labels(SkytapGroup):
                    category +
                    " with value " +
                    value + ".")
-        api = ApiClient()
         data = [{"label_category": category, "value": value}]
-        response = api.rest(self.url, data, "PUT")
+        response = self.client.rest(self.url, data, "PUT")
         self.refresh()
         return response
 
@@ -53,9 +50,8 @@ class Labels(SkytapGroup):
             return "Can only disable label categories."
 
         Utils.info("Disabling label category of id " + str(id) + ".")
-        api = ApiClient()
         data = {"enabled": "False"}
-        response = api.rest(self.url + "/" + str(id), data, "PUT")
+        response = self.client.rest(self.url + "/" + str(id), data, "PUT")
         self.refresh()
         return response
 
@@ -65,8 +61,7 @@ class Labels(SkytapGroup):
             return "Can only enable label categories."
 
         Utils.info("Enabling label category of id " + str(id) + ".")
-        api = ApiClient()
         data = {"enabled": "True"}
-        response = api.rest(self.url + "/" + str(id), data, "PUT")
+        response = self.client.rest(self.url + "/" + str(id), data, "PUT")
         self.refresh()
         return response
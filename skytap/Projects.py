@@ -20,10 +20,20 @@ class Projects(SkytapGroup):
         print len(p)
     """
 
-    def __init__(self):
-        """Initial set of projects."""
-        super(Projects, self).__init__()
-        self.load_list_from_api('/v2/projects', Project)
+    _list_url = '/v2/projects'
+    _list_target = Project
+
+    def __init__(self, json_list=None, client=None):
+        """Initial set of projects.
+
+        If the first parameter is missing, go to the API to get the full list.
+        """
+        super(Projects, self).__init__(client=client)
+        if json_list is None:
+            self.load_list_from_api(self._list_url, self._list_target,
+                                    self._list_params)
+        else:
+            self.load_list_from_json(json_list, self._list_target)
 
 if __name__ == '__main__':
     print(Projects().main(sys.argv[1:]))
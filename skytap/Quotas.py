@@ -12,10 +12,20 @@ from skytap.models.SkytapGroup import SkytapGroup
 class Quotas(SkytapGroup):
     """Company/account quotas object."""
 
-    def __init__(self):
-        """Load the quotas from Skytap."""
-        super(Quotas, self).__init__()
-        self.load_list_from_api('/v2/company/quotas', Quota)
+    _list_url = '/v2/company/quotas'
+    _list_target = Quota
+
+    def __init__(self, json_list=None, client=None):
+        """Load the quotas from Skytap.
+
+        If the first parameter is missing, go to the API to get the full list.
+        """
+        super(Quotas, self).__init__(client=client)
+        if json_list is None:
+            self.load_list_from_api(self._list_url, self._list_target,
+                                    self._list_params)
+        else:
+            self.load_list_from_json(json_list, self._list_target)
 
 if __name__ == '__main__':
     print(Quotas().main(sys.argv[1:]))
@@ -20,10 +20,20 @@ class Templates(SkytapGroup):
         print len(t)
     """
 
-    def __init__(self):
-        """Build an initial list of templates."""
-        super(Templates, self).__init__()
-        self.load_list_from_api('/v2/templates', Template)
+    _list_url = '/v2/templates'
+    _list_target = Template
+
+    def __init__(self, json_list=None, client=None):
+        """Build an initial list of templates.
+
+        If the first parameter is missing, go to the API to get the full list.
+        """
+        super(Templates, self).__init__(client=client)
+        if json_list is None:
+            self.load_list_from_api(self._list_url, self._list_target,
+                                    self._list_params)
+        else:
+            self.load_list_from_json(json_list, self._list_target)
 
     def vm_count(self):
         """Count the total number of VMs."""
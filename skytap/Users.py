@@ -9,7 +9,6 @@ return the users from Skytap in a JSON format.
 import json
 import sys
 
-from skytap.framework.ApiClient import ApiClient
 import skytap.framework.Utils as Utils
 from skytap.models.SkytapGroup import SkytapGroup
 from skytap.models.User import User
@@ -25,16 +24,20 @@ class Users(SkytapGroup):
         print len(u)
     """
 
-    def __init__(self, json_list=None):
+    _list_url = '/v2/users'
+    _list_target = User
+
+    def __init__(self, json_list=None, client=None):
         """Build an initial list of users.
 
         If the first parameter is missing, go to the API to get the full list.
         """
-        super(Users, self).__init__()
+        super(Users, self).__init__(client=client)
         if json_list is None:
-            self.load_list_from_api('/v2/users', User)
+            self.load_list_from_api(self._list_url, self._list_target,
+                                    self._list_params)
         else:
-            self.load_list_from_json(json_list, User)
+            self.load_list_from_json(json_list, self._list_target)
 
     def admins(self):
         """Count the numbers of admins."""
@@ -66,18 +69,16 @@ class Users(SkytapGroup):
         Utils.info('Adding user: ' + login_name)
         if email is None:
             email = login_name
-        api = ApiClient()
         data = {"login_name": login_name,
                 "email": email}
         url = self.url_v1 + '.json'
-        response = api.rest(url, data, 'POST')
-        new_user = json.loads(response)
+        new_user = self.client.rest_json(url, data, 'POST')
         self.refresh()
         if 'id' in new_user:
             return int(new_user['id'])
         Utils.warning('Trying to create user (' + login_name + '), but ' +
                       'got an unexpected return from Skytap. Response:\n' +
-                      response)
+                      json.dumps(new_user, indent=4))
         return 0
 
     def delete(self, user, transfer_user):
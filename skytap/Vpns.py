@@ -20,10 +20,20 @@ class Vpns(SkytapGroup):
         print len(v)
     """
 
-    def __init__(self):
-        """Build the VPN list from the Skytap API."""
-        super(Vpns, self).__init__()
-        self.load_list_from_api('/v2/vpns', Vpn)
+    _list_url = '/v2/vpns'
+    _list_target = Vpn
+
+    def __init__(self, json_list=None, client=None):
+        """Build the VPN list from the Skytap API.
+
+        If the first parameter is missing, go to the API to get the full list.
+        """
+        super(Vpns, self).__init__(client=client)
+        if json_list is None:
+            self.load_list_from_api(self._list_url, self._list_target,
+                                    self._list_params)
+        else:
+            self.load_list_from_json(json_list, self._list_target)
 
 if __name__ == '__main__':
     print(Vpns().main(sys.argv[1:]))
@@ -1,39 +1,227 @@
 """Functions needed to access the skytap api."""
+import datetime
 import json
 import requests
+from email.utils import mktime_tz, parsedate_tz
 import six
 import sys
+import threading
 import time
 
+from concurrent.futures import ThreadPoolExecutor
+
+from skytap.framework.Cache import ResponseCache, get_shared_cache
+from skytap.framework.Cache import get_shared_validators
+from skytap.framework.Cassette import RecordingTransport, get_shared_cassette
+from skytap.framework.CircuitBreaker import get_shared_breaker
+from skytap.framework.Concurrency import get_shared_governor
 from skytap.framework.Config import Config
+from skytap.framework.Deadline import Deadline, activate, current_deadline
+from skytap.framework.Hedging import get_shared_hedging
+from skytap.framework.Hooks import RequestEvent, get_shared_hooks
+from skytap.framework.JsonStream import StreamedPage
+from skytap.framework.Metrics import get_shared_metrics
+from skytap.framework.RateLimiter import get_shared_rate_limiter
+from skytap.framework.Retry import RetryPolicy
+from skytap.framework.Scheduler import current_priority, priority
+from skytap.framework.Scheduler import get_shared_scheduler
+from skytap.framework.SingleFlight import get_shared_single_flight
+from skytap.framework.Tracing import get_shared_tracer
+from skytap.framework.Transport import MemoryTransport, RequestsTransport
+from skytap.framework.Transport import get_shared_transport
+from skytap.framework.Transport import reset_session  # noqa
 import skytap.framework.Utils as Utils
-from skytap.framework.Fixtures import SimulatorManager
+from skytap.framework.Fixtures import SimulatorManager, get_shared_simulator
 from skytap.framework.ApiExceptions import *
 requests.packages.urllib3.disable_warnings()
 
+_METHODS = ('GET', 'PUT', 'POST', 'DELETE')
+# Failed tries that count against the circuit breaker, as 5xx answers do.
+_BREAKER_ERRORS = (requests.exceptions.ConnectionError,
+                   requests.exceptions.Timeout)
+# json.loads only takes bytes from Python 3.6 on.
+_JSON_FROM_BYTES = sys.version_info >= (3, 6)
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client():
+    """Return the process-wide :class:`ApiClient`.
+
+    Resources that weren't handed a client when they were created make
+    their calls through this one, so the config is only checked once rather
+    than every time a resource talks to Skytap.
+    """
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = ApiClient()
+    return _default_client
+
+
+def set_default_client(client):
+    """Replace the process-wide :class:`ApiClient`.
+
+    Pass ``None`` to have a new default built from :class:`Config` on
+    next use.
+    """
+    global _default_client
+    with _default_client_lock:
+        _default_client = client
+
+
+class ApiResponse(object):
+
+    """One response from the API, with what we know about the request.
+
+    Every request gets its own, so code sharing a client between threads
+    never sees another thread's status or headers.
+    """
+
+    def __init__(self, response, method, url, attempts=1, elapsed=0.0):
+        """Wrap a response.
+
+        Args:
+            response (requests.Response): What came back.
+            method (str): The HTTP method used.
+            url (str): The full URL requested, query string included.
+            attempts (int): How many tries it took.
+            elapsed (float): Seconds taken, retries and waits included.
+        """
+        self.response = response
+        self.method = method
+        self.url = url
+        self.attempts = attempts
+        self.elapsed = elapsed
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.range = ApiClient._parse_range(response.headers)
+        self._decoded = False
+        self._data = None
+
+    @property
+    def total(self):
+        """The total item count from the content-range header, or None."""
+        if self.range is None:
+            return None
+        return self.range[1]
+
+    def json(self):
+        """Return the decoded body (or the text, if it isn't JSON).
+
+        The body is read and decoded on the first call, and only the
+        decoded result is kept.
+        """
+        if not self._decoded:
+            self._data = ApiClient._decode(self.response)
+            self._decoded = True
+        return self._data
+
+    def stream_json(self):
+        """Return the body as a page whose items are parsed as they arrive.
+
+        Returns:
+            ~skytap.framework.JsonStream.StreamedPage: Iterate over it for
+            the items of the top-level array.
+        """
+        return StreamedPage(ApiClient._iter_body(self.response),
+                            lambda: ApiClient._release(self.response))
+
+    def close(self):
+        """Give the connection back without reading the body."""
+        ApiClient._release(self.response)
+
+    def __repr__(self):
+        return '<ApiResponse ' + self.method + ' ' + self.url + ' [' + \
+            str(self.status_code) + ']>'
+
 
 class ApiClient(object):
 
-    """Wrap the calls to the Skytap API."""
+    """Wrap the calls to the Skytap API.
+
+    A client is safe to share between threads, and sharing one (or using
+    the default from :func:`get_default_client`) is the best way to make
+    use of the pooled connections. Nothing about a request is kept on the
+    client: each call gets its own :class:`ApiResponse`, and the
+    ``last_status``, ``last_headers`` and ``last_range`` attributes (kept
+    for backwards compatibility) describe the last response seen by the
+    calling thread only.
+    """
     _is_test_fixture = False
 
-    def __init__(self):
+    def __init__(self, session=None, cache=None, validators=None,
+                 rate_limiter=None, governor=None, retry_policy=None,
+                 single_flight=None, hedging=None, breaker=None,
+                 scheduler=None, priority=None, transport=None,
+                 cassette=None, hooks=None):
         """Initial setup of things.
 
         Also does some basic sanity checking on the config to make sure we
         have what we need to be able to access the skytap API.
+
+        Args:
+            session (requests.Session): The session to send requests with,
+                if not the shared, pooled session from
+                :func:`~skytap.framework.Transport.get_session`.
+            cache (~skytap.framework.Cache.ResponseCache): Where to cache
+                GET responses. Defaults to the process-wide cache if
+                ``Config.cache_ttl`` is set, otherwise nothing is cached.
+            validators (~skytap.framework.Cache.ValidatorCache): Where to
+                keep ETag/Last-Modified validators for conditional GETs.
+                Defaults to the process-wide one if
+                ``Config.conditional_requests`` is on.
+            rate_limiter (~skytap.framework.RateLimiter.TokenBucket): Takes
+                a token before every request, retries included. Defaults to
+                the process-wide limiter if ``Config.rate_limit`` is set.
+            governor (~skytap.framework.Concurrency.ConcurrencyGovernor):
+                Caps how many requests are in flight at once and adapts
+                that cap to 429/423 responses. Defaults to the process-wide
+                governor if ``Config.max_concurrency`` is set.
+            retry_policy (~skytap.framework.Retry.RetryPolicy): When and how
+                often to retry failed requests. Defaults to a policy built
+                from ``Config.max_http_attempts``, ``Config.retry_wait`` and
+                ``Config.retry_max_delay``.
+            single_flight (~skytap.framework.SingleFlight.SingleFlight):
+                Shares identical GETs made at the same time by different
+                threads. Only clients with the same transport and login
+                share a GET. Defaults to the process-wide one unless
+                ``Config.coalesce_gets`` is off.
+            hedging (~skytap.framework.Hedging.HedgePolicy): Sends a second
+                copy of GETs that are slow to answer. Defaults to the
+                process-wide policy if ``Config.hedge_percentile`` is set.
+            breaker (~skytap.framework.CircuitBreaker.CircuitBreaker): Stops
+                calls to parts of the API that keep failing. Defaults to the
+                process-wide breaker if ``Config.breaker_threshold`` is set,
+                unless the client answers from the simulator.
+            scheduler (~skytap.framework.Scheduler.RequestScheduler):
+                Decides which waiting request goes out next, by priority
+                class. Defaults to the process-wide scheduler if
+                ``Config.scheduler_slots`` is set.
+            priority (str): The priority class for this client's requests
+                (``'interactive'``, ``'normal'`` or ``'bulk'``). Defaults to
+                the one in force on the calling thread.
+            transport (~skytap.framework.Transport.Transport): What puts
+                requests on the wire. Defaults to a
+                :class:`~skytap.framework.Transport.RequestsTransport` on
+                ``session`` if one was given, otherwise the process-wide
+                transport named by ``Config.transport``.
+            cassette (~skytap.framework.Cassette.Cassette): Record every
+                request and response in this cassette. Defaults to the
+                process-wide one if ``Config.record_cassette`` is set.
+            hooks (~skytap.framework.Hooks.Hooks): Callbacks to call on
+                every request. Defaults to the process-wide ones, which feed
+                the process-wide
+                :class:`~skytap.framework.Metrics.MetricsRegistry` if
+                ``Config.metrics_port`` is set.
         """
         super(ApiClient, self).__init__()
 
-        if self._is_test_fixture:
-            self._sim_manager = SimulatorManager()
+        fixture = transport is None and session is None and (
+            self._is_test_fixture or Config.api_is_test_fixture)
+        if fixture:
             self.auth = ('test_user', 'test_token')
-            self.cmds = {
-                'GET': 'get',
-                'PUT': 'put',
-                'POST': 'post',
-                'DELETE': 'delete'
-            }
         else:
             if not Config.base_url:
                 raise ValueError('Invalid base_url')
@@ -46,74 +234,173 @@ class ApiClient(object):
 
             self.auth = (Config.user, Config.token)
 
-            self.cmds = {
-                'GET': requests.get,
-                'PUT': requests.put,
-                'POST': requests.post,
-                'DELETE': requests.delete
-            }
-
-        self.last_headers = None
-        self.last_status = 0
-        self.last_range = 0
+        if fixture:
+            # Classes flagged as fixtures get their own canned responses;
+            # anything else goes to the shared simulator.
+            if self._is_test_fixture:
+                self._sim_manager = SimulatorManager(get_shared_simulator())
+            else:
+                self._sim_manager = get_shared_simulator()
+            transport = MemoryTransport(self._sim_manager.respond)
+        elif transport is None:
+            if session is not None:
+                transport = RequestsTransport(session)
+            else:
+                transport = get_shared_transport()
+        if cassette is None:
+            cassette = get_shared_cassette()
+        if cassette is not None:
+            transport = RecordingTransport(transport, cassette)
+        self.transport = transport
+
+        if cache is None:
+            cache = get_shared_cache()
+        self.cache = cache
+        if validators is None:
+            validators = get_shared_validators()
+        self.validators = validators
+        if rate_limiter is None:
+            rate_limiter = get_shared_rate_limiter()
+        self.rate_limiter = rate_limiter
+        if governor is None:
+            governor = get_shared_governor()
+        self.governor = governor
+        if retry_policy is None:
+            retry_policy = RetryPolicy()
+        self.retry_policy = retry_policy
+        if single_flight is None:
+            single_flight = get_shared_single_flight()
+        self.single_flight = single_flight
+        if hedging is None:
+            hedging = get_shared_hedging()
+        self.hedging = hedging
+        if breaker is None and not fixture:
+            breaker = get_shared_breaker()
+        self.breaker = breaker
+        if scheduler is None:
+            scheduler = get_shared_scheduler()
+        self.scheduler = scheduler
+        self.priority = priority
+        if hooks is None:
+            hooks = get_shared_hooks()
+        self.hooks = hooks
+        self.metrics = get_shared_metrics()
+        # Starts tracing the process if Config.trace_file is set.
+        get_shared_tracer()
+
+        self._local = threading.local()
 
         self.headers = {
             'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',
             'Content-Type': 'application/json'
         }
 
-    def _check_response(self, resp, attempts=1):
-        """Return true if the rseponse a good/reasonable one.
+    @property
+    def session(self):
+        """The :class:`requests.Session` used, if the transport has one."""
+        return getattr(self.transport, 'session', None)
+
+    @property
+    def last_response(self):
+        """The :class:`ApiResponse` this thread last got, or None."""
+        return getattr(self._local, 'response', None)
+
+    @property
+    def last_status(self):
+        """The HTTP status this thread last got, or 0."""
+        last = self.last_response
+        return 0 if last is None else last.status_code
+
+    @property
+    def last_headers(self):
+        """The headers this thread last got, or None."""
+        last = self.last_response
+        return None if last is None else last.headers
+
+    @property
+    def last_range(self):
+        """The total from the content-range this thread last got, or 0."""
+        last = self.last_response
+        if last is None or "content-range" not in last.headers:
+            return 0
+        return last.headers["content-range"].split("/")[1]
+
+    def request(self, url, params=None, req='get', data=None):
+        """Make one request and return it as an :class:`ApiResponse`.
+
+        Unlike :func:`rest_json`, pagination is left to the caller: check
+        ``range`` and ``total`` on the result.
+
+        Example:
+
+        .. code-block:: python
+
+            resp = api.request('/v2/configurations', {'count': 10})
+            print(resp.status_code, resp.total, len(resp.json()))
+        """
+        if not url.upper().startswith('HTTP'):
+            url = Config.base_url + url
+        return self._request(req, url, params, data)
+
+    @staticmethod
+    def deadline(seconds):
+        """Limit everything in a ``with`` block to ``seconds`` in total.
+
+        Example:
+
+        .. code-block:: python
 
-        If the HTTP status code is in the 200s, return True,
-        otherwise try to determine what happened. If we're asked to retry,
-        politely wait the appropraite amount of time and retry, otherwise,
-        wait the retry_wait amount of time.
+            with api.deadline(30):
+                env.run(wait=True)
 
-        Fail (return False) if we've exceeded our retry amount.
+        See :mod:`skytap.framework.Deadline`.
         """
+        return Deadline(seconds)
+
+    @staticmethod
+    def _check_response(resp):
+        """Return True if the response is a good one (2xx, or a 304)."""
         if resp is None:
             raise ValueError("A response wasn't received")
+        return 200 <= resp.status_code < 300 or resp.status_code == 304
 
-        if 200 <= resp.status_code < 300:
-            return True
-
-        # If we made it this far, we need to handle an exception
-        if attempts >= Config.max_http_attempts or (resp.status_code != 429 and
-                                                    resp.status_code != 423):
-            if resp.status_code == 404:
-                raise Skytap404NotFoundError(resp)
-            elif resp.status_code == 401:
-                raise Skytap401UnauthorizedError(resp)
-            elif resp.status_code == 409:
-                raise Skytap409ConflictError(resp)
-            elif resp.status_code == 422:
-                raise Skytap422InvalidParamError(resp)
-            elif resp.status_code == 423:
-                raise Skytap423BusyError(resp)
-            elif resp.status_code == 429:
-                raise Skytap429TooManyRequestsError(resp)
-            elif resp.status_code == 500:
-                raise Skytap500SystemError(resp)
-            else:
-                raise SkytapOtherSystemError(resp)
-
-        if resp.status_code == 423:  # "Busy"
-            if 'Retry-After' in resp.headers:
-                Utils.info('Received HTTP 423. Retry-After set to ' +
-                              resp.headers['Retry-After'] + ' sec. Waiting to retry.')  # noqa
-                time.sleep(int(resp.headers['Retry-After']) + 1)
-            else:
-                Utils.info('Received HTTP 429. Too many requests. Waiting to retry.')  # noqa
-                time.sleep(Config.retry_wait)
-            return False
+    @staticmethod
+    def _raise_for_status(resp):
+        """Raise the exception that matches a failed response."""
+        if resp.status_code == 404:
+            raise Skytap404NotFoundError(resp)
+        elif resp.status_code == 401:
+            raise Skytap401UnauthorizedError(resp)
+        elif resp.status_code == 409:
+            raise Skytap409ConflictError(resp)
+        elif resp.status_code == 422:
+            raise Skytap422InvalidParamError(resp)
+        elif resp.status_code == 423:
+            raise Skytap423BusyError(resp)
+        elif resp.status_code == 429:
+            raise Skytap429TooManyRequestsError(resp)
+        elif resp.status_code == 500:
+            raise Skytap500SystemError(resp)
+        else:
+            raise SkytapOtherSystemError(resp)
 
-        # Assume we're going to retry with exponential backoff
-        # Should only get here on a 429 "too many requests" but it's
-        # not clear from Skytap what their limits are on when we should retry.
-        time.sleep(2 ** (attempts - 1))
+    @staticmethod
+    def _retry_after(resp):
+        """Return the seconds asked for by a Retry-After header, or None.
 
-        return False
+        Skytap may send either a number of seconds or an HTTP date.
+        """
+        value = resp.headers.get('Retry-After')
+        if value is None:
+            return None
+        try:
+            return max(0, int(value))
+        except ValueError:
+            parsed = parsedate_tz(value)
+            if parsed is None:
+                return None
+            return max(0, int(mktime_tz(parsed) - time.time()))
 
     @staticmethod
     def _dict_to_query_params(d):
@@ -137,62 +424,542 @@ class ApiClient(object):
         return '?' + "&".join(param_list)
 
     def rest(self, url, params=None, req='get', data=None):
-        """Call the REST API, returning all results.
+        """Call the REST API, returning all results as a formatted string.
+
+        This is the human-readable form of :func:`rest_json`: the decoded
+        response is pretty-printed back into JSON (or returned as-is if it
+        wasn't JSON). Code that works with the data should call
+        :func:`rest_json` instead and skip the extra encode/decode.
+        """
+        result = self.rest_json(url, params, req, data)
+        if isinstance(result, six.string_types):
+            return result
+        return json.dumps(result, indent=4)
+
+    def rest_json(self, url, params=None, req='get', data=None,
+                  fresh=False):
+        """Call the REST API, returning all results already decoded.
 
         This calls the actual REST API, then checks the returning headers in
         case there is a range returned, implying that the full range wasn't
-        returned originally. If there's a range, then make a second call asking
-        for everything.
+        returned originally. If there's a range, the remaining pages are
+        fetched (see :func:`iter_pages`) and joined onto the first one.
 
         This defeats the pagination that Skytap uses in their v2 API, but is
         useful for us given how we use the API.
+
+        If another thread is already making the same GET through the same
+        transport and login, this waits for it and returns its result
+        instead of asking again (see :mod:`skytap.framework.SingleFlight`).
+
+        With ``fresh``, a GET isn't answered from the response cache (its
+        answer is still stored there), so it reflects what Skytap has now.
+        It may still be a conditional GET answered with ``304 Not
+        Modified``. Use it when polling for a change.
+
+        Returns:
+            The decoded JSON body (usually a list or dict), or the response
+            text if the body wasn't JSON.
         """
         if params is None:
             params = {}
         if not url.upper().startswith('HTTP'):
             url = Config.base_url + url
 
-        first_call = self._rest(req, url, params, data)
-        if self.last_range == 0:
-            return first_call
+        if req.upper() != 'GET' or data is not None:
+            return self._request(req, url, params, data).json()
+
+        if self.single_flight is not None:
+            # Only share with clients that would have got the same answer.
+            key = (self.transport, self.auth, fresh,
+                   ResponseCache.key('GET', url, params))
+            result, self._local.response = self.single_flight.do(
+                key, lambda: (self._get_all(url, params, fresh),
+                              self.last_response))
+            return result
+        return self._get_all(url, params, fresh)
+
+    def _get_all(self, url, params, fresh=False):
+        """GET every page of ``url`` and join them."""
+        pages = list(self.iter_pages(url, params, fresh=fresh))
+        if len(pages) == 1:
+            return pages[0]
+        results = []
+        for page in pages:
+            results.extend(page)
+        return results
+
+    def iter_pages(self, url, params=None, page_size=None, parallel=None,
+                   stream=False, fresh=False):
+        """Yield a paginated list from the API one page at a time.
+
+        The first page is requested as-is (or with ``count=page_size``). If
+        Skytap answers with a ``content-range`` header showing there's more,
+        the remaining offsets are requested and yielded in order, so callers
+        can start working on the first page while the rest are on their way.
+
+        Args:
+            url (str): The Skytap URL to load ('/v2/configurations').
+            params (dict): Any URL parameters to add to URL.
+            page_size (int): How many items to ask for per page. Defaults to
+                ``Config.page_size``; 0 leaves it up to Skytap.
+            parallel (int): How many of the remaining pages to fetch at once
+                once the total is known. Defaults to ``Config.page_workers``.
+            stream (bool): Yield pages that parse their items as they're
+                read off the socket (see
+                :class:`~skytap.framework.JsonStream.StreamedPage`) instead
+                of lists. Read each page before asking for the next. Pages
+                that are cached, checked against validators, or fetched in
+                parallel still come as lists. Closing the generator closes
+                the page it last handed out.
+            fresh (bool): Don't answer from the cache, though the pages
+                are still stored in it.
+
+        Yields:
+            list: The decoded items of each page. A response that isn't a
+            list is yielded as the only page.
+
+        If the client has a cache, a fully read set of pages is stored in it
+        and later calls yield the cached pages until they expire. If it keeps
+        validators, single-page responses are fetched with a conditional GET
+        and a ``304 Not Modified`` yields the body we already have (the very
+        same object, so callers can tell it hasn't changed).
+
+        Example:
+
+        .. code-block:: python
+
+            api = ApiClient()
+            for page in api.iter_pages('/v2/configurations', page_size=100):
+                print(len(page))
+        """
+        if page_size is None:
+            page_size = Config.page_size
+        if parallel is None:
+            parallel = Config.page_workers
+        params = dict(params or {})
+        if not url.upper().startswith('HTTP'):
+            url = Config.base_url + url
+        if page_size:
+            params['offset'] = 0
+            params['count'] = page_size
+
+        if self.cache is not None:
+            hit, pages = False, None
+            if not fresh:
+                hit, pages = self.cache.get('GET', url, params)
+            if hit:
+                for page in pages:
+                    yield page
+                return
+            pages = []
+            for page in self._fetch_pages(url, params, page_size, parallel,
+                                          False):
+                pages.append(page)
+                yield page
+            self.cache.set('GET', url, params, pages)
+            return
+
+        for page in self._fetch_pages(url, params, page_size, parallel,
+                                      stream):
+            yield page
+
+    def _fetch_pages(self, url, params, page_size, parallel, stream):
+        """Request the pages for :func:`iter_pages` from Skytap."""
+        headers = stored = None
+        if self.validators is not None:
+            headers, stored = self.validators.lookup(url, params)
+            stream = False
+
+        response = self._request('GET', url, params, headers=headers)
+        if response.status_code == 304 and headers is not None:
+            response.close()
+            yield stored
+            return
+
+        content_range = self._parse_range(response.headers)
+        if stream:
+            first_page = response.stream_json()
+            try:
+                yield first_page
+                first_page.drain()
+            finally:
+                first_page.close()
+            count = first_page.count
+        else:
+            first_page = response.json()
+            yield first_page
+            if content_range is None and self.validators is not None:
+                self.validators.store(url, params, response.headers,
+                                      first_page)
+            if not isinstance(first_page, list):
+                return
+            count = len(first_page)
+        if content_range is None or count == 0:
+            return
+
+        start, total = content_range
+        page_size = page_size or count
+        offsets = list(range(start + count, total, page_size))
+
+        # Pages fetched on other threads keep this thread's deadline and
+        # priority class.
+        deadline = current_deadline()
+        page_priority = current_priority()
+
+        def fetch(offset):
+            page_params = dict(params, offset=offset, count=page_size)
+            with activate(deadline):
+                with priority(page_priority):
+                    return self._request('GET', url, page_params).json()
+
+        if parallel <= 1 or len(offsets) <= 1:
+            for offset in offsets:
+                if stream:
+                    page_params = dict(params, offset=offset, count=page_size)
+                    page = self._request('GET', url, page_params).stream_json()
+                    try:
+                        yield page
+                        page.drain()
+                    finally:
+                        page.close()
+                else:
+                    yield fetch(offset)
+            return
+
+        pool = ThreadPoolExecutor(max_workers=min(parallel, len(offsets)))
+        futures = [pool.submit(fetch, offset) for offset in offsets]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+            pool.shutdown(wait=False)
+
+    @staticmethod
+    def _parse_range(headers):
+        """Return (first offset, total) from a content-range header, or None.
+
+        Skytap sends something like ``items 0-99/1234``.
+        """
+        if headers is None or 'content-range' not in headers:
+            return None
+        try:
+            span, total = headers['content-range'].split('/')
+            start = span.split()[-1].split('-')[0]
+            return int(start), int(total)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _decode(response):
+        """Return the decoded JSON body of a response, or its text.
+
+        Where Python can (3.6 on), the JSON is parsed straight from the
+        body's bytes instead of from a decoded copy held as text. The body
+        is streamed rather than read whole, and it is already decompressed
+        if Skytap gzipped it.
+        """
+        body = ApiClient._read_body(response)
+        try:
+            if not _JSON_FROM_BYTES:
+                return json.loads(bytes(body).decode('utf-8'))
+            return json.loads(body)
+        except ValueError:
+            return body.decode(response.encoding or 'utf-8', 'replace')
+
+    @staticmethod
+    def _read_body(response, chunk_size=64 * 1024):
+        """Return a response's body, reading it off the socket if need be.
+
+        A streamed body is gathered into one buffer as it arrives, so only
+        one full copy of it ever exists, and it isn't kept on the response.
+        """
+        if response._content is not False:
+            return response.content or b''
+        body = bytearray()
+        for chunk in response.iter_content(chunk_size):
+            body.extend(chunk)
+        ApiClient._release(response)
+        return body
+
+    @staticmethod
+    def _iter_body(response, chunk_size=64 * 1024):
+        """Yield a response's body in chunks as it comes off the socket."""
+        if response._content is not False:
+            yield response.content or b''
+            return
+        for chunk in response.iter_content(chunk_size):
+            yield chunk
+
+    @staticmethod
+    def _release(response):
+        """Close a response's connection, if it came off one.
+
+        Responses made up in memory have nothing to close.
+        """
+        if response.raw is not None:
+            response.close()
+
+    def _request(self, req, url, params=None, data=None, headers=None):
+        """Send one request, retrying as needed, and return the response.
+
+        ``headers`` are sent on top of the client's usual headers. Failed
+        tries are retried as :attr:`retry_policy` allows (see
+        :mod:`skytap.framework.Retry`); once it gives up, the matching
+        Skytap exception is raised, or the connection error re-raised.
 
-        params['offset'] = 0
-        params['count'] = self.last_range
+        Returns:
+            ApiResponse: The successful response.
 
-        return self._rest(req, url, params, data)
+        If a :class:`~skytap.framework.Deadline.Deadline` is in force, no
+        try starts, and no retry is waited for, past it.
 
-    def _rest(self, req, url, params=None, data=None, attempts=0):
-        """Send a rest rest request to the server."""
+        Each try is reported to the client's :attr:`hooks` (see
+        :mod:`skytap.framework.Hooks`).
+        """
         if params is None:
             params = {}
+        if headers:
+            headers = dict(self.headers, **headers)
+        else:
+            headers = self.headers
         cmd = req.upper()
-        if cmd not in self.cmds.keys():
+        if cmd not in _METHODS:
             raise ValueError("Command type (" + cmd + ") not recognized.")
 
-        url += self._dict_to_query_params(params)
+        full_url = url + self._dict_to_query_params(params)
+        retries = self.retry_policy.start(cmd)
+        deadline = current_deadline()
+        started = time.time()
+        hooks = self.hooks if self.hooks else None
+        breaker_failed = False
+
+        while True:
+            if deadline is not None:
+                deadline.check()
+            event = None
+            if hooks is not None:
+                event = RequestEvent(cmd, full_url, retries.attempts + 1,
+                                     time.time())
+                hooks.fire('before_request', event)
+            try:
+                response = self._attempt(cmd, full_url, headers, data)
+            except requests.exceptions.RequestException as e:
+                if isinstance(e, _BREAKER_ERRORS):
+                    breaker_failed = self._breaker_failure(full_url,
+                                                           breaker_failed)
+                delay = retries.next_delay(error=e)
+                if event is not None:
+                    event.error = e
+                    event.total = time.time() - event.started
+                if delay is None:
+                    self._fire(event, 'on_error')
+                    raise
+                self._check_wait(deadline, delay, event)
+                if event is not None:
+                    event.delay = delay
+                self._fire(event, 'on_retry')
+                Utils.info(cmd + ' ' + url + ' failed (' + str(e) +
+                           '). Retrying in ' + str(round(delay, 1)) + ' sec.')
+                time.sleep(delay)
+                continue
+            except Exception as e:
+                self._fail(event, e)
+                raise
+
+            if event is not None:
+                event.responded(response, time.time() - event.started)
+                hooks.fire('after_response', event)
+
+            if self.breaker is not None and response is not None:
+                if response.status_code >= 500:
+                    breaker_failed = self._breaker_failure(full_url,
+                                                           breaker_failed)
+                else:
+                    self.breaker.success(full_url)
+
+            result = ApiResponse(response, cmd, full_url, retries.attempts + 1,
+                                 time.time() - started)
+            self._local.response = result
+
+            if self._check_response(response):
+                if cmd != 'GET' and self.cache is not None:
+                    self.cache.invalidate(url)
+                return result
+
+            retry_after = self._retry_after(response)
+            delay = retries.next_delay(response=response,
+                                       retry_after=retry_after)
+            if delay is None:
+                try:
+                    self._raise_for_status(response)
+                except Exception as e:
+                    self._fail(event, e)
+                    raise
+            self._check_wait(deadline, delay, event)
+            if event is not None:
+                event.delay = delay
+            self._fire(event, 'on_retry')
+            Utils.info('Received HTTP ' + str(response.status_code) +
+                       '. Retrying in ' + str(round(delay, 1)) + ' sec.')
+            self._release(response)
+            time.sleep(delay)
+
+    def _fire(self, event, name):
+        """Call the ``name`` hooks, if this request is being watched."""
+        if event is not None:
+            self.hooks.fire(name, event)
+
+    def _fail(self, event, error):
+        """Report a request that's failed for good to the hooks."""
+        if event is not None:
+            event.error = error
+            if event.total is None:
+                event.total = time.time() - event.started
+            self.hooks.fire('on_error', event)
+
+    def _check_wait(self, deadline, delay, event=None):
+        """Give up now if waiting ``delay`` would run past the deadline."""
+        if deadline is not None and delay >= deadline.remaining():
+            error = SkytapDeadlineExceededError(deadline.seconds)
+            self._fail(event, error)
+            raise error
+
+    def _attempt(self, cmd, url, headers, data):
+        """Make one try at a request, once the scheduler lets it go."""
+        if self.scheduler is None:
+            return self._dispatch(cmd, url, headers, data)
+
+        deadline = current_deadline()
+        timeout = None if deadline is None else deadline.remaining()
+        if not self.scheduler.acquire(self.priority, timeout=timeout):
+            raise SkytapDeadlineExceededError(deadline.seconds)
+        try:
+            return self._dispatch(cmd, url, headers, data)
+        finally:
+            self.scheduler.release()
+
+    def _dispatch(self, cmd, url, headers, data):
+        """Send one try under the rate limit and governor."""
+        deadline = current_deadline()
+        timeout = None if deadline is None else deadline.remaining()
+        if self.rate_limiter is not None:
+            if not self.rate_limiter.acquire(timeout=timeout):
+                raise SkytapDeadlineExceededError(deadline.seconds)
+
+        send = self._send
+        if cmd == 'GET' and self.hedging is not None:
+            send = self._send_hedged
+
+        if self.governor is None:
+            return self._send_checked(send, cmd, url, headers, data)
+
+        if deadline is not None:
+            timeout = deadline.remaining()
+        if not self.governor.acquire(timeout=timeout):
+            raise SkytapDeadlineExceededError(deadline.seconds)
+        try:
+            response = self._send_checked(send, cmd, url, headers, data)
+        finally:
+            self.governor.release()
+        if response is not None and response.status_code in (423, 429):
+            self.governor.throttled(self._retry_after(response))
+        elif response is not None and response.status_code < 300:
+            self.governor.success()
+        return response
+
+    def _send_checked(self, send, cmd, url, headers, data):
+        """Call ``send`` through the circuit breaker, if there is one.
+
+        Raises:
+            SkytapCircuitOpenError: If calls to this part of the API are
+                failing and being held off. See
+                :mod:`skytap.framework.CircuitBreaker`.
+        """
+        breaker = self.breaker
+        if breaker is None:
+            return send(cmd, url, headers, data)
+
+        breaker.before(url)
+        try:
+            return send(cmd, url, headers, data)
+        except _BREAKER_ERRORS:
+            raise  # counted by _request, once per request
+        except BaseException:
+            breaker.abandon(url)
+            raise
+
+    def _breaker_failure(self, url, counted):
+        """Tell the circuit breaker a try failed; returns True.
+
+        Only a request's first failure counts towards opening the circuit,
+        so retries of one flaky call don't trip it on their own. Later ones
+        just hand back any half-open trial the try held.
+        """
+        if self.breaker is not None:
+            if counted:
+                self.breaker.abandon(url)
+            else:
+                self.breaker.failure(url)
+        return True
+
+    def _send_hedged(self, cmd, url, headers, data):
+        """Send a GET, sending it again if the answer is slow to come.
+
+        See :mod:`skytap.framework.Hedging`.
+        """
+        deadline = current_deadline()
+        hedge_priority = current_priority()
+
+        def send():
+            with activate(deadline):
+                with priority(hedge_priority):
+                    return self._send(cmd, url, headers, data)
+
+        def may_hedge():
+            # The second copy needs its own token and governor slot, and
+            # isn't sent if it would have to wait for either.
+            if (self.rate_limiter is not None and
+                    not self.rate_limiter.try_acquire()):
+                return False
+            return self.governor is None or self.governor.acquire(timeout=0)
+
+        hedge_done = None
+        if self.governor is not None:
+            hedge_done = self.governor.release
+        return self.hedging.run(send, may_hedge, hedge_done)
+
+    def _send(self, cmd, url, headers, data):
+        """Put one request on the wire and return the raw response.
+
+        Every transport's responses get an ``elapsed`` time, as those from
+        a :class:`requests.Session` do.
+        """
+        started = time.time()
+        response = self.transport.send(cmd, url, headers=headers,
+                                       auth=self.auth, data=data,
+                                       timeout=self._timeout(), stream=True)
+        if response is not None and not response.elapsed:
+            response.elapsed = datetime.timedelta(
+                seconds=time.time() - started)
+        return response
 
-        if self._is_test_fixture:
-            # if this should use the text fixture, send the requests there instead of the actual requests lib.
-            request = requests.Request(cmd, url, headers=self.headers, auth=self.auth, params=data)
-            response = self._sim_manager.respond(request, attempts)
+    @staticmethod
+    def _timeout():
+        """Return the (connect, read) timeout for the next request.
 
-        else:
-            response = self.cmds[cmd](url,
-                                      headers=self.headers,
-                                      auth=self.auth,
-                                      params=data)
-
-        self.last_status = response.status_code
-        self.last_headers = response.headers
-        self.last_range = 0
-        if "content-range" in self.last_headers:
-            self.last_range = self.last_headers["content-range"].split("/")[1]
-
-        attempts += 1
-        if self._check_response(response, attempts):
-            try:
-                return json.dumps(json.loads(response.text), indent=4)
-            except ValueError:
-                return response.text
-        else:
-            return self._rest(req, url, params, data, attempts)
+        Comes from ``Config.connect_timeout`` and ``Config.read_timeout``
+        (0 for none), cut down to whatever is left of the current deadline.
+        """
+        connect = Config.connect_timeout or None
+        read = Config.read_timeout or None
+        deadline = current_deadline()
+        if deadline is not None:
+            remaining = max(0.001, deadline.remaining())
+            connect = remaining if connect is None else min(connect, remaining)
+            read = remaining if read is None else min(read, remaining)
+        if connect is None and read is None:
+            return None
+        return connect, read
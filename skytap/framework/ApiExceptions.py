@@ -58,3 +58,22 @@ class Skytap500SystemError(SkytapBaseApiError):
 
 class SkytapOtherSystemError(SkytapBaseApiError):
     _desc = 'Unknown Error'
+
+
+class SkytapDeadlineExceededError(BaseSkytapException):
+    _template = 'Skytap deadline of {} sec exceeded'
+
+    def __str__(self):
+        return self.message
+
+
+class SkytapCircuitOpenError(BaseSkytapException):
+    _template = 'Skytap circuit for {} is open; retry in {:.0f} sec'
+
+    def __init__(self, family, retry_in):
+        self.family = family
+        self.retry_in = retry_in
+        super(SkytapCircuitOpenError, self).__init__(family, retry_in)
+
+    def __str__(self):
+        return self.message
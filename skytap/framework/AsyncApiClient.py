@@ -0,0 +1,294 @@
+"""An asyncio counterpart to :class:`~skytap.framework.ApiClient.ApiClient`.
+
+Fanning out over thousands of environments with the blocking client means
+a thread per request in flight. :class:`AsyncApiClient` lets one event loop
+drive them instead, with a semaphore capping how many are in flight::
+
+    api = AsyncApiClient(max_concurrency=100)
+    envs = await skytap.Environments.aload(api)
+    notes = await asyncio.gather(*[api.rest_json(e.url + '/notes.json')
+                                   for e in envs])
+
+Requests are retried by the same :class:`~skytap.framework.Retry.RetryPolicy`
+rules as the blocking client, sit under the same rate limiter, share its
+cache, join paginated lists the same way, and raise the same
+``Skytap4xx/5xx`` exceptions from :mod:`skytap.framework.ApiExceptions`.
+
+The actual HTTP goes through a transport: any object with an
+``async send(method, url, headers, auth, data, timeout)`` method returning
+a :class:`requests.Response`. Any of the blocking client's transports from
+:mod:`skytap.framework.Transport` can be passed instead, and is run on a
+thread pool by an :class:`ExecutorTransport`; by default that's the one
+named by ``Config.transport``.
+
+.. note::
+    This module needs Python 3.5 or later. The rest of the package doesn't
+    import it, so it's only loaded when used.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import functools
+
+import requests
+
+from skytap.framework.ApiClient import ApiClient
+from skytap.framework.Cache import get_shared_cache
+from skytap.framework.Cassette import RecordingTransport, get_shared_cassette
+from skytap.framework.Config import Config
+from skytap.framework.RateLimiter import get_shared_rate_limiter
+from skytap.framework.Retry import RetryPolicy
+from skytap.framework.Transport import RequestsTransport, Transport
+from skytap.framework.Transport import get_shared_transport
+import skytap.framework.Utils as Utils
+
+
+async def load_group(cls, async_client=None, client=None, page_size=None):
+    """Load a top-level group; see :func:`SkytapGroup.aload`."""
+    own_client = async_client is None
+    if own_client:
+        async_client = AsyncApiClient()
+    try:
+        items = []
+        pages = await async_client.get_pages(cls._list_url, cls._list_params,
+                                             page_size)
+        for page in pages:
+            if not isinstance(page, list):
+                raise TypeError
+            items.extend(page)
+    finally:
+        if own_client:
+            async_client.close()
+    group = cls(items, client=client)
+    # Groups built from a list don't know where it came from; this one
+    # refreshes from the top-level list it was loaded from.
+    group._set_url(cls._list_url)
+    group.params = dict(cls._list_params or {})
+    return group
+
+
+class ExecutorTransport(object):
+
+    """Run a blocking transport on a thread pool."""
+
+    def __init__(self, session=None, max_workers=32, transport=None):
+        """Set up the transport.
+
+        Args:
+            session (requests.Session): Send requests with this session,
+                if no ``transport`` is given.
+            max_workers (int): Threads to send requests on.
+            transport (~skytap.framework.Transport.Transport): What to run.
+                Defaults to the process-wide transport.
+        """
+        if transport is None:
+            if session is not None:
+                transport = RequestsTransport(session)
+            else:
+                transport = get_shared_transport()
+        self.transport = transport
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    async def send(self, method, url, headers=None, auth=None, data=None,
+                   timeout=None):
+        """Send one request and return the :class:`requests.Response`.
+
+        The body is read on the pool's thread, so decoding it later never
+        blocks the event loop.
+        """
+        call = functools.partial(self.transport.send, method, url,
+                                 headers=headers, auth=auth, data=data,
+                                 timeout=timeout, stream=False)
+        return await asyncio.get_event_loop().run_in_executor(self._pool,
+                                                              call)
+
+    def close(self):
+        """Stop the thread pool."""
+        self._pool.shutdown(wait=False)
+
+
+class AsyncApiClient(object):
+
+    """Make Skytap API calls from asyncio code."""
+
+    def __init__(self, transport=None, max_concurrency=32, cache=None,
+                 rate_limiter=None, retry_policy=None):
+        """Set up the client.
+
+        Args:
+            transport: What sends the requests: an async transport, or a
+                blocking :class:`~skytap.framework.Transport.Transport` to
+                run on an :class:`ExecutorTransport`. Defaults to the
+                process-wide transport, run on ``max_concurrency`` threads
+                (and recorded, if ``Config.record_cassette`` is set).
+            max_concurrency (int): How many requests may be in flight at once.
+            cache (~skytap.framework.Cache.ResponseCache): Where to cache
+                GET responses. Defaults to the process-wide cache, if any.
+            rate_limiter (~skytap.framework.RateLimiter.TokenBucket): Takes
+                a token before every request. Defaults to the process-wide
+                limiter, if any.
+            retry_policy (~skytap.framework.Retry.RetryPolicy): When to
+                retry failed requests. Defaults to one built from Config.
+        """
+        if not Config.base_url:
+            raise ValueError('Invalid base_url')
+
+        if not Config.user:
+            raise ValueError('Invalid api_user')
+
+        if not Config.token:
+            raise ValueError('Invalid api_token')
+
+        self.auth = (Config.user, Config.token)
+        self.headers = {
+            'Accept': 'application/json',
+            'Content-Type': 'application/json'
+        }
+
+        cassette = get_shared_cassette()
+        if transport is None and cassette is not None:
+            transport = RecordingTransport(get_shared_transport(), cassette)
+        if transport is None or isinstance(transport, Transport):
+            transport = ExecutorTransport(max_workers=max_concurrency,
+                                          transport=transport)
+        self.transport = transport
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+
+        if cache is None:
+            cache = get_shared_cache()
+        self.cache = cache
+        if rate_limiter is None:
+            rate_limiter = get_shared_rate_limiter()
+        self.rate_limiter = rate_limiter
+        if retry_policy is None:
+            retry_policy = RetryPolicy()
+        self.retry_policy = retry_policy
+
+    async def rest_json(self, url, params=None, req='get', data=None):
+        """Call the REST API, returning all results already decoded.
+
+        The async form of
+        :func:`~skytap.framework.ApiClient.ApiClient.rest_json`: paginated
+        lists come back whole.
+        """
+        if req.upper() != 'GET' or data is not None:
+            response = await self._request(req, self._full_url(url), params,
+                                           data)
+            return ApiClient._decode(response)
+
+        pages = await self.get_pages(url, params)
+        if len(pages) == 1:
+            return pages[0]
+        results = []
+        for page in pages:
+            results.extend(page)
+        return results
+
+    async def get_pages(self, url, params=None, page_size=None):
+        """Fetch a paginated list and return its decoded pages in order.
+
+        Once the first page says how many items there are, the rest are
+        requested all at once (still within ``max_concurrency``).
+
+        Args:
+            url (str): The Skytap URL to load ('/v2/configurations').
+            params (dict): Any URL parameters to add to URL.
+            page_size (int): Items to ask for per page. Defaults to
+                ``Config.page_size``; 0 leaves it up to Skytap.
+        """
+        if page_size is None:
+            page_size = Config.page_size
+        url = self._full_url(url)
+        params = dict(params or {})
+        if page_size:
+            params['offset'] = 0
+            params['count'] = page_size
+
+        if self.cache is not None:
+            hit, pages = self.cache.get('GET', url, params)
+            if hit:
+                return pages
+
+        response = await self._request('GET', url, params)
+        first_page = ApiClient._decode(response)
+        pages = [first_page]
+
+        content_range = ApiClient._parse_range(response.headers)
+        if (content_range is not None and isinstance(first_page, list) and
+                len(first_page) > 0):
+            start, total = content_range
+            page_size = page_size or len(first_page)
+            offsets = range(start + len(first_page), total, page_size)
+            responses = await asyncio.gather(*[
+                self._request('GET', url,
+                              dict(params, offset=offset, count=page_size))
+                for offset in offsets])
+            pages.extend(ApiClient._decode(r) for r in responses)
+
+        if self.cache is not None:
+            self.cache.set('GET', url, params, pages)
+        return pages
+
+    async def _request(self, req, url, params=None, data=None):
+        """Send one request, retrying as needed, and return the response."""
+        cmd = req.upper()
+        if cmd not in ('GET', 'PUT', 'POST', 'DELETE'):
+            raise ValueError("Command type (" + cmd + ") not recognized.")
+
+        full_url = url + ApiClient._dict_to_query_params(params or {})
+        retries = self.retry_policy.start(cmd)
+
+        while True:
+            try:
+                response = await self._attempt(cmd, full_url, data)
+            except requests.exceptions.RequestException as e:
+                delay = retries.next_delay(error=e)
+                if delay is None:
+                    raise
+                Utils.info(cmd + ' ' + url + ' failed (' + str(e) +
+                           '). Retrying in ' + str(round(delay, 1)) + ' sec.')
+                await asyncio.sleep(delay)
+                continue
+
+            if ApiClient._check_response(response):
+                if cmd != 'GET' and self.cache is not None:
+                    self.cache.invalidate(url)
+                return response
+
+            delay = retries.next_delay(
+                response=response,
+                retry_after=ApiClient._retry_after(response))
+            if delay is None:
+                ApiClient._raise_for_status(response)
+            Utils.info('Received HTTP ' + str(response.status_code) +
+                       '. Retrying in ' + str(round(delay, 1)) + ' sec.')
+            await asyncio.sleep(delay)
+
+    async def _attempt(self, cmd, url, data):
+        """Make one try at a request, under the rate limit and semaphore."""
+        await self._throttle()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            return await self.transport.send(cmd, url, headers=self.headers,
+                                             auth=self.auth, data=data,
+                                             timeout=ApiClient._timeout())
+
+    async def _throttle(self):
+        """Wait for the rate limiter without blocking the event loop."""
+        if self.rate_limiter is None:
+            return
+        while not self.rate_limiter.try_acquire():
+            await asyncio.sleep(1.0 / self.rate_limiter.rate)
+
+    @staticmethod
+    def _full_url(url):
+        if not url.upper().startswith('HTTP'):
+            return Config.base_url + url
+        return url
+
+    def close(self):
+        """Release the transport's resources, if it has any."""
+        close = getattr(self.transport, 'close', None)
+        if close is not None:
+            close()
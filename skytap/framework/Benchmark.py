@@ -0,0 +1,405 @@
+"""Time how fast lists of resources are built, searched and turned to JSON.
+
+Nothing here talks to Skytap. The list to work on comes from a
+:class:`~skytap.framework.Fixtures.SkytapSimulator` account, or from a
+recorded payload (a JSON list saved from a real ``/v2/configurations``
+call, say), copied with new ids until it's as long as each size asked for.
+Each case is timed at each size:
+
+========================= =================================================
+case                      times
+========================= =================================================
+``load_list_from_json``   :func:`SkytapGroup.load_list_from_json
+                          <skytap.models.SkytapGroup.SkytapGroup.load_list_from_json>`
+``resource_init``         building each resource on its own
+``convert_data_elements`` ``_convert_data_elements`` on every resource
+``json``                  :func:`SkytapGroup.json
+                          <skytap.models.SkytapGroup.SkytapGroup.json>`
+``find``                  :func:`SkytapGroup.find
+                          <skytap.models.SkytapGroup.SkytapGroup.find>` by
+                          name
+``iterate``               a ``for`` loop over the group
+========================= =================================================
+
+For each one the best and mean of a few runs are kept, then it's run once
+more under :mod:`tracemalloc` for the peak memory it used and the memory
+blocks still held by what it built.
+
+Run it from the command line::
+
+    python -m skytap.framework.Benchmark --output before.json
+    # ... make a change ...
+    python -m skytap.framework.Benchmark --compare before.json
+
+``--compare`` lists every case that got slower or used more memory than the
+baseline by more than ``--threshold`` (10% by default), and exits with 1 if
+there were any.
+
+It runs on Python 2.7 and 3.3 on. :mod:`tracemalloc` is only there from
+3.4, so on older versions the memory figures are left out (``None``) and
+only the times are compared.
+"""
+from __future__ import print_function
+
+import argparse
+from collections import OrderedDict
+import copy
+import gc
+import importlib
+import json
+import platform
+import sys
+import time
+from timeit import default_timer
+
+try:
+    import tracemalloc
+except ImportError:  # Python before 3.4
+    tracemalloc = None
+
+from skytap.framework.ApiClient import ApiClient
+from skytap.framework.Fixtures import SkytapSimulator
+from skytap.framework.Transport import MemoryTransport
+
+#: The list sizes timed by default.
+SIZES = (100, 1000, 10000, 50000)
+
+#: What's compared against a baseline: a regression is any of these growing
+#: by more than the threshold.
+METRICS = ('seconds', 'peak_bytes')
+
+DEFAULT_TARGET = 'skytap.models.Environment.Environment'
+
+
+class Workload(object):
+
+    """One list of a given size, and what's needed to build from it.
+
+    The list is kept as JSON text so each run can start from fresh dicts;
+    the resources change the dicts they're built from. The group the
+    search, JSON and iteration cases work on is built once, when first
+    needed.
+    """
+
+    def __init__(self, items, size, target):
+        """Set up the workload.
+
+        Args:
+            items (list): The JSON items to copy from.
+            size (int): How many items the list should have.
+            target: The :class:`~skytap.models.SkytapResource.SkytapResource`
+                type each item becomes.
+        """
+        self.size = size
+        self.target = target
+        self.text = json.dumps(stretch(items, size))
+        self.search = 'no such name'
+        if size:
+            self.search = json.loads(self.text)[size // 2].get('name', '')
+        self.client = ApiClient(transport=MemoryTransport(_not_found))
+        self._group = None
+
+    def items(self):
+        """Return a fresh copy of the list."""
+        return json.loads(self.text)
+
+    @property
+    def group(self):
+        """A group loaded with the list."""
+        if self._group is None:
+            from skytap.models.SkytapGroup import SkytapGroup
+            self._group = SkytapGroup(client=self.client)
+            self._group.load_list_from_json(self.items(), self.target)
+        return self._group
+
+
+def _not_found(request):
+    """Answer anything the resources try to load lazily with a 404."""
+    return 404, {'error': 'Not part of the benchmark'}
+
+
+def _load_list_from_json(workload):
+    from skytap.models.SkytapGroup import SkytapGroup
+    group = SkytapGroup(client=workload.client)
+    items = workload.items()
+    return lambda: group.load_list_from_json(items, workload.target)
+
+
+def _resource_init(workload):
+    target, client = workload.target, workload.client
+    items = workload.items()
+    return lambda: [target(item, client=client) for item in items]
+
+
+def _convert_data_elements(workload):
+    resources = list(workload.group.data.values())
+
+    def run():
+        for resource in resources:
+            resource._convert_data_elements()
+    return run
+
+
+def _json(workload):
+    return workload.group.json
+
+
+def _find(workload):
+    group = workload.group
+    return lambda: group.find(workload.search)
+
+
+def _iterate(workload):
+    group = workload.group
+    group.itercount = 0
+
+    def run():
+        for _ in group:
+            pass
+    return run
+
+
+#: Each case takes a :class:`Workload` and returns the call to time.
+CASES = OrderedDict([
+    ('load_list_from_json', _load_list_from_json),
+    ('resource_init', _resource_init),
+    ('convert_data_elements', _convert_data_elements),
+    ('json', _json),
+    ('find', _find),
+    ('iterate', _iterate),
+])
+
+
+def stretch(items, size):
+    """Return ``size`` items, repeating the given ones with new ids."""
+    if not items:
+        raise ValueError('Nothing to build the benchmark list from')
+    if len(items) >= size:
+        return list(items[:size])
+    stretched = []
+    for index in range(size):
+        item = copy.deepcopy(items[index % len(items)])
+        item['id'] = str(index + 1)
+        stretched.append(item)
+    return stretched
+
+
+def simulated_items(size):
+    """Return ``size`` environments listed from a simulated account."""
+    simulator = SkytapSimulator(environments=size, page_size=size)
+    api = ApiClient(transport=MemoryTransport(simulator.respond))
+    return api.rest_json('/v2/configurations')
+
+
+def load_target(name):
+    """Import a resource type from its dotted name."""
+    module, _, cls = name.rpartition('.')
+    return getattr(importlib.import_module(module), cls)
+
+
+def measure(setup, workload, repeat=3):
+    """Time one case on one workload.
+
+    Args:
+        setup: Takes the workload and returns the call to time.
+        workload (Workload): What to run it on.
+        repeat (int): How many timed runs.
+
+    Returns:
+        dict: ``seconds`` (best run), ``mean_seconds``, ``peak_bytes``
+        (most memory in use at once during the call) and ``blocks``
+        (memory blocks still held by what it built, once it's returned).
+        The memory figures are None without :mod:`tracemalloc`.
+    """
+    times = []
+    for _ in range(repeat):
+        run = setup(workload)
+        gc.collect()
+        start = default_timer()
+        run()
+        times.append(default_timer() - start)
+        del run
+
+    peak = blocks = None
+    if tracemalloc is not None:
+        run = setup(workload)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = run()
+            peak = tracemalloc.get_traced_memory()[1]
+            snapshot = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+        del result
+        blocks = sum(stat.count for stat in snapshot.statistics('filename'))
+
+    return {
+        'seconds': min(times) if times else None,
+        'mean_seconds': sum(times) / len(times) if times else None,
+        'peak_bytes': peak,
+        'blocks': blocks,
+    }
+
+
+def run(sizes=SIZES, cases=None, repeat=3, items=None,
+        target=DEFAULT_TARGET, report=None):
+    """Run the benchmarks.
+
+    Args:
+        sizes (list): The list sizes to time.
+        cases (list): The names of the cases to run; defaults to all of
+            :data:`CASES`.
+        repeat (int): Timed runs of each case at each size.
+        items (list): Recorded JSON items to build the lists from. Defaults
+            to a simulated account's environments.
+        target (str): The dotted name of the resource type to build.
+        report: Called with each result as it's finished.
+
+    Returns:
+        dict: The results, ready to be saved with :func:`save`.
+    """
+    cases = list(CASES) if cases is None else list(cases)
+    for name in cases:
+        if name not in CASES:
+            raise ValueError('Unknown benchmark case: ' + str(name))
+    target_type = load_target(target)
+
+    results = []
+    for size in sizes:
+        source = items if items is not None else simulated_items(size)
+        workload = Workload(source, size, target_type)
+        for name in cases:
+            result = OrderedDict([('case', name), ('size', size)])
+            result.update(measure(CASES[name], workload, repeat))
+            results.append(result)
+            if report is not None:
+                report(result)
+
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'target': target,
+        'source': 'simulator' if items is None else 'payload',
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def save(results, path):
+    """Write results to a JSON file."""
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+def load(path):
+    """Read results written by :func:`save`."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold=0.10, metrics=METRICS):
+    """Find what got worse since the baseline.
+
+    Only cases and sizes in both sets of results are compared.
+
+    Args:
+        baseline (dict): Earlier results.
+        current (dict): Newer results.
+        threshold (float): How much worse (0.10 is 10%) counts.
+        metrics (list): What to compare.
+
+    Returns:
+        list: A dict for each regression, with the ``case``, ``size``,
+        ``metric``, ``baseline`` and ``current`` values and the ``change``
+        (0.25 is 25% worse).
+    """
+    before = dict(((r['case'], r['size']), r) for r in baseline['results'])
+    regressions = []
+    for result in current['results']:
+        old = before.get((result['case'], result['size']))
+        if old is None:
+            continue
+        for metric in metrics:
+            if not old.get(metric) or result.get(metric) is None:
+                continue
+            change = (result[metric] - old[metric]) / float(old[metric])
+            if change > threshold:
+                regressions.append(OrderedDict([
+                    ('case', result['case']),
+                    ('size', result['size']),
+                    ('metric', metric),
+                    ('baseline', old[metric]),
+                    ('current', result[metric]),
+                    ('change', change),
+                ]))
+    return regressions
+
+
+def format_result(result):
+    """One line of the results table."""
+    return '%-22s %7d %10.4fs %10.4fs %12s %10s' % (
+        result['case'], result['size'], result['seconds'],
+        result['mean_seconds'], _count(result['peak_bytes']),
+        _count(result['blocks']))
+
+
+def _count(value):
+    return '-' if value is None else str(value)
+
+
+def format_regression(regression):
+    """One line of the regressions list."""
+    return '%-22s %7d %-10s %14.4f -> %14.4f (%+.1f%%)' % (
+        regression['case'], regression['size'], regression['metric'],
+        regression['baseline'], regression['current'],
+        regression['change'] * 100)
+
+
+def main(argv=None):
+    """Run from the command line; returns the exit status."""
+    parser = argparse.ArgumentParser(
+        prog='python -m skytap.framework.Benchmark',
+        description='Time building, searching and serializing groups.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES),
+                        help='List sizes to time')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES),
+                        help='Cases to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Timed runs of each case')
+    parser.add_argument('--payload',
+                        help='JSON list to build from instead of the '
+                             'simulator')
+    parser.add_argument('--target', default=DEFAULT_TARGET,
+                        help='Resource type to build')
+    parser.add_argument('--output', help='Write the results to this file')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='Flag regressions against earlier results')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='How much worse counts as a regression')
+    args = parser.parse_args(argv)
+
+    items = load(args.payload) if args.payload else None
+    print('%-22s %7s %11s %11s %12s %10s' % (
+        'case', 'size', 'best', 'mean', 'peak bytes', 'blocks'))
+    results = run(args.sizes, args.cases, args.repeat, items, args.target,
+                  report=lambda r: print(format_result(r)))
+    if args.output:
+        save(results, args.output)
+
+    if args.compare:
+        regressions = compare(load(args.compare), results, args.threshold)
+        print('')
+        if not regressions:
+            print('No regressions against ' + args.compare)
+            return 0
+        print('Regressions against ' + args.compare + ':')
+        for regression in regressions:
+            print(format_regression(regression))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
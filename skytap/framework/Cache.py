@@ -0,0 +1,252 @@
+"""Client-side caching of Skytap API responses.
+
+A :class:`ResponseCache` keeps the decoded bodies of GET requests for a
+short time so repeated loads of the same list (say, building
+``skytap.Environments()`` every few seconds on a dashboard) don't go back to
+Skytap every time. It's opt-in: either hand one to an
+:class:`~skytap.framework.ApiClient.ApiClient`::
+
+    cache = ResponseCache(ttl=30, ttls={'/v2/users': 300})
+    client = ApiClient(cache=cache)
+    envs = skytap.Environments(client=client)
+
+or set ``SKYTAP_CACHE_TTL`` (``Config.cache_ttl``) to have every client
+share one process-wide cache.
+
+Any PUT, POST or DELETE made through a client clears cached entries for the
+URL it touched, everything above it and everything below it, so deleting
+``/configurations/123`` also drops a cached ``/v2/configurations`` list.
+
+A :class:`ValidatorCache` does the same job for conditional requests: it
+remembers the ``ETag`` and ``Last-Modified`` headers Skytap sent with each
+response, and the client sends them back on the next GET. If nothing has
+changed Skytap answers ``304 Not Modified`` and the remembered body is
+reused, so polling a resource costs almost nothing on the wire. Turn it on
+per client with ``ApiClient(validators=ValidatorCache())``, or for every
+client with ``SKYTAP_CONDITIONAL_REQUESTS`` (``Config.conditional_requests``).
+
+.. note::
+    Cached bodies are handed out as-is, not copied. Treat what comes back
+    from the API as read-only.
+"""
+from collections import OrderedDict
+import threading
+import time
+
+import six
+from six.moves.urllib.parse import urlparse
+
+from skytap.framework.Config import Config
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+_shared_validators = None
+
+
+def get_shared_cache():
+    """Return the process-wide cache, or None if caching isn't configured.
+
+    The cache is built on first use from ``Config.cache_ttl`` and
+    ``Config.cache_size``. A ``cache_ttl`` of 0 turns it off.
+    """
+    global _shared_cache
+    if _shared_cache is None and Config.cache_ttl > 0:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = ResponseCache(max_entries=Config.cache_size,
+                                              ttl=Config.cache_ttl)
+    return _shared_cache
+
+
+def get_shared_validators():
+    """Return the process-wide validator cache, or None if it's turned off.
+
+    Controlled by ``Config.conditional_requests``; the cache holds up to
+    ``Config.cache_size`` responses.
+    """
+    global _shared_validators
+    if _shared_validators is None and Config.conditional_requests:
+        with _shared_cache_lock:
+            if _shared_validators is None:
+                _shared_validators = ValidatorCache(Config.cache_size)
+    return _shared_validators
+
+
+def endpoint_path(url):
+    """Normalise a Skytap URL down to the resource path it refers to.
+
+    The host, query string, ``/v2`` prefix and ``.json`` suffix are all
+    dropped, so the v1 and v2 forms of a URL compare equal::
+
+        >>> endpoint_path('https://cloud.skytap.com/v2/configurations/1.json')
+        '/configurations/1'
+    """
+    path = urlparse(url).path or '/'
+    if path.endswith('.json'):
+        path = path[:-len('.json')]
+    if path == '/v2' or path.startswith('/v2/'):
+        path = path[len('/v2'):]
+    path = path.rstrip('/')
+    return path or '/'
+
+
+def _related(first, second):
+    """Return True if one path is the same as, or nested under, the other."""
+    if first == second or first == '/' or second == '/':
+        return True
+    return (first.startswith(second + '/') or
+            second.startswith(first + '/'))
+
+
+class ResponseCache(object):
+
+    """A thread-safe, size-bounded cache of decoded API responses.
+
+    Entries expire after a TTL and, once ``max_entries`` is reached, the
+    least recently used entry is dropped to make room.
+    """
+
+    def __init__(self, max_entries=256, ttl=30, ttls=None):
+        """Set up an empty cache.
+
+        Args:
+            max_entries (int): How many responses to keep at most.
+            ttl (float): Seconds a response stays fresh.
+            ttls (dict): Per-endpoint TTLs, keyed by URL or path
+                (``'/v2/users'``). The longest matching path wins, so
+                ``{'/v2/configurations': 10}`` also covers each
+                configuration's notes. A TTL of 0 turns caching off for
+                that endpoint.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.ttls = {}
+        for path, seconds in six.iteritems(ttls or {}):
+            self.ttls[endpoint_path(path)] = seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(method, url, params=None):
+        """Build the cache key for a request."""
+        items = tuple(sorted((str(k), str(v))
+                             for k, v in six.iteritems(params or {})
+                             if v is not None))
+        return method.upper(), url, items
+
+    def ttl_for(self, url):
+        """Return the TTL that applies to a URL."""
+        path = endpoint_path(url)
+        best = None
+        for prefix in self.ttls:
+            if (path == prefix or path.startswith(prefix + '/') or
+                    prefix == '/'):
+                if best is None or len(prefix) > len(best):
+                    best = prefix
+        if best is None:
+            return self.ttl
+        return self.ttls[best]
+
+    def get(self, method, url, params=None):
+        """Look up a response.
+
+        Returns:
+            tuple: ``(True, value)`` on a hit, ``(False, None)`` otherwise.
+        """
+        key = self.key(method, url, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._move_to_end(key)
+            self.hits += 1
+            return True, entry[2]
+
+    def set(self, method, url, params, value):
+        """Store a response, evicting the oldest entries if we're full."""
+        ttl = self.ttl_for(url)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        key = self.key(method, url, params)
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, endpoint_path(url), value)
+            self._move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url):
+        """Drop every entry for ``url``, its parents and its children.
+
+        Returns:
+            int: How many entries were dropped.
+        """
+        path = endpoint_path(url)
+        with self._lock:
+            stale = [key for key, entry in six.iteritems(self._entries)
+                     if _related(entry[1], path)]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        """Empty the cache."""
+        with self._lock:
+            self._entries.clear()
+
+    def _move_to_end(self, key):
+        """Mark an entry as the most recently used one."""
+        value = self._entries.pop(key)
+        self._entries[key] = value
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ValidatorCache(ResponseCache):
+
+    """Remember response validators so GETs can be made conditional.
+
+    Entries never expire on their own (Skytap decides whether they're still
+    good); the least recently used ones are dropped once ``max_entries`` is
+    reached.
+    """
+
+    def __init__(self, max_entries=256):
+        """Set up an empty validator cache.
+
+        Args:
+            max_entries (int): How many responses to remember at most.
+        """
+        super(ValidatorCache, self).__init__(max_entries=max_entries,
+                                             ttl=float('inf'))
+
+    def store(self, url, params, headers, body):
+        """Remember a response if Skytap sent any validators with it."""
+        etag = headers.get('ETag')
+        modified = headers.get('Last-Modified')
+        if etag is None and modified is None:
+            return
+        self.set('GET', url, params, (etag, modified, body))
+
+    def lookup(self, url, params=None):
+        """Return the headers to make a GET conditional and the stored body.
+
+        Returns:
+            tuple: ``(headers, body)``, or ``(None, None)`` if we have
+            nothing stored for the request.
+        """
+        hit, entry = self.get('GET', url, params)
+        if not hit:
+            return None, None
+        etag, modified, body = entry
+        headers = {}
+        if etag is not None:
+            headers['If-None-Match'] = etag
+        if modified is not None:
+            headers['If-Modified-Since'] = modified
+        return headers, body
@@ -0,0 +1,326 @@
+"""Record real API traffic to a file and play it back later.
+
+A :class:`Cassette` holds a run of request/response pairs: the method and
+URL, the status, the response headers (``content-range``, ``Retry-After``
+and the rest) and body, when each request went out and how long its answer
+took. Anything secret is left out: request headers (the login) aren't kept
+at all and cookies are dropped. Credentials in the URL, the
+``Authorization`` header, query parameters and JSON fields named like
+credentials (``token``, ``password``...), and any header, parameter or JSON
+string that is exactly the API token, are replaced with ``REDACTED``. Text
+that merely contains the token is left alone, so a short token can't
+corrupt the rest of the recording.
+
+Record with a :class:`RecordingTransport` around any other transport, or
+for every client at once by setting ``Config.record_cassette``
+(``SKYTAP_RECORD_CASSETTE``) to a file name; the file is written when the
+process exits::
+
+    cassette = Cassette('monday.json.gz')
+    api = ApiClient(cassette=cassette)
+    skytap.Environments(client=api).suspend()   # or start, or whatever
+    cassette.save()
+
+Play it back, without touching Skytap, with a :class:`ReplayTransport`.
+Each answer takes as long as it did when recorded, divided by ``speed``;
+``speed=None`` answers straight away::
+
+    replay = ReplayTransport(Cassette.load('monday.json.gz'), speed=10)
+    api = ApiClient(transport=replay)
+
+Requests are matched on method, path and query string (in any order). When
+the same request was made more than once (polling a runstate, say), the
+answers are played back in the order they were recorded, and the last one
+is repeated once they run out. A file name ending in ``.gz`` is gzipped.
+"""
+import atexit
+import gzip
+import io
+import json
+import threading
+import time
+
+import requests
+import six
+from six.moves.urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from skytap.framework.Config import Config
+from skytap.framework.Transport import MemoryTransport, Transport
+
+#: What secrets are replaced with.
+REDACTED = 'REDACTED'
+
+#: Response headers never written to a cassette. The body is kept decoded,
+#: so its encoding and length are dropped along with the cookies.
+DROPPED_HEADERS = ('set-cookie', 'content-encoding', 'content-length',
+                   'transfer-encoding', 'connection', 'keep-alive')
+
+#: Headers whose values are always redacted.
+SECRET_HEADERS = ('authorization', 'proxy-authorization')
+
+#: Query parameters and JSON fields whose (string) values are always
+#: redacted.
+SECRET_FIELDS = ('token', 'api_token', 'password', 'secret')
+
+_VERSION = 1
+
+_shared_cassette = None
+_shared_cassette_lock = threading.Lock()
+
+
+def get_shared_cassette(register=True):
+    """Return the process-wide cassette, or None if nothing's recorded.
+
+    Set ``Config.record_cassette`` to a file name to record every client's
+    traffic; the cassette is saved there when the process exits.
+
+    Args:
+        register (bool): If this call makes the cassette, whether to save
+            it at exit. Tests pass False and save it themselves.
+    """
+    global _shared_cassette
+    if not Config.record_cassette:
+        return None
+    if _shared_cassette is None:
+        with _shared_cassette_lock:
+            if _shared_cassette is None:
+                _shared_cassette = Cassette(Config.record_cassette)
+                if register:
+                    atexit.register(_shared_cassette.save)
+    return _shared_cassette
+
+
+class CassetteMissError(requests.exceptions.RequestException):
+
+    """A request was replayed that was never recorded."""
+
+
+def request_key(method, url):
+    """What requests are matched on: the method, path and sorted query."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return method.upper(), parts.path, query
+
+
+class Cassette(object):
+
+    """A recorded run of requests and responses.
+
+    Each one is kept as a dict: ``method``, ``url``, ``at`` (seconds from
+    the first request to this one being sent), ``elapsed`` (seconds until
+    its body was in), ``status``, ``headers`` and ``body`` (text).
+    """
+
+    def __init__(self, path=None, redact=None):
+        """Set up an empty cassette.
+
+        Args:
+            path (str): Where :func:`save` writes to.
+            redact (list): Values to replace with :data:`REDACTED` wherever
+                one is a whole header value, query parameter or JSON
+                string. Defaults to the API token.
+        """
+        if redact is None:
+            redact = [Config.config_data.get('token')]
+        self.path = path
+        self.redact = [secret for secret in redact if secret]
+        self.interactions = []
+        self._started = None
+        self._lock = threading.Lock()
+
+    def record(self, method, url, response, started, elapsed):
+        """Add a request and the response it got.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The full URL, query string included.
+            response (requests.Response): The response, body read.
+            started (float): When the request was sent (``time.time()``).
+            elapsed (float): Seconds until the body was in.
+        """
+        headers = {}
+        for name, value in response.headers.items():
+            if name.lower() in DROPPED_HEADERS:
+                continue
+            if name.lower() in SECRET_HEADERS or value in self.redact:
+                value = REDACTED
+            headers[name] = value
+        interaction = {
+            'method': method.upper(),
+            'url': self._clean_url(url),
+            'elapsed': round(elapsed, 4),
+            'status': response.status_code,
+            'headers': headers,
+            'body': self._clean_body(
+                response.content.decode('utf-8', 'replace')),
+        }
+        with self._lock:
+            if self._started is None:
+                self._started = started
+            interaction['at'] = round(max(started - self._started, 0), 4)
+            self.interactions.append(interaction)
+
+    def _secret(self, name, value):
+        """Return True if a named string value is to be redacted."""
+        return (value in self.redact or
+                name.lower() in SECRET_FIELDS and bool(value))
+
+    def _clean_url(self, url):
+        parts = urlsplit(url)
+        netloc = parts.netloc
+        if '@' in netloc:
+            netloc = REDACTED + '@' + netloc.rsplit('@', 1)[1]
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        if netloc == parts.netloc and not any(
+                self._secret(name, value) for name, value in query):
+            return url
+        query = [(name, REDACTED if self._secret(name, value) else value)
+                 for name, value in query]
+        return urlunsplit((parts.scheme, netloc, parts.path,
+                           urlencode(query), parts.fragment))
+
+    def _clean_body(self, text):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return REDACTED if text in self.redact else text
+        cleaned = self._clean_data(data)
+        if cleaned == data:
+            return text
+        return json.dumps(cleaned)
+
+    def _clean_data(self, data, name=''):
+        if isinstance(data, dict):
+            return dict((key, self._clean_data(value, key))
+                        for key, value in data.items())
+        if isinstance(data, list):
+            return [self._clean_data(value, name) for value in data]
+        if isinstance(data, six.string_types) and self._secret(name, data):
+            return REDACTED
+        return data
+
+    def save(self, path=None):
+        """Write the cassette out as (compact) JSON.
+
+        Args:
+            path (str): Defaults to the path it was made with.
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError('No path to save the cassette to')
+        with self._lock:
+            data = {'version': _VERSION,
+                    'interactions': sorted(self.interactions,
+                                           key=lambda i: i['at'])}
+        text = json.dumps(data, separators=(',', ':'))
+        if path.endswith('.gz'):
+            with gzip.open(path, 'wb') as f:
+                f.write(text.encode('utf-8'))
+        else:
+            with io.open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+
+    @classmethod
+    def load(cls, path):
+        """Read a cassette written by :func:`save`."""
+        if path.endswith('.gz'):
+            with gzip.open(path, 'rb') as f:
+                data = json.loads(f.read().decode('utf-8'))
+        else:
+            with io.open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        if data.get('version') != _VERSION:
+            raise ValueError('Unknown cassette version: ' +
+                             str(data.get('version')))
+        cassette = cls(path, redact=[])
+        cassette.interactions = data['interactions']
+        return cassette
+
+    def __len__(self):
+        return len(self.interactions)
+
+
+class RecordingTransport(Transport):
+
+    """Send requests through another transport, recording each one.
+
+    Bodies are read in full before they're handed back, so the client sees
+    them as already downloaded.
+    """
+
+    def __init__(self, transport, cassette):
+        """Set up the transport.
+
+        Args:
+            transport (~skytap.framework.Transport.Transport): What actually
+                sends the requests.
+            cassette (Cassette): What to record them in.
+        """
+        self.transport = transport
+        self.cassette = cassette
+
+    @property
+    def session(self):
+        """The session of the transport being recorded, if it has one."""
+        return getattr(self.transport, 'session', None)
+
+    def send(self, method, url, headers=None, auth=None, data=None,
+             timeout=None, stream=True):
+        """Send the request and record what came back."""
+        started = time.time()
+        response = self.transport.send(method, url, headers=headers,
+                                       auth=auth, data=data,
+                                       timeout=timeout, stream=stream)
+        response.content
+        full_url = response.request.url if response.request else url
+        self.cassette.record(method, full_url, response, started,
+                             time.time() - started)
+        return response
+
+    def close(self):
+        """Close the transport being recorded."""
+        self.transport.close()
+
+
+class ReplayTransport(MemoryTransport):
+
+    """Answer requests from a :class:`Cassette`.
+
+    ``requests`` counts the requests answered, as with any
+    :class:`~skytap.framework.Transport.MemoryTransport`.
+    """
+
+    def __init__(self, cassette, speed=1.0):
+        """Set up the transport.
+
+        Args:
+            cassette (Cassette): What to answer from.
+            speed (float): How much faster than recorded to answer; 1 is
+                the original speed, 10 ten times as fast. None (or 0)
+                answers without waiting.
+        """
+        super(ReplayTransport, self).__init__(self._answer)
+        self.cassette = cassette
+        self.speed = speed
+        self._answers = {}
+        for interaction in cassette.interactions:
+            key = request_key(interaction['method'], interaction['url'])
+            self._answers.setdefault(key, []).append(interaction)
+        self._played = dict((key, 0) for key in self._answers)
+        self._replay_lock = threading.Lock()
+
+    def _answer(self, request):
+        key = request_key(request.method, request.url)
+        with self._replay_lock:
+            answers = self._answers.get(key)
+            if not answers:
+                raise CassetteMissError('Not in the cassette: ' +
+                                        request.method + ' ' + request.url,
+                                        request=request)
+            index = min(self._played[key], len(answers) - 1)
+            self._played[key] += 1
+        interaction = answers[index]
+        if self.speed:
+            time.sleep(interaction['elapsed'] / float(self.speed))
+        return (interaction['status'], interaction['body'],
+                interaction['headers'])
@@ -0,0 +1,169 @@
+"""Stop calling a part of the API that keeps failing, for a while.
+
+When Skytap is having a bad time, every retry of every call adds to the
+load and stalls the caller. A :class:`CircuitBreaker` counts consecutive
+failed requests (5xx responses, timeouts and connection errors) per
+endpoint family: ``configurations``, ``vms``, ``notes``, ``users`` and so
+on. A request counts once however many times it's retried. Once a family
+has failed ``threshold`` times in a row its circuit *opens*, and calls to
+it raise :class:`SkytapCircuitOpenError` straight away without touching the
+network.
+
+After ``reset_timeout`` seconds the circuit goes *half-open*: one trial
+request is let through. If it works the circuit closes again, and if it
+fails the circuit stays open for another ``reset_timeout``.
+
+It's off unless ``Config.breaker_threshold`` is set; then every client
+shares one breaker, set up from that and ``Config.breaker_reset``. Callers
+can check it to shed load themselves::
+
+    if api.breaker.state('/v2/configurations') != CLOSED:
+        defer_the_job()
+"""
+import threading
+import time
+
+import six
+
+from skytap.framework.ApiExceptions import SkytapCircuitOpenError
+from skytap.framework.Cache import endpoint_path
+from skytap.framework.Config import Config
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+_shared_breaker = None
+_shared_breaker_lock = threading.Lock()
+
+
+def get_shared_breaker():
+    """Return the process-wide breaker, or None if it's turned off."""
+    global _shared_breaker
+    if _shared_breaker is None and Config.breaker_threshold > 0:
+        with _shared_breaker_lock:
+            if _shared_breaker is None:
+                _shared_breaker = CircuitBreaker(Config.breaker_threshold,
+                                                 Config.breaker_reset)
+    return _shared_breaker
+
+
+def endpoint_family(url):
+    """Return the kind of resource a URL is for.
+
+    That's the last part of the path that isn't an ID::
+
+        >>> endpoint_family('/v2/configurations/12/vms/34.json')
+        'vms'
+    """
+    for part in reversed(endpoint_path(url).split('/')):
+        if part and not part.isdigit():
+            return part
+    return '/'
+
+
+class CircuitBreaker(object):
+
+    """A circuit per endpoint family that opens on repeated failures."""
+
+    def __init__(self, threshold=5, reset_timeout=30, half_open_trials=1):
+        """Set up the breaker with every circuit closed.
+
+        Args:
+            threshold (int): Failures in a row that open a circuit.
+            reset_timeout (float): Seconds a circuit stays open before a
+                trial request is allowed.
+            half_open_trials (int): Trial requests allowed at once while
+                half-open.
+        """
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_trials = half_open_trials
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def state(self, url_or_family):
+        """Return ``'closed'``, ``'open'`` or ``'half-open'``."""
+        with self._lock:
+            circuit = self._circuits.get(self._family(url_or_family))
+            if circuit is None:
+                return CLOSED
+            return self._current_state(circuit)
+
+    def states(self):
+        """Return the state of every family that has had a failure."""
+        with self._lock:
+            return dict((family, self._current_state(circuit))
+                        for family, circuit in six.iteritems(self._circuits))
+
+    def before(self, url):
+        """Check a request may go ahead.
+
+        Raises:
+            SkytapCircuitOpenError: If the circuit is open, or half-open
+                with its trial requests already out.
+        """
+        family = endpoint_family(url)
+        with self._lock:
+            circuit = self._circuits.get(family)
+            if circuit is None:
+                return
+            state = self._current_state(circuit)
+            if state == CLOSED:
+                return
+            retry_in = max(0, circuit.opened + self.reset_timeout -
+                           time.time())
+            if state == HALF_OPEN and circuit.trials < self.half_open_trials:
+                circuit.trials += 1
+                return
+            raise SkytapCircuitOpenError(family, retry_in)
+
+    def success(self, url):
+        """Record a request that worked, closing its circuit."""
+        with self._lock:
+            self._circuits.pop(endpoint_family(url), None)
+
+    def failure(self, url):
+        """Record a failed request, opening its circuit if need be."""
+        family = endpoint_family(url)
+        with self._lock:
+            circuit = self._circuits.setdefault(family, _Circuit())
+            circuit.failures += 1
+            if circuit.trials > 0 or circuit.failures >= self.threshold:
+                circuit.opened = time.time()
+                circuit.trials = 0
+
+    def abandon(self, url):
+        """Record a request that ended without an answer either way."""
+        with self._lock:
+            circuit = self._circuits.get(endpoint_family(url))
+            if circuit is not None and circuit.trials > 0:
+                circuit.trials -= 1
+
+    def reset(self):
+        """Close every circuit."""
+        with self._lock:
+            self._circuits.clear()
+
+    def _current_state(self, circuit):
+        if circuit.opened is None:
+            return CLOSED
+        if time.time() < circuit.opened + self.reset_timeout:
+            return OPEN
+        return HALF_OPEN
+
+    @staticmethod
+    def _family(url_or_family):
+        if '/' in url_or_family:
+            return endpoint_family(url_or_family)
+        return url_or_family
+
+
+class _Circuit(object):
+
+    """Failure count and timing for one endpoint family."""
+
+    def __init__(self):
+        self.failures = 0
+        self.opened = None
+        self.trials = 0
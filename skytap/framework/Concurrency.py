@@ -0,0 +1,171 @@
+"""Find out how much parallel work the Skytap account will take.
+
+Running bulk jobs with a hand-picked thread count either leaves throughput
+on the table or runs straight into 429s. A :class:`ConcurrencyGovernor`
+works the number out as it goes, the same way TCP finds a link's capacity
+(additive increase, multiplicative decrease):
+
+* every successful response nudges the in-flight limit up, by about one
+  request per full window of successes;
+* a 429 or 423 cuts the limit by ``decrease`` (half, by default), and if
+  Skytap sent a ``Retry-After`` no new requests start until it has passed.
+
+Share one governor between the clients doing the work::
+
+    governor = ConcurrencyGovernor(initial=4, maximum=32)
+    client = ApiClient(governor=governor)
+    ...
+    print(governor.limit, governor.history[-5:])
+
+or set ``SKYTAP_MAX_CONCURRENCY`` (``Config.max_concurrency``) to have every
+client share one.
+"""
+from collections import deque
+import threading
+import time
+
+from skytap.framework.Config import Config
+
+_shared_governor = None
+_shared_governor_lock = threading.Lock()
+
+
+def get_shared_governor():
+    """Return the process-wide governor, or None if it's turned off.
+
+    Built on first use, allowing up to ``Config.max_concurrency`` requests
+    in flight. 0 turns it off.
+    """
+    global _shared_governor
+    if _shared_governor is None and Config.max_concurrency > 0:
+        with _shared_governor_lock:
+            if _shared_governor is None:
+                _shared_governor = ConcurrencyGovernor(
+                    initial=min(4, Config.max_concurrency),
+                    maximum=Config.max_concurrency)
+    return _shared_governor
+
+
+class ConcurrencyGovernor(object):
+
+    """An AIMD limit on how many requests may be in flight at once."""
+
+    def __init__(self, initial=4, minimum=1, maximum=64, increase=1.0,
+                 decrease=0.5, cooldown=1.0, history_size=100):
+        """Set up the governor.
+
+        Args:
+            initial (int): The starting limit.
+            minimum (int): The limit never drops below this.
+            maximum (int): The limit never grows above this.
+            increase (float): How much the limit grows per window of
+                successful responses.
+            decrease (float): What the limit is multiplied by on a 429/423.
+            cooldown (float): Seconds after a cut during which further
+                throttling responses (usually from requests that were
+                already in flight) don't cut it again.
+            history_size (int): How many limit changes to remember.
+        """
+        if not 0 < decrease < 1:
+            raise ValueError('decrease must be between 0 and 1')
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.history = deque(maxlen=history_size)
+        self._limit = float(min(max(initial, self.minimum), self.maximum))
+        self._in_flight = 0
+        self._last_cut = 0
+        self._paused_until = 0
+        self._condition = threading.Condition()
+        self._record('start')
+
+    @property
+    def limit(self):
+        """How many requests may be in flight right now."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self):
+        """How many requests are in flight right now."""
+        return self._in_flight
+
+    def acquire(self, timeout=None):
+        """Wait for a free slot (and for any Retry-After pause to pass).
+
+        Returns:
+            bool: True once a slot is ours, False if we timed out.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while True:
+                now = time.time()
+                wait = None
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._in_flight < self.limit:
+                    self._in_flight += 1
+                    return True
+                if deadline is not None:
+                    if now >= deadline:
+                        return False
+                    wait = min(wait or deadline - now, deadline - now)
+                self._condition.wait(wait)
+
+    def release(self):
+        """Give a slot back."""
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify()
+
+    def success(self):
+        """Record a successful response, growing the limit a little."""
+        with self._condition:
+            if self._limit >= self.maximum:
+                return
+            old_limit = self.limit
+            self._limit = min(self.maximum,
+                              self._limit + self.increase / self._limit)
+            if self.limit != old_limit:
+                self._record('increase')
+                self._condition.notify_all()
+
+    def throttled(self, retry_after=None):
+        """Record a 429/423, cutting the limit.
+
+        Args:
+            retry_after (float): Seconds Skytap asked us to wait, if it said.
+                No new requests start until then.
+        """
+        with self._condition:
+            now = time.time()
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            if now - self._last_cut < self.cooldown:
+                return
+            self._last_cut = now
+            self._limit = max(self.minimum, self._limit * self.decrease)
+            self._record('decrease')
+
+    def slot(self):
+        """Use a slot for the length of a ``with`` block."""
+        return _Slot(self)
+
+    def _record(self, reason):
+        self.history.append((time.time(), self.limit, reason))
+
+
+class _Slot(object):
+
+    """Context manager returned by :func:`ConcurrencyGovernor.slot`."""
+
+    def __init__(self, governor):
+        self.governor = governor
+
+    def __enter__(self):
+        self.governor.acquire()
+        return self.governor
+
+    def __exit__(self, *exc_info):
+        self.governor.release()
@@ -11,10 +11,44 @@ initial_config = {'user': '',           # Should only be defined in env vars.
                   'base_url': 'https://cloud.skytap.com',
                   'max_http_attempts': 4,
                   'retry_wait': 10,     # Skytap recommends waiting 10 sec.
-                  'add_note_on_state_change': True
+                  'retry_max_delay': 300,  # Most seconds spent retrying a call.
+                  'add_note_on_state_change': True,
+                  'http_pool_size': 10,  # Connections kept open per host.
+                  'http_keep_alive': True,
+                  'transport': 'requests',  # Or 'urllib3'; see Transport.py.
+                  'api_is_test_fixture': False,  # Answer from the simulator.
+                  'record_cassette': '',  # Record all traffic to this file.
+                  'trace_file': '',      # Save a Chrome trace here at exit.
+                  'trace_max_spans': 100000,  # Spans kept; 0 = keep all.
+                  'connect_timeout': 10,  # Seconds; 0 = wait forever.
+                  'read_timeout': 120,   # Seconds; 0 = wait forever.
+                  'state_wait_timeout': 1800,  # Seconds; 0 = wait forever.
+                  'page_size': 0,        # Items per page; 0 = Skytap's default.
+                  'page_workers': 1,     # Pages fetched at once when paging.
+                  'cache_ttl': 0,        # Seconds to cache GETs; 0 = off.
+                  'cache_size': 256,     # Responses kept in the cache.
+                  'conditional_requests': False,  # Send ETag/If-Modified-Since.
+                  'coalesce_gets': True,  # Share identical GETs in flight.
+                  'rate_limit': 0,       # Requests per second; 0 = no limit.
+                  'rate_burst': 0,       # Requests saved up; 0 = rate_limit.
+                  'rate_limit_file': '',  # Share the limit between processes.
+                  'max_concurrency': 0,  # Adaptive in-flight cap; 0 = off.
+                  'hedge_percentile': 0,  # Hedge slow GETs (e.g. 95); 0 = off.
+                  'breaker_threshold': 0,  # Failures to open a circuit; 0 = off.
+                  'breaker_reset': 30,   # Seconds before retrying a circuit.
+                  'scheduler_slots': 0,  # Prioritised request slots; 0 = off.
+                  'metrics_port': 0,     # Serve Prometheus metrics; 0 = off.
+                  'metrics_host': '127.0.0.1'  # '' to serve on every address.
                   }
-int_keys = ('log_level', 'max_http_attempts', 'retry_wait')
-bool_keys = ('add_note_on_state_change',)
+int_keys = ('log_level', 'max_http_attempts', 'retry_wait', 'retry_max_delay',
+            'http_pool_size', 'page_size', 'page_workers', 'cache_ttl',
+            'cache_size', 'rate_burst', 'max_concurrency', 'hedge_percentile',
+            'breaker_threshold', 'scheduler_slots', 'metrics_port',
+            'trace_max_spans')
+float_keys = ('rate_limit', 'connect_timeout', 'read_timeout', 'breaker_reset',
+              'state_wait_timeout')
+bool_keys = ('add_note_on_state_change', 'http_keep_alive',
+             'conditional_requests', 'coalesce_gets', 'api_is_test_fixture')
 bool_fix = {'true': True, 'True': True, 'TRUE':True, 'Yes': True, True: True,
             'false': False, 'False': False, 'FALSE':False,'No': False, False: False}
 
@@ -68,6 +102,8 @@ class ConfigType(type):
         if key in cls.config_data:
             if key in int_keys:
                 value = int(value)
+            elif key in float_keys:
+                value = float(value)
             elif key in bool_keys:
                 value = bool_fix[value]
 
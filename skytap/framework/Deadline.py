@@ -0,0 +1,95 @@
+"""Put a time limit on a whole operation, not just one request.
+
+A request timeout stops one call from hanging, but an operation like
+``env.run(wait=True)`` is many calls, retries and sleeps. Wrap it in a
+:class:`Deadline` and everything inside gives up once the time is spent::
+
+    with client.deadline(60):
+        env.run(wait=True)
+
+Every request made in the block (on this thread, or on the threads that
+fetch pages for it) has its timeouts trimmed to the time left, retries
+that couldn't finish in time aren't attempted, and wait loops stop early.
+Once the deadline passes, :class:`SkytapDeadlineExceededError` is raised.
+
+Deadlines nest; an inner one can shorten the time left but never extend it.
+"""
+import threading
+import time
+
+from skytap.framework.ApiExceptions import SkytapDeadlineExceededError
+
+_local = threading.local()
+
+
+def _stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+
+def current_deadline():
+    """Return the deadline in force on this thread, or None."""
+    stack = _stack()
+    if stack:
+        return stack[-1]
+    return None
+
+
+def activate(deadline):
+    """Put a deadline in force in a ``with`` block; None does nothing.
+
+    Used to carry a deadline over to worker threads.
+    """
+    if deadline is None:
+        return _NoDeadline()
+    return deadline
+
+
+class Deadline(object):
+
+    """A point in time after which an operation should give up."""
+
+    def __init__(self, seconds):
+        """Start the clock.
+
+        Args:
+            seconds (float): How long the operation may take.
+        """
+        self.seconds = seconds
+        self.expires = time.time() + seconds
+
+    def remaining(self):
+        """Return the seconds left, never less than 0."""
+        return max(0, self.expires - time.time())
+
+    @property
+    def expired(self):
+        return time.time() >= self.expires
+
+    def check(self):
+        """Raise :class:`SkytapDeadlineExceededError` if time's up."""
+        if self.expired:
+            raise SkytapDeadlineExceededError(self.seconds)
+
+    def __enter__(self):
+        outer = current_deadline()
+        if outer is not None and outer.expires < self.expires:
+            _stack().append(outer)
+        else:
+            _stack().append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _stack().pop()
+
+
+class _NoDeadline(object):
+
+    """Stand-in context manager for when there's no deadline to carry."""
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        pass
@@ -0,0 +1,718 @@
+"""A fake Skytap to run the package against, in-process or over HTTP.
+
+Three pieces, which can be used alone or stacked:
+
+* :class:`ResponseConfig` is one canned response: "answer GETs matching
+  ``*/v2/configurations`` with this body". URLs are matched with ``*``
+  wildcards, and when several match, the lowest ``priority`` wins. A canned
+  response can also be a fault, answering only some of the time
+  (``rate``), only a few times (``times``), or slowly (``latency``).
+* :class:`SkytapSimulator` is a whole fake account: environments with VMs,
+  notes, labels and user data, plus users, groups, templates, projects,
+  VPNs, quotas and label categories. Lists are paginated with
+  ``content-range`` like Skytap's, runstate changes go through ``busy``
+  (and get a 423 if another is asked for meanwhile), and environments are
+  only built when asked for, so an account of 50,000 costs next to nothing
+  until it's listed.
+* :class:`SimulatorManager` answers from its canned responses first and
+  hands anything else on to a simulator (or another manager).
+
+Any of them plugs into a client through
+:class:`~skytap.framework.Transport.MemoryTransport`::
+
+    manager = SimulatorManager(SkytapSimulator(environments=50000))
+    manager.add_response_config(ResponseConfig(
+        match_url='*/v2/configurations*', status_code=429,
+        headers={'Retry-After': '1'}, rate=0.05))
+    api = ApiClient(transport=MemoryTransport(manager.respond))
+
+or can be served over HTTP on localhost with :class:`SimulatorServer`, to
+measure the real network stack::
+
+    with SimulatorServer(manager) as server:
+        Config.base_url = server.url
+        envs = skytap.Environments()
+
+Setting ``Config.api_is_test_fixture`` (``SKYTAP_API_IS_TEST_FIXTURE``)
+makes every client that isn't given a session or transport answer from
+:func:`get_shared_simulator`.
+"""
+from collections import Counter
+import fnmatch
+import gzip
+import io
+import json
+import random
+import re
+import threading
+import time
+
+import requests
+import six
+from six.moves import BaseHTTPServer, socketserver
+from six.moves.urllib.parse import parse_qsl, urlsplit
+
+from skytap.framework.Transport import make_response
+
+_shared_simulator = None
+_shared_simulator_lock = threading.Lock()
+
+_DATE = '2016/01/04 09:15:00 -0800'
+_ARRIVING = {'reset': 'running', 'halted': 'stopped'}
+_ID = re.compile(r'/[\w-]*\d[\w-]*')
+_RESOURCE = re.compile(
+    r'^/configurations/(?P<env>\d+)(?:/vms/(?P<vm>\d+))?'
+    r'(?:/(?P<sub>notes|user_data|labels|publish_sets|published_sets)'
+    r'(?:/(?P<sub_id>\d+))?)?$')
+
+
+def get_shared_simulator():
+    """Return the process-wide :class:`SimulatorManager`.
+
+    It answers from a small :class:`SkytapSimulator` account. Swap in a
+    bigger one with ``get_shared_simulator().fallback = SkytapSimulator(...)``.
+    """
+    global _shared_simulator
+    if _shared_simulator is None:
+        with _shared_simulator_lock:
+            if _shared_simulator is None:
+                _shared_simulator = SimulatorManager(SkytapSimulator())
+    return _shared_simulator
+
+
+def _split(request):
+    """Return (URL without query, path, query dict) for a request."""
+    parts = urlsplit(request.url)
+    base = request.url.split('?', 1)[0]
+    return base, parts.path, dict(parse_qsl(parts.query))
+
+
+def _as_data(value):
+    """Decode JSON text, for comparing bodies; anything else is left as is."""
+    if isinstance(value, six.string_types):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _sleep(latency, rng):
+    """Wait ``latency`` seconds, or a random time in a (low, high) range."""
+    if isinstance(latency, tuple):
+        latency = rng.uniform(*latency)
+    if latency:
+        time.sleep(latency)
+
+
+class ResponseConfig(object):
+
+    """One canned response, and which requests it answers."""
+
+    def __init__(self, match_url='*', text='', status_code=200, priority=100,
+                 match_params=None, match_method=None, headers=None,
+                 latency=0, rate=1.0, times=None, resp_code=None):
+        """Set up the response.
+
+        Args:
+            match_url (str): The URL to answer, query string left off. ``*``
+                matches anything. A pattern starting with ``/`` is matched
+                against the path only.
+            text: The body. Text is sent as it is; lists and dicts are sent
+                as JSON.
+            status_code (int): The HTTP status to send. None sends nothing:
+                the request waits ``latency``, then is answered as if this
+                didn't match.
+            priority (int): When several match, the lowest wins.
+            match_params (dict): Query parameters the request must have.
+            match_method (str): Only answer this method.
+            headers (dict): Headers to send.
+            latency: Seconds to wait before answering, or a (low, high)
+                range to pick from at random.
+            rate (float): The fraction of matching requests to answer.
+            times (int): Stop answering after this many. None never stops.
+            resp_code (int): Another name for ``status_code``.
+        """
+        self.match_url = match_url
+        self.text = text
+        self.status_code = status_code if resp_code is None else resp_code
+        self.priority = priority
+        self.match_params = match_params or {}
+        self.match_method = match_method
+        self.headers = headers or {}
+        self.latency = latency
+        self.rate = rate
+        self.times = times
+
+    def matches(self, method, url, path, params):
+        """Return True if this answers the given request."""
+        if self.times is not None and self.times <= 0:
+            return False
+        if (self.match_method is not None and
+                self.match_method.upper() != method):
+            return False
+        target = path if self.match_url.startswith('/') else url
+        if not fnmatch.fnmatchcase(target, self.match_url):
+            return False
+        for key, value in six.iteritems(self.match_params):
+            if params.get(key) != str(value):
+                return False
+        return True
+
+    def respond(self, request):
+        """Return the canned response to ``request``."""
+        return make_response(request, self.status_code, self.text,
+                             self.headers)
+
+    def __eq__(self, other):
+        """Compare with another config, or with a response body.
+
+        ``api.rest('/') == config`` is True if the body is the one this
+        config sends.
+        """
+        if isinstance(other, ResponseConfig):
+            return self.__dict__ == other.__dict__
+        return _as_data(other) == _as_data(self.text)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '<ResponseConfig ' + str(self.match_url) + ' [' + \
+            str(self.status_code) + ']>'
+
+
+class SimulatorManager(object):
+
+    """Answer requests from canned responses, or pass them on."""
+
+    def __init__(self, fallback=None, seed=None):
+        """Set up the manager.
+
+        Args:
+            fallback: Anything with a ``respond(request)`` method, asked
+                about requests no canned response matches. With none, they
+                get a 404.
+            seed: Seeds the choice of which requests a partial-``rate``
+                response answers.
+        """
+        self.fallback = fallback
+        self.response_configs = []
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def add_response_config(self, *configs):
+        """Add canned responses: :class:`ResponseConfig` objects or dicts
+        of its arguments."""
+        with self._lock:
+            for config in configs:
+                if isinstance(config, dict):
+                    config = ResponseConfig(**config)
+                self.response_configs.append(config)
+
+    def clear(self):
+        """Drop every canned response."""
+        with self._lock:
+            self.response_configs = []
+
+    def respond(self, request):
+        """Return the response to a :class:`requests.PreparedRequest`."""
+        url, path, params = _split(request)
+        with self._lock:
+            self.requests += 1
+            delays, config = self._match(request.method, url, path, params)
+        for latency in delays:
+            _sleep(latency, self._random)
+        if config is not None:
+            return config.respond(request)
+        if self.fallback is not None:
+            return self.fallback.respond(request)
+        return make_response(request, 404,
+                             {'error': 'Nothing set up to answer ' + url})
+
+    def _match(self, method, url, path, params):
+        """Pick the canned response for a request.
+
+        Returns the latencies to wait and the config to answer with (or
+        None). Matching configs are tried lowest ``priority`` first; one
+        that skips this request by its ``rate`` is passed over, and one
+        with no status adds its latency and lets the next one answer.
+        """
+        delays = []
+        matching = [c for c in self.response_configs
+                    if c.matches(method, url, path, params)]
+        matching.sort(key=lambda c: c.priority)
+        for config in matching:
+            if config.rate < 1 and self._random.random() >= config.rate:
+                continue
+            if config.times is not None:
+                config.times -= 1
+            delays.append(config.latency)
+            if config.status_code is not None:
+                return delays, config
+        return delays, None
+
+
+class SkytapSimulator(object):
+
+    """A fake Skytap account, answering API requests from memory.
+
+    Resource URLs in the answers use the scheme and host the request was
+    sent to, so follow-up calls come back to the same simulator whether it's
+    reached in memory or through a :class:`SimulatorServer`.
+    """
+
+    def __init__(self, environments=10, vms_per_environment=2, users=5,
+                 groups=2, templates=2, projects=2, vpns=1, page_size=100,
+                 latency=0, transition_time=0, seed=None):
+        """Build the account.
+
+        Args:
+            environments (int): How many environments there are.
+            vms_per_environment (int): VMs in each one (at most 99).
+            users (int): How many users there are.
+            groups (int): How many groups.
+            templates (int): How many templates.
+            projects (int): How many projects.
+            vpns (int): How many VPNs.
+            page_size (int): Items per page of a list, if the request
+                doesn't give a ``count``.
+            latency: Seconds every answer takes, or a (low, high) range.
+            transition_time (float): Seconds an environment or VM stays
+                ``busy`` after a runstate change.
+            seed: Seeds the random latencies.
+        """
+        self.environments = environments
+        self.vms_per_environment = min(vms_per_environment, 99)
+        self.page_size = page_size
+        self.latency = latency
+        self.transition_time = transition_time
+        self.calls = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._state = {}
+        self._deleted = set()
+        self._next_id = 1000000
+
+        self._users = dict((i, self._new_user(i)) for i in
+                           range(1, users + 1))
+        self._groups = dict((i, {'id': str(i), 'name': 'Group ' + str(i),
+                                 'description': '',
+                                 'user_ids': sorted(self._users)[:2]})
+                            for i in range(1, groups + 1))
+        self._templates = list(range(1, templates + 1))
+        self._projects = list(range(1, projects + 1))
+        self._vpns = ['vpn-' + str(i) for i in range(1, vpns + 1)]
+        self._label_categories = {
+            1: {'id': '1', 'name': 'Owner', 'single_value': True,
+                'enabled': True}}
+
+    def respond(self, request):
+        """Return the response to a :class:`requests.PreparedRequest`."""
+        _sleep(self.latency, self._random)
+        url, path, params = _split(request)
+        parts = urlsplit(request.url)
+        base = parts.scheme + '://' + parts.netloc
+        if path.startswith('/v2/'):
+            path = path[3:]
+        if path.endswith('.json'):
+            path = path[:-5]
+        method = request.method.upper()
+
+        with self._lock:
+            result = self._route(method, path, params, base)
+        if result is None:
+            result = 404, {'error': 'Not found: ' + path}
+        status, body = result[:2]
+        headers = result[2] if len(result) > 2 else None
+        return make_response(request, status, body, headers)
+
+    # Routing.
+
+    def _route(self, method, path, params, base):
+        self.calls[method + ' ' + _ID.sub('/:id', path)] += 1
+        match = _RESOURCE.match(path)
+        if match is not None:
+            return self._resource(method, match, params, base)
+        if path == '/configurations' and method == 'GET':
+            ids = [i for i in range(1, self.environments + 1)
+                   if i not in self._deleted]
+            return self._page(ids, params,
+                              lambda i: self._environment(i, base))
+
+        if path == '/users':
+            if method == 'POST':
+                user_id = self._new_id()
+                self._users[user_id] = self._new_user(user_id, params)
+                return 200, self._user(user_id, base)
+            return self._page(sorted(self._users), params,
+                              lambda i: self._user(i, base))
+        found = re.match(r'^/users/(\d+)$', path)
+        if found and int(found.group(1)) in self._users:
+            user_id = int(found.group(1))
+            if method == 'DELETE':
+                del self._users[user_id]
+                return 200, {}
+            return 200, self._user(user_id, base)
+
+        if path == '/groups' and method == 'GET':
+            return self._page(sorted(self._groups), params,
+                              lambda i: self._group(i, base))
+        found = re.match(r'^/groups/(\d+)(?:/users/(\d+))?$', path)
+        if found and int(found.group(1)) in self._groups:
+            group = self._groups[int(found.group(1))]
+            if found.group(2):
+                user_id = int(found.group(2))
+                if method == 'DELETE' and user_id in group['user_ids']:
+                    group['user_ids'].remove(user_id)
+                elif method == 'PUT' and user_id not in group['user_ids']:
+                    group['user_ids'].append(user_id)
+            return 200, self._group(int(found.group(1)), base)
+
+        listing = {'/templates': (self._templates, self._template),
+                   '/projects': (self._projects, self._project),
+                   '/vpns': (self._vpns, self._vpn)}
+        if path in listing and method == 'GET':
+            ids, build = listing[path]
+            return self._page(ids, params, lambda i: build(i, base))
+        found = re.match(r'^/(templates|projects|vpns)/([\w-]+)$', path)
+        if found and method == 'GET':
+            ids, build = listing['/' + found.group(1)]
+            key = found.group(2)
+            key = int(key) if key.isdigit() else key
+            if key in ids:
+                return 200, build(key, base)
+
+        if path == '/company/quotas' and method == 'GET':
+            return 200, self._quotas()
+        if path == '/label_categories':
+            if method == 'POST':
+                category_id = self._new_id()
+                self._label_categories[category_id] = {
+                    'id': str(category_id), 'name': params.get('name', ''),
+                    'single_value': params.get('single-value') == 'True',
+                    'enabled': True}
+            return 200, [dict(c, url=base + '/v2/label_categories/' +
+                              c['id'])
+                         for _, c in sorted(self._label_categories.items())]
+        found = re.match(r'^/label_categories/(\d+)$', path)
+        if found and int(found.group(1)) in self._label_categories:
+            category = self._label_categories[int(found.group(1))]
+            if method == 'PUT' and 'enabled' in params:
+                category['enabled'] = params['enabled'] == 'True'
+            return 200, category
+        return None
+
+    def _page(self, ids, params, build):
+        """Return one page of a list, with its content-range."""
+        total = len(ids)
+        offset = int(params.get('offset', 0))
+        count = int(params.get('count', self.page_size))
+        items = [build(i) for i in ids[offset:offset + count]]
+        headers = {}
+        if items and ('count' in params or total > len(items)):
+            headers['content-range'] = 'items %d-%d/%d' % (
+                offset, offset + len(items) - 1, total)
+        return 200, items, headers
+
+    def _resource(self, method, match, params, base):
+        """Handle an environment or VM, and its notes, labels and so on."""
+        env_id = int(match.group('env'))
+        if not 1 <= env_id <= self.environments or env_id in self._deleted:
+            return None
+        vm_id = match.group('vm')
+        if vm_id is not None:
+            vm_id = int(vm_id)
+            if (vm_id // 100 != env_id or
+                    not 1 <= vm_id % 100 <= self.vms_per_environment):
+                return None
+            key = ('vm', vm_id)
+        else:
+            key = ('env', env_id)
+
+        def current():
+            if vm_id is None:
+                return self._environment(env_id, base)
+            return self._vm(env_id, vm_id, base)
+
+        sub = match.group('sub')
+        if sub is None:
+            if method == 'DELETE':
+                if vm_id is None:
+                    self._deleted.add(env_id)
+                return 200, {}
+            if method == 'PUT':
+                if 'runstate' in params:
+                    if current()['runstate'] == 'busy':
+                        return 423, {'error': 'The resource is busy.'}
+                    self._change_state(key, params['runstate'])
+                if 'name' in params:
+                    self._state_for(key)['name'] = params['name']
+            return 200, current()
+
+        state = self._state_for(key)
+        if sub == 'notes':
+            notes = state.setdefault('notes', [])
+            if method == 'POST':
+                note = {'id': str(self._new_id()),
+                        'text': params.get('text', ''),
+                        'user': {'id': '1', 'login_name': 'user1'},
+                        'created_at': _DATE, 'updated_at': _DATE}
+                notes.append(note)
+                return 200, note
+            if method == 'DELETE':
+                state['notes'] = [n for n in notes
+                                  if n['id'] != match.group('sub_id')]
+                return 200, {}
+            return 200, list(notes)
+        if sub == 'user_data':
+            if method in ('POST', 'PUT') and 'contents' in params:
+                state['user_data'] = params['contents']
+            return 200, {'contents': state.get('user_data', '')}
+        if sub == 'labels':
+            labels = state.setdefault('labels', [])
+            if method == 'PUT' and 'value' in params:
+                labels.append({'id': str(self._new_id()),
+                               'label_category': params.get('label_category'),
+                               'value': params['value']})
+            return 200, list(labels)
+        return 200, []
+
+    # Building resources.
+
+    def _state_for(self, key):
+        return self._state.setdefault(key, {})
+
+    def _new_id(self):
+        self._next_id += 1
+        return self._next_id
+
+    def _change_state(self, key, runstate):
+        """Start a runstate change, going through busy."""
+        state = self._state_for(key)
+        state['runstate'] = 'busy'
+        state['target'] = _ARRIVING.get(runstate, runstate)
+        state['ready_at'] = time.time() + self.transition_time
+        if key[0] == 'env':
+            for vm in range(1, self.vms_per_environment + 1):
+                self._state.pop(('vm', key[1] * 100 + vm), None)
+
+    def _runstate(self, key, default):
+        """Return a resource's runstate, finishing any change that's due."""
+        state = self._state.get(key)
+        if state is None or 'runstate' not in state:
+            return default
+        if state['runstate'] == 'busy' and time.time() >= state['ready_at']:
+            state['runstate'] = state.pop('target')
+        return state['runstate']
+
+    def _environment(self, env_id, base):
+        runstate = self._runstate(('env', env_id),
+                                  'running' if env_id % 2 else 'suspended')
+        url = base + '/v2/configurations/' + str(env_id)
+        vms = [self._vm(env_id, env_id * 100 + i, base, runstate)
+               for i in range(1, self.vms_per_environment + 1)]
+        state = self._state.get(('env', env_id), {})
+        return {
+            'id': str(env_id),
+            'url': url,
+            'name': state.get('name', 'Environment ' + str(env_id)),
+            'description': '',
+            'runstate': runstate,
+            'error': [],
+            'region': 'US-West',
+            'owner': base + '/v2/users/1',
+            'created_at': _DATE,
+            'last_run': _DATE,
+            'suspend_on_idle': None,
+            'vm_count': len(vms),
+            'svms': len(vms),
+            'storage': len(vms) * 30720,
+            'rate_limited': False,
+            'tags': [],
+            'vms': vms,
+        }
+
+    def _vm(self, env_id, vm_id, base, env_runstate=None):
+        if env_runstate is None:
+            env_runstate = self._runstate(
+                ('env', env_id), 'running' if env_id % 2 else 'suspended')
+        url = base + '/v2/configurations/' + str(env_id) + '/vms/' + \
+            str(vm_id)
+        return {
+            'id': str(vm_id),
+            'url': url,
+            'name': 'VM ' + str(vm_id),
+            'runstate': self._runstate(('vm', vm_id), env_runstate),
+            'error': False,
+            'created_at': _DATE,
+            'hardware': {'cpus': 2, 'ram': 4096, 'svms': 1},
+            'interfaces': [{'id': 'nic-' + str(vm_id), 'ip': '10.0.0.' +
+                            str(vm_id % 100), 'hostname': 'host-' +
+                            str(vm_id), 'services': []}],
+        }
+
+    @staticmethod
+    def _new_user(user_id, params=None):
+        params = params or {}
+        return {'id': str(user_id),
+                'first_name': params.get('first_name', 'User'),
+                'last_name': params.get('last_name', str(user_id)),
+                'login_name': params.get('login_name',
+                                         'user' + str(user_id)),
+                'email': params.get('email',
+                                    'user' + str(user_id) + '@example.com'),
+                'title': '', 'account_role': 'admin' if user_id == 1 else
+                'standard', 'sso_enabled': False, 'created_at': _DATE,
+                'last_login': _DATE}
+
+    def _user(self, user_id, base):
+        return dict(self._users[user_id],
+                    url=base + '/v2/users/' + str(user_id))
+
+    def _group(self, group_id, base):
+        group = self._groups[group_id]
+        users = [self._user(i, base) for i in group['user_ids']
+                 if i in self._users]
+        return {'id': group['id'], 'url': base + '/v2/groups/' + group['id'],
+                'name': group['name'], 'description': group['description'],
+                'users': users}
+
+    def _template(self, template_id, base):
+        url = base + '/v2/templates/' + str(template_id)
+        return {'id': str(template_id), 'url': url,
+                'name': 'Template ' + str(template_id), 'description': '',
+                'region': 'US-West', 'created_at': _DATE, 'vm_count': 1,
+                'svms': 1, 'storage': 30720, 'vms': [
+                    {'id': str(template_id * 100 + 1), 'name': 'VM',
+                     'runstate': 'stopped'}]}
+
+    def _project(self, project_id, base):
+        owner = self._user(min(self._users), base) if self._users else None
+        return {'id': str(project_id),
+                'url': base + '/v2/projects/' + str(project_id),
+                'name': 'Project ' + str(project_id), 'summary': '',
+                'created_at': _DATE,
+                'owner_url': owner['url'] if owner else None,
+                'users': [owner] if owner else []}
+
+    @staticmethod
+    def _vpn(vpn_id, base):
+        return {'id': vpn_id, 'url': base + '/v2/vpns/' + vpn_id,
+                'name': 'VPN ' + vpn_id, 'status': 'active',
+                'enabled': True, 'region': 'US-West'}
+
+    def _quotas(self):
+        vms = (self.environments - len(self._deleted)) * \
+            self.vms_per_environment
+        return [{'id': 'concurrent_vms', 'usage': vms,
+                 'limit': max(vms, 1) * 2, 'units': 'integer'},
+                {'id': 'cumulative_svms', 'usage': vms * 10, 'limit': None,
+                 'units': 'hours'},
+                {'id': 'concurrent_storage_size', 'usage': vms * 30720,
+                 'limit': None, 'units': 'MB'}]
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn,
+                           BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class SimulatorServer(object):
+
+    """Serve a simulator (or manager) over HTTP on localhost.
+
+    Use it as a context manager, or call :func:`start` and :func:`stop`.
+    """
+
+    def __init__(self, handler=None, host='127.0.0.1', port=0,
+                 compress=True):
+        """Set up the server.
+
+        Args:
+            handler: What answers requests: anything with a
+                ``respond(request)`` method. Defaults to a
+                :class:`SkytapSimulator`.
+            host (str): The address to listen on.
+            port (int): The port; 0 picks a free one.
+            compress (bool): Gzip bodies when the client accepts it.
+        """
+        self.handler = handler if handler is not None else SkytapSimulator()
+        self.host = host
+        self.port = port
+        self.compress = compress
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        """The server's base URL, to use as ``Config.base_url``."""
+        return 'http://' + self.host + ':' + str(self.port)
+
+    def start(self):
+        """Start answering requests on a background thread."""
+        self._server = _ThreadingHTTPServer((self.host, self.port),
+                                            self._request_handler())
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _request_handler(self):
+        server = self
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def handle_one(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else None
+                request = requests.Request(
+                    self.command, server.url + self.path,
+                    headers=dict(self.headers.items()), data=body).prepare()
+                response = server.handler.respond(request)
+
+                content = response.content
+                accepts = self.headers.get('Accept-Encoding') or ''
+                encoding = None
+                if server.compress and 'gzip' in accepts and content:
+                    buf = io.BytesIO()
+                    with gzip.GzipFile(fileobj=buf, mode='wb') as zipped:
+                        zipped.write(content)
+                    content = buf.getvalue()
+                    encoding = 'gzip'
+
+                self.send_response(response.status_code)
+                for name, value in response.headers.items():
+                    if name.lower() not in ('content-length',
+                                            'content-encoding'):
+                        self.send_header(name, value)
+                if encoding:
+                    self.send_header('Content-Encoding', encoding)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_PUT = do_POST = do_DELETE = handle_one
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
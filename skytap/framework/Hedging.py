@@ -0,0 +1,193 @@
+"""Hedged GETs: ask twice when the first answer is slow in coming.
+
+Most GETs come back quickly, but now and then one takes many times the
+usual. Rather than wait it out, a :class:`HedgePolicy` sends a second,
+identical request once the first has taken longer than (say) 95% of recent
+GETs, and uses whichever answer arrives first. The extra load is small,
+since only the slowest few percent are ever hedged, and the slow tail
+mostly goes away.
+
+Hedging is off unless asked for::
+
+    client = ApiClient(hedging=HedgePolicy(percentile=95))
+
+or set ``SKYTAP_HEDGE_PERCENTILE`` (``Config.hedge_percentile``) to have
+every client share one. Only GETs are ever hedged; a PUT, POST or DELETE
+is never sent twice. The second request takes a token from the client's
+rate limiter and a slot from its concurrency governor, and is skipped if
+either isn't free right away. The request that
+loses is cancelled if it hasn't started, or its response is closed when it
+arrives, so its connection goes back to the pool.
+
+The first request goes out at once on a thread of its own, so callers
+never queue behind each other for it and the wait before hedging is all
+time spent on the request. Only second copies share the policy's pool.
+"""
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor
+from concurrent.futures import wait
+import threading
+import time
+
+from skytap.framework.Config import Config
+
+_shared_hedging = None
+_shared_hedging_lock = threading.Lock()
+
+
+def get_shared_hedging():
+    """Return the process-wide hedge policy, or None if hedging is off."""
+    global _shared_hedging
+    if _shared_hedging is None and Config.hedge_percentile > 0:
+        with _shared_hedging_lock:
+            if _shared_hedging is None:
+                _shared_hedging = HedgePolicy(Config.hedge_percentile)
+    return _shared_hedging
+
+
+class HedgePolicy(object):
+
+    """When to hedge a GET, and the threads to run hedged GETs on."""
+
+    def __init__(self, percentile=95, window=200, min_samples=20,
+                 initial_delay=1.0, min_delay=0.05, max_delay=10.0,
+                 max_workers=None):
+        """Set up the policy.
+
+        Args:
+            percentile (float): Hedge once a GET has taken longer than this
+                percentile of the last ``window`` GETs.
+            window (int): How many recent GET times to keep.
+            min_samples (int): Until this many times are known,
+                ``initial_delay`` is used instead.
+            initial_delay (float): Seconds to wait before hedging at first.
+            min_delay (float): Never hedge sooner than this.
+            max_delay (float): Never wait longer than this to hedge.
+            max_workers (int): Threads for the second copies of hedged
+                GETs. Defaults to twice ``Config.http_pool_size``.
+        """
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_workers = max_workers or Config.http_pool_size * 2
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def delay(self):
+        """Return how long to wait for a GET before hedging it."""
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < self.min_samples:
+            delay = self.initial_delay
+        else:
+            index = int(round(self.percentile / 100.0 * (len(samples) - 1)))
+            delay = samples[index]
+        return min(self.max_delay, max(self.min_delay, delay))
+
+    def record(self, seconds):
+        """Record how long a GET took."""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def run(self, send, may_hedge=None, hedge_done=None):
+        """Call ``send()``, calling it again if the first is slow.
+
+        Args:
+            send: Makes the request and returns the response.
+            may_hedge: Called before hedging; return False to skip it.
+            hedge_done: If a second try is made, called once both tries
+                are over (answered, failed or cancelled before they were
+                sent), as the slower one may outlast this call.
+
+        Returns:
+            The first response to arrive. If every try raised, the first
+            exception is raised.
+        """
+        started = time.time()
+        primary = _start(send)
+        pending = [primary]
+        done, _ = wait(pending, timeout=self.delay())
+        if not done and (may_hedge is None or may_hedge()):
+            with self._lock:
+                self.hedged += 1
+            pending.append(self._executor().submit(send))
+            if hedge_done is not None:
+                _when_all_done(pending, hedge_done)
+
+        failed = None
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+                if future.exception() is not None:
+                    failed = failed or future
+                    continue
+                self._cancel(pending)
+                self.record(time.time() - started)
+                if future is not primary:
+                    with self._lock:
+                        self.hedge_wins += 1
+                return future.result()
+        return failed.result()
+
+    def _executor(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers)
+        return self._pool
+
+    @staticmethod
+    def _cancel(futures):
+        """Cancel the losing tries, closing any response they still get."""
+        for future in futures:
+            if not future.cancel():
+                future.add_done_callback(_close_response)
+
+
+def _start(call):
+    """Run ``call()`` on a new thread; return a future for its result."""
+    future = Future()
+
+    def run():
+        future.set_running_or_notify_cancel()
+        try:
+            result = call()
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    thread = threading.Thread(target=run, name='skytap-hedged-get')
+    thread.daemon = True
+    thread.start()
+    return future
+
+
+def _close_response(future):
+    if future.exception() is None:
+        close = getattr(future.result(), 'close', None)
+        if close is not None:
+            close()
+
+
+def _when_all_done(futures, callback):
+    """Call ``callback()`` once every one of ``futures`` is done."""
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def done(future):
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            callback()
+
+    for future in list(futures):
+        future.add_done_callback(done)
@@ -0,0 +1,195 @@
+"""Callbacks on every request a client makes.
+
+A :class:`Hooks` holds callbacks for four moments in a request's life:
+
+================== ======================================================
+hook               called
+================== ======================================================
+``before_request`` as each try at a request is about to be made
+``after_response`` when a try gets a response, whatever its status
+``on_retry``       when a failed try is going to be retried
+``on_error``       when a request has failed for good
+================== ======================================================
+
+Each callback gets a :class:`RequestEvent`, which is filled in as the try
+goes on: its method and URL, the URL's template
+(``/configurations/:id/vms/:id``) and endpoint family (``vms``), which try
+it is, and once there's an answer, its status, size and timings.
+
+Every client shares the hooks from :func:`get_shared_hooks` unless given
+its own::
+
+    def slow(event):
+        if event.total > 5:
+            print(event.method, event.template, event.total)
+
+    get_shared_hooks().add('after_response', slow)
+
+Any object with methods named after the hooks can be added in one go with
+:func:`Hooks.register`, which is how the
+:class:`~skytap.framework.Stats.StatsCollector` is plugged in. A callback
+that raises is logged and otherwise ignored; it never breaks the request.
+With no callbacks added, requests don't pay for any of this.
+"""
+import threading
+
+from skytap.framework.Cache import endpoint_path
+from skytap.framework.CircuitBreaker import endpoint_family
+import skytap.framework.Utils as Utils
+
+#: The hooks that can be added to, in the order they're called.
+EVENTS = ('before_request', 'after_response', 'on_retry', 'on_error')
+
+_shared_hooks = None
+_shared_hooks_lock = threading.Lock()
+
+
+def get_shared_hooks():
+    """Return the process-wide :class:`Hooks`."""
+    global _shared_hooks
+    if _shared_hooks is None:
+        with _shared_hooks_lock:
+            if _shared_hooks is None:
+                _shared_hooks = Hooks()
+    return _shared_hooks
+
+
+def endpoint_template(url):
+    """Return a URL's path with its IDs replaced by ``:id``::
+
+        >>> endpoint_template('/v2/configurations/12/vms/34.json')
+        '/configurations/:id/vms/:id'
+    """
+    return '/'.join(':id' if part.isdigit() else part
+                    for part in endpoint_path(url).split('/'))
+
+
+def response_bytes(response):
+    """Return the size of a response's body, if it's known yet.
+
+    That's the ``Content-Length`` (as sent, so compressed if it was), or
+    the length of the body if it's already been read.
+    """
+    length = response.headers.get('Content-Length')
+    if length is not None and length.isdigit():
+        return int(length)
+    content = getattr(response, '_content', None)
+    if isinstance(content, bytes):
+        return len(content)
+    return None
+
+
+class RequestEvent(object):
+
+    """What's known about one try at a request.
+
+    Attributes:
+        method (str): 'GET', 'PUT', 'POST' or 'DELETE'.
+        url (str): The full URL, query string included.
+        template (str): The path with IDs as ``:id``.
+        family (str): The endpoint family, as the circuit breaker uses.
+        attempt (int): Which try this is, from 1.
+        started (float): When the try started (``time.time()``).
+        status (int): The response's status, once there is one.
+        bytes (int): The size of the response body, if known.
+        ttfb (float): Seconds from sending the request until the response
+            headers came back.
+        total (float): Seconds the whole try took, waiting for a rate limit
+            or scheduler slot included.
+        error (Exception): What went wrong, for ``on_retry`` and
+            ``on_error``.
+        delay (float): For ``on_retry``, how long until the next try.
+    """
+
+    def __init__(self, method, url, attempt, started):
+        """Start an event for a try at a request."""
+        self.method = method
+        self.url = url
+        self.template = endpoint_template(url)
+        self.family = endpoint_family(url)
+        self.attempt = attempt
+        self.started = started
+        self.status = None
+        self.bytes = None
+        self.ttfb = None
+        self.total = None
+        self.error = None
+        self.delay = None
+
+    def responded(self, response, total):
+        """Fill in what's known from the response."""
+        self.status = response.status_code
+        self.bytes = response_bytes(response)
+        elapsed = getattr(response, 'elapsed', None)
+        if elapsed:
+            self.ttfb = elapsed.total_seconds()
+        self.total = total
+
+    def __repr__(self):
+        return '<RequestEvent ' + self.method + ' ' + self.template + \
+            ' #' + str(self.attempt) + ' [' + str(self.status) + ']>'
+
+
+class Hooks(object):
+
+    """Callbacks to call on every request. Safe to share between threads."""
+
+    def __init__(self):
+        """Start with no callbacks."""
+        self._callbacks = dict((name, ()) for name in EVENTS)
+        self._lock = threading.Lock()
+
+    def add(self, name, callback):
+        """Call ``callback(event)`` on the hook ``name``.
+
+        Returns:
+            The callback.
+        """
+        self._check(name)
+        with self._lock:
+            self._callbacks[name] = self._callbacks[name] + (callback,)
+        return callback
+
+    def remove(self, name, callback):
+        """Stop calling a callback added with :func:`add`."""
+        self._check(name)
+        with self._lock:
+            self._callbacks[name] = tuple(
+                c for c in self._callbacks[name] if c != callback)
+
+    def register(self, listener):
+        """Add each of ``listener``'s methods named after a hook."""
+        for name in EVENTS:
+            method = getattr(listener, name, None)
+            if method is not None:
+                self.add(name, method)
+
+    def unregister(self, listener):
+        """Remove everything :func:`register` added for ``listener``."""
+        for name in EVENTS:
+            method = getattr(listener, name, None)
+            if method is not None:
+                self.remove(name, method)
+
+    def clear(self):
+        """Remove every callback."""
+        with self._lock:
+            self._callbacks = dict((name, ()) for name in EVENTS)
+
+    def fire(self, name, event):
+        """Call the callbacks for ``name`` with ``event``."""
+        for callback in self._callbacks[name]:
+            try:
+                callback(event)
+            except Exception as e:
+                Utils.warning('Hook ' + name + ' failed: ' + repr(e))
+
+    def __bool__(self):
+        return any(self._callbacks.values())
+
+    __nonzero__ = __bool__  # Python 2
+
+    @staticmethod
+    def _check(name):
+        if name not in EVENTS:
+            raise ValueError('Unknown hook: ' + str(name))
@@ -0,0 +1,275 @@
+"""Parse the items of a JSON array as its bytes arrive.
+
+A company-wide ``/v2/configurations`` list can run to many megabytes, and
+``json.loads`` can't start until the last byte is in. An
+:class:`ArrayParser` is fed the body a chunk at a time and hands back each
+item of the top-level array as soon as it's complete, so the first
+environments can be built while the rest are still downloading, and only
+the unparsed tail of the body is ever held as text.
+
+Two ways of finding where each item ends are available:
+
+* the *accelerated* one asks :meth:`json.JSONDecoder.raw_decode` to decode
+  an item at the current position, which uses the json module's C scanner
+  where Python has it. If the item isn't complete it falls back to the
+  pure scan for that item, so an item spread over many chunks is scanned
+  once rather than decoded again from its start on every chunk;
+* the *pure* one scans for the comma or bracket that ends the item,
+  tracking nesting and strings itself, then decodes just that slice.
+
+The accelerated one is used whenever the C scanner is available.
+:class:`StreamedPage` wraps a parser around a response body for
+:func:`~skytap.framework.ApiClient.ApiClient.iter_pages`, and gives the
+connection back once the body is read or the page is closed.
+"""
+import codecs
+import json
+from json import scanner
+
+#: True if the json module has its C scanner.
+C_SCANNER = scanner.c_make_scanner is not None
+
+_decoder = json.JSONDecoder()
+_whitespace = ' \t\n\r'
+_number_chars = '0123456789.eE+-'
+
+_START = 'start'      # expecting '['
+_FIRST = 'first'      # after '[': expecting an item or ']'
+_ITEM = 'item'        # after ',': expecting an item
+_AFTER = 'after'      # after an item: expecting ',' or ']'
+_DONE = 'done'        # after ']'
+
+
+class ArrayParser(object):
+
+    """Turn the chunks of a JSON array into its items, one at a time.
+
+    Example:
+
+    .. code-block:: python
+
+        parser = ArrayParser()
+        for chunk in response.iter_content(65536):
+            for item in parser.feed(chunk):
+                handle(item)
+        parser.close()
+    """
+
+    def __init__(self, accelerated=None):
+        """Set up the parser.
+
+        Args:
+            accelerated (bool): Use ``raw_decode`` to find items. Defaults
+                to :data:`C_SCANNER`.
+        """
+        self.accelerated = C_SCANNER if accelerated is None else accelerated
+        self.count = 0
+        self._bytes = codecs.getincrementaldecoder('utf-8')()
+        self._buf = ''
+        self._pos = 0
+        self._state = _START
+        # Where the pure scanner has got to within the current item.
+        self._scan = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, data):
+        """Add the next chunk (bytes or text).
+
+        Returns:
+            list: The items completed by this chunk, in order.
+        """
+        if isinstance(data, (bytes, bytearray)):
+            data = self._bytes.decode(bytes(data))
+        if self._pos:
+            self._buf = self._buf[self._pos:]
+            if self._scan is not None:
+                self._scan -= self._pos
+            self._pos = 0
+        self._buf += data
+        return self._parse()
+
+    def close(self):
+        """Say there's no more data.
+
+        Returns:
+            list: Any items completed by the very end of the data.
+
+        Raises:
+            ValueError: If the array wasn't complete.
+        """
+        items = self.feed(self._bytes.decode(b'', final=True))
+        if self._state != _DONE:
+            raise ValueError('Incomplete JSON array')
+        return items
+
+    def _parse(self):
+        items = []
+        buf = self._buf
+        while True:
+            i = self._pos
+            while i < len(buf) and buf[i] in _whitespace:
+                i += 1
+            self._pos = i
+            if i >= len(buf):
+                return items
+            char = buf[i]
+
+            if self._state == _START:
+                if char != '[':
+                    raise TypeError('Expected a JSON array')
+                self._state = _FIRST
+                self._pos = i + 1
+            elif self._state == _AFTER or (self._state == _FIRST and
+                                           char == ']'):
+                if char == ']':
+                    self._state = _DONE
+                elif char == ',' and self._state == _AFTER:
+                    self._state = _ITEM
+                else:
+                    raise ValueError('Expected , or ] at ' + repr(buf[i:i + 20]))
+                self._pos = i + 1
+            elif self._state == _DONE:
+                raise ValueError('Extra data after JSON array')
+            else:
+                if self.accelerated and self._scan is None:
+                    item, end = self._decode_item(buf, i)
+                    if end is None:
+                        item, end = self._scan_item(buf, i)
+                else:
+                    item, end = self._scan_item(buf, i)
+                if end is None:
+                    return items
+                items.append(item)
+                self.count += 1
+                self._state = _AFTER
+                self._pos = end
+
+    @staticmethod
+    def _decode_item(buf, start):
+        """Decode the item at ``start`` with the json module's scanner.
+
+        Returns ``(None, None)`` if the item isn't all there yet. A number
+        running up to the end of the buffer, or stopping at what could be
+        more of it (``-0`` of ``-0.5``), is treated as incomplete.
+        """
+        try:
+            item, end = _decoder.raw_decode(buf, start)
+        except ValueError:
+            return None, None
+        if end >= len(buf) or buf[end] in _number_chars:
+            return None, None
+        return item, end
+
+    def _scan_item(self, buf, start):
+        """Find the end of the item at ``start`` by hand, then decode it."""
+        if self._scan is None:
+            self._scan = start
+            self._depth = 0
+            self._in_string = False
+            self._escape = False
+        i = self._scan
+        depth = self._depth
+        in_string = self._in_string
+        escape = self._escape
+        end = None
+        while i < len(buf):
+            char = buf[i]
+            if in_string:
+                if escape:
+                    escape = False
+                elif char == '\\':
+                    escape = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char in '[{':
+                depth += 1
+            elif char in ']}':
+                if depth == 0:
+                    end = i
+                    break
+                depth -= 1
+            elif char == ',' and depth == 0:
+                end = i
+                break
+            i += 1
+
+        if end is None:
+            self._scan, self._depth = i, depth
+            self._in_string, self._escape = in_string, escape
+            return None, None
+        self._scan = None
+        return json.loads(buf[start:end]), end
+
+
+def _once(func):
+    """Wrap ``func`` so that only the first call does anything."""
+    called = []
+
+    def call():
+        if func is not None and not called:
+            called.append(True)
+            func()
+    return call
+
+
+def _read_items(chunks, parser, close):
+    try:
+        for chunk in chunks:
+            for item in parser.feed(chunk):
+                yield item
+        for item in parser.close():
+            yield item
+    finally:
+        close()
+
+
+class StreamedPage(object):
+
+    """One page of a list, handed out item by item as it's parsed.
+
+    Iterate over it once. ``count`` is how many items have been read so
+    far; :func:`drain` reads the rest, and :func:`close` drops them. A page
+    that's dropped without being read closes itself when it's collected.
+    """
+
+    def __init__(self, chunks, close=None):
+        """Wrap a response body.
+
+        Args:
+            chunks: An iterable of the body's bytes.
+            close: Called once, when the body has been read or the page is
+                closed.
+        """
+        self.count = 0
+        self._close = _once(close)
+        # The generator mustn't refer back to the page, or the page could
+        # only be collected as part of a cycle (never, on Python 2, as it
+        # has a __del__).
+        self._items = _read_items(chunks, ArrayParser(), self._close)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = next(self._items)
+        self.count += 1
+        return item
+
+    next = __next__  # Python 2
+
+    def drain(self):
+        """Read (and drop) whatever items haven't been read yet."""
+        for _ in self:
+            pass
+
+    def close(self):
+        """Stop reading and give the connection back."""
+        self._items.close()
+        self._close()
+
+    def __del__(self):
+        self.close()
@@ -0,0 +1,327 @@
+"""Prometheus metrics for programs that keep calling Skytap.
+
+A :class:`MetricsRegistry` is fed by the client :mod:`hooks
+<skytap.framework.Hooks>` and keeps, in the Prometheus exposition format:
+
+=================================== ========================================
+metric                              what
+=================================== ========================================
+``skytap_requests_total``           responses, by endpoint family, method
+                                    and status
+``skytap_throttled_total``          429 and 423 responses, by family and
+                                    status
+``skytap_retries_total``            retries, by family and reason (the
+                                    status, or ``connection``)
+``skytap_errors_total``             requests that failed for good, by family
+                                    and reason
+``skytap_requests_in_flight``       tries sent but not yet answered
+``skytap_request_duration_seconds`` a latency histogram per family
+``skytap_cache_hits_total``,        the response cache's hits and misses,
+``skytap_cache_misses_total``,      and the ratio between them
+``skytap_cache_hit_ratio``
+=================================== ========================================
+
+Alert on ``rate(skytap_throttled_total[5m])`` or a growing
+``skytap_requests_in_flight`` to see the API saturating before jobs stall.
+
+Set ``Config.metrics_port`` (``SKYTAP_METRICS_PORT``) and the first client
+made starts a process-wide registry and serves it at
+``http://<Config.metrics_host>:<port>/metrics``. Or set one up by hand::
+
+    registry = MetricsRegistry()
+    get_shared_hooks().register(registry)
+    MetricsServer(registry, port=9464).start()   # or:
+    registry.write('/var/lib/node_exporter/skytap.prom')
+"""
+import os
+import tempfile
+import threading
+
+import six
+from six.moves import BaseHTTPServer, socketserver
+
+from skytap.framework.Cache import get_shared_cache
+from skytap.framework.Config import Config
+from skytap.framework.Hooks import get_shared_hooks
+from skytap.framework.Stats import Histogram
+
+#: The upper bounds (seconds) of the latency histogram's buckets.
+DEFAULT_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+#: What the HTTP endpoint answers with.
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_shared_metrics = None
+_shared_metrics_lock = threading.Lock()
+
+
+def get_shared_metrics():
+    """Return the process-wide registry, or None if it's turned off.
+
+    It's made, registered on the shared hooks and served on
+    ``Config.metrics_port`` the first time it's asked for.
+    """
+    global _shared_metrics
+    if _shared_metrics is None and Config.metrics_port:
+        with _shared_metrics_lock:
+            if _shared_metrics is None:
+                registry = MetricsRegistry()
+                get_shared_hooks().register(registry)
+                registry.server = MetricsServer(
+                    registry, Config.metrics_host, Config.metrics_port)
+                registry.server.start()
+                _shared_metrics = registry
+    return _shared_metrics
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = six.text_type(value).replace('\\', '\\\\')
+        value = value.replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(name + '="' + value + '"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def _number(value):
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry(object):
+
+    """Request metrics, collected from the hooks. Safe to share."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, cache=None):
+        """Set up an empty registry.
+
+        Args:
+            buckets (list): The latency histogram's bucket bounds.
+            cache (~skytap.framework.Cache.ResponseCache): The cache to
+                report on. Defaults to the process-wide one, if any.
+        """
+        self.buckets = sorted(buckets)
+        self.cache = cache
+        self.server = None
+        self.requests = {}
+        self.throttled = {}
+        self.retries = {}
+        self.errors = {}
+        self.in_flight = 0
+        self.latency = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _add(counter, key, amount=1):
+        counter[key] = counter.get(key, 0) + amount
+
+    @staticmethod
+    def _reason(event):
+        if event.status is not None:
+            return str(event.status)
+        return 'connection'
+
+    def before_request(self, event):
+        """A try is going out."""
+        with self._lock:
+            self.in_flight += 1
+
+    def after_response(self, event):
+        """A try was answered."""
+        with self._lock:
+            self.in_flight -= 1
+            self._add(self.requests,
+                      (event.family, event.method, str(event.status)))
+            if event.status in (423, 429):
+                self._add(self.throttled, (event.family, str(event.status)))
+            histogram = self.latency.get(event.family)
+            if histogram is None:
+                histogram = self.latency[event.family] = Histogram()
+        if event.total is not None:
+            histogram.record(event.total)
+
+    def on_retry(self, event):
+        """A try failed and is being retried."""
+        with self._lock:
+            if event.status is None:
+                self.in_flight -= 1
+            self._add(self.retries, (event.family, self._reason(event)))
+
+    def on_error(self, event):
+        """A request failed for good."""
+        with self._lock:
+            if event.status is None:
+                self.in_flight -= 1
+            reason = self._reason(event)
+            if event.status is None and event.error is not None:
+                reason = type(event.error).__name__
+            self._add(self.errors, (event.family, reason))
+
+    def render(self):
+        """Return every metric in the Prometheus text format."""
+        with self._lock:
+            requests = dict(self.requests)
+            throttled = dict(self.throttled)
+            retries = dict(self.retries)
+            errors = dict(self.errors)
+            in_flight = self.in_flight
+            latency = dict(self.latency)
+
+        lines = []
+
+        def metric(name, kind, help_text, label_names, samples):
+            lines.append('# HELP ' + name + ' ' + help_text)
+            lines.append('# TYPE ' + name + ' ' + kind)
+            for key in sorted(samples):
+                lines.append(name + _labels(label_names, key) + ' ' +
+                             _number(samples[key]))
+
+        metric('skytap_requests_total', 'counter',
+               'Responses from the Skytap API.',
+               ('family', 'method', 'status'), requests)
+        metric('skytap_throttled_total', 'counter',
+               'Responses telling the client to slow down (429) or that '
+               'the resource was busy (423).', ('family', 'status'),
+               throttled)
+        metric('skytap_retries_total', 'counter',
+               'Failed tries that were retried.', ('family', 'reason'),
+               retries)
+        metric('skytap_errors_total', 'counter',
+               'Requests that failed for good.', ('family', 'reason'),
+               errors)
+        metric('skytap_requests_in_flight', 'gauge',
+               'Tries sent and not yet answered.', (), {(): in_flight})
+
+        name = 'skytap_request_duration_seconds'
+        lines.append('# HELP ' + name + ' How long each try took.')
+        lines.append('# TYPE ' + name + ' histogram')
+        for family in sorted(latency):
+            histogram = latency[family]
+            for bound in self.buckets:
+                lines.append(name + '_bucket' +
+                             _labels(('family', 'le'),
+                                     (family, _number(bound))) + ' ' +
+                             str(histogram.count_at_or_below(bound)))
+            lines.append(name + '_bucket' +
+                         _labels(('family', 'le'), (family, '+Inf')) + ' ' +
+                         str(histogram.count))
+            lines.append(name + '_sum' + _labels(('family',), (family,)) +
+                         ' ' + _number(histogram.total))
+            lines.append(name + '_count' + _labels(('family',), (family,)) +
+                         ' ' + str(histogram.count))
+
+        cache = self.cache if self.cache is not None else get_shared_cache()
+        if cache is not None:
+            hits, misses = cache.hits, cache.misses
+            metric('skytap_cache_hits_total', 'counter',
+                   'GETs answered from the response cache.', (), {(): hits})
+            metric('skytap_cache_misses_total', 'counter',
+                   'GETs the response cache couldn\'t answer.', (),
+                   {(): misses})
+            ratio = float(hits) / (hits + misses) if hits + misses else 0
+            metric('skytap_cache_hit_ratio', 'gauge',
+                   'The share of GETs answered from the cache.', (),
+                   {(): ratio})
+
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Write :func:`render` to a file, replacing it in one go.
+
+        Suits the node exporter's textfile collector, which mustn't see a
+        half-written file.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self.render().encode('utf-8'))
+            os.rename(temp, path)
+        except BaseException:
+            os.remove(temp)
+            raise
+
+    def reset(self):
+        """Forget everything collected (but not what's in flight)."""
+        with self._lock:
+            self.requests = {}
+            self.throttled = {}
+            self.retries = {}
+            self.errors = {}
+            self.latency = {}
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn,
+                           BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class MetricsServer(object):
+
+    """Serve a registry at ``/metrics`` for Prometheus to scrape."""
+
+    def __init__(self, registry, host='127.0.0.1', port=0):
+        """Set up the server.
+
+        Args:
+            registry (MetricsRegistry): What to serve.
+            host (str): The address to listen on; ``''`` for all of them.
+            port (int): The port; 0 picks a free one.
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+
+    @property
+    def url(self):
+        """Where the metrics are served."""
+        return 'http://' + (self.host or '127.0.0.1') + ':' + \
+            str(self.port) + '/metrics'
+
+    def start(self):
+        """Start serving on a background thread."""
+        self._server = _ThreadingHTTPServer((self.host, self.port),
+                                            self._request_handler())
+        self.port = self._server.server_address[1]
+        thread = threading.Thread(target=self._server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _request_handler(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
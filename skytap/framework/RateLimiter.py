@@ -0,0 +1,219 @@
+"""Keep API calls under Skytap's rate limit before Skytap has to say so.
+
+Skytap answers with a 429 (or a 423) when it thinks we're going too fast,
+and by then every caller is already backing off. A token bucket on the
+client side spaces the requests out up front instead: each request takes a
+token, tokens come back at a steady ``rate`` per second, and up to ``burst``
+of them can be saved up for short spikes.
+
+:class:`TokenBucket` is shared by every thread that uses it.
+:class:`FileTokenBucket` keeps its state in a small file, so separate
+processes on the same host (parallel cron jobs, worker pools) can share one
+budget. Hand either one to a client::
+
+    limiter = FileTokenBucket('/tmp/skytap.bucket', rate=5, burst=10)
+    client = ApiClient(rate_limiter=limiter)
+
+or set ``SKYTAP_RATE_LIMIT`` (and optionally ``SKYTAP_RATE_BURST`` and
+``SKYTAP_RATE_LIMIT_FILE``) to have every client share one.
+"""
+import os
+import struct
+import threading
+import time
+
+from skytap.framework.Config import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+_shared_limiter = None
+_shared_limiter_lock = threading.Lock()
+
+
+def get_shared_rate_limiter():
+    """Return the process-wide rate limiter, or None if there's no limit.
+
+    Built on first use from ``Config.rate_limit`` (requests per second, 0
+    for no limit), ``Config.rate_burst`` and ``Config.rate_limit_file``. If
+    a file is named, the bucket is shared with other processes using it.
+    """
+    global _shared_limiter
+    if _shared_limiter is None and Config.rate_limit > 0:
+        with _shared_limiter_lock:
+            if _shared_limiter is None:
+                burst = Config.rate_burst or None
+                if Config.rate_limit_file:
+                    _shared_limiter = FileTokenBucket(Config.rate_limit_file,
+                                                      Config.rate_limit,
+                                                      burst)
+                else:
+                    _shared_limiter = TokenBucket(Config.rate_limit, burst)
+    return _shared_limiter
+
+
+class TokenBucket(object):
+
+    """A thread-safe token bucket.
+
+    Example:
+
+    .. code-block:: python
+
+        bucket = TokenBucket(rate=5, burst=10)
+        bucket.acquire()  # blocks until a request is allowed
+    """
+
+    def __init__(self, rate, burst=None):
+        """Create a full bucket.
+
+        Args:
+            rate (float): Tokens added per second.
+            burst (int): How many tokens the bucket holds. Defaults to one
+                second's worth (at least 1).
+        """
+        if rate <= 0:
+            raise ValueError('rate must be greater than 0')
+        self.rate = float(rate)
+        self.burst = float(burst if burst else max(1, rate))
+        self._tokens = self.burst
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1, timeout=None):
+        """Take tokens from the bucket, waiting for them if need be.
+
+        Args:
+            tokens (int): How many tokens to take.
+            timeout (float): The longest to wait, in seconds. None waits as
+                long as it takes.
+
+        Returns:
+            bool: True if the tokens were taken, False if we timed out.
+        """
+        if tokens > self.burst:
+            raise ValueError('Cannot take more tokens than the bucket holds')
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            wait = self._take(tokens)
+            if wait <= 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def try_acquire(self, tokens=1):
+        """Take tokens only if they're available right now."""
+        return self._take(tokens) <= 0
+
+    @property
+    def tokens(self):
+        """How many tokens are in the bucket right now."""
+        with self._lock:
+            return self._refill(self._tokens, self._updated, time.time())
+
+    def _take(self, tokens):
+        """Take tokens if we can; otherwise return the seconds to wait."""
+        with self._lock:
+            now = time.time()
+            available = self._refill(self._tokens, self._updated, now)
+            self._updated = now
+            if available >= tokens:
+                self._tokens = available - tokens
+                return 0
+            self._tokens = available
+            return (tokens - available) / self.rate
+
+    def _refill(self, available, updated, now):
+        """Return how many tokens there are once time has passed."""
+        return min(self.burst, available + max(0, now - updated) * self.rate)
+
+
+class FileTokenBucket(TokenBucket):
+
+    """A token bucket shared by every process on the host using ``path``.
+
+    The bucket state (tokens left and when that was measured) lives in
+    ``path`` and is read and written under an exclusive file lock, so
+    unrelated processes can share it. Threads within a process are
+    serialised by the usual lock as well.
+    """
+
+    _format = '!dd'
+
+    def __init__(self, path, rate, burst=None):
+        """Open (or create) the shared bucket.
+
+        Args:
+            path (str): The file to keep the bucket state in.
+            rate (float): Tokens added per second.
+            burst (int): How many tokens the bucket holds.
+        """
+        super(FileTokenBucket, self).__init__(rate, burst)
+        self.path = path
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        os.close(fd)
+
+    @property
+    def tokens(self):
+        """How many tokens are in the bucket right now."""
+        with self._lock:
+            with open(self.path, 'r+b') as state:
+                self._lock_file(state)
+                try:
+                    available, updated = self._read(state)
+                finally:
+                    self._unlock_file(state)
+        return self._refill(available, updated, time.time())
+
+    def _take(self, tokens):
+        """Take tokens from the file-backed bucket."""
+        with self._lock:
+            with open(self.path, 'r+b') as state:
+                self._lock_file(state)
+                try:
+                    now = time.time()
+                    available, updated = self._read(state)
+                    available = self._refill(available, updated, now)
+                    if available >= tokens:
+                        self._write(state, available - tokens, now)
+                        return 0
+                    self._write(state, available, now)
+                    return (tokens - available) / self.rate
+                finally:
+                    self._unlock_file(state)
+
+    def _read(self, state):
+        """Read the bucket state; a new file starts out full."""
+        state.seek(0)
+        raw = state.read(struct.calcsize(self._format))
+        if len(raw) < struct.calcsize(self._format):
+            return self.burst, time.time()
+        return struct.unpack(self._format, raw)
+
+    def _write(self, state, available, updated):
+        state.seek(0)
+        state.write(struct.pack(self._format, available, updated))
+        state.flush()
+
+    @staticmethod
+    def _lock_file(state):
+        if fcntl is not None:
+            fcntl.flock(state.fileno(), fcntl.LOCK_EX)
+        else:
+            state.seek(0)
+            msvcrt.locking(state.fileno(), msvcrt.LK_LOCK, 1)
+
+    @staticmethod
+    def _unlock_file(state):
+        if fcntl is not None:
+            fcntl.flock(state.fileno(), fcntl.LOCK_UN)
+        else:
+            state.seek(0)
+            msvcrt.locking(state.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,208 @@
+"""Decide whether, and when, to retry a failed API request.
+
+A :class:`RetryPolicy` holds one :class:`RetryRule` per kind of failure:
+
+* ``423`` (busy): wait at least ``Config.retry_wait`` seconds, as Skytap
+  recommends, plus a little jitter.
+* ``429`` (too many requests): exponential backoff with full jitter.
+* ``'5xx'``: server errors, retried for GETs only by default.
+* ``'connection'``: connection errors and timeouts, GETs only by default.
+
+A ``Retry-After`` header always wins over the computed delay. Jitter keeps
+a crowd of workers that failed together from all retrying together, and
+a :class:`RetryBudget` shared between clients caps retries to a fraction of
+the real traffic so a bad spell can't multiply the load on Skytap.
+
+Pass a policy to a client to change any of this::
+
+    policy = RetryPolicy(max_attempts=6, max_total_delay=60,
+                         rules={'5xx': RetryRule(base=2, methods=None)})
+    client = ApiClient(retry_policy=policy)
+"""
+import random
+import threading
+
+import requests
+
+from skytap.framework.Config import Config
+from skytap.framework.RateLimiter import TokenBucket
+
+_shared_budget = None
+_shared_budget_lock = threading.Lock()
+
+
+def get_shared_budget():
+    """Return the retry budget shared by every default policy."""
+    global _shared_budget
+    if _shared_budget is None:
+        with _shared_budget_lock:
+            if _shared_budget is None:
+                _shared_budget = RetryBudget()
+    return _shared_budget
+
+
+class RetryBudget(object):
+
+    """Limit retries to a fraction of requests.
+
+    Every request deposits ``ratio`` of a token and every retry withdraws a
+    whole one. A small reserve that refills at ``min_per_second`` lets
+    retries through when traffic is light.
+    """
+
+    def __init__(self, ratio=0.2, min_per_second=1.0, max_balance=100):
+        """Set up an empty budget.
+
+        Args:
+            ratio (float): Retries allowed per request made.
+            min_per_second (float): Retries always allowed per second.
+            max_balance (float): The most retry tokens that can be saved.
+        """
+        self.ratio = ratio
+        self.max_balance = max_balance
+        self._balance = 0.0
+        self._reserve = TokenBucket(min_per_second, max(1, min_per_second * 10))
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """Record that a request is being made."""
+        with self._lock:
+            self._balance = min(self.max_balance, self._balance + self.ratio)
+
+    def withdraw(self):
+        """Take a retry from the budget.
+
+        Returns:
+            bool: True if the retry may go ahead.
+        """
+        with self._lock:
+            if self._balance >= 1:
+                self._balance -= 1
+                return True
+        return self._reserve.try_acquire()
+
+
+class RetryRule(object):
+
+    """How to retry one kind of failure."""
+
+    def __init__(self, base=1.0, cap=30.0, floor=0.0, methods=None):
+        """Describe the backoff.
+
+        The delay before retry ``n`` is ``floor`` plus a random amount
+        between 0 and ``min(cap, base * 2 ** (n - 1))``.
+
+        Args:
+            base (float): The first backoff step, in seconds.
+            cap (float): The largest backoff step.
+            floor (float): Always wait at least this long.
+            methods (tuple): HTTP methods this rule retries. None means all.
+        """
+        self.base = base
+        self.cap = cap
+        self.floor = floor
+        self.methods = methods
+
+    def applies_to(self, method):
+        return self.methods is None or method.upper() in self.methods
+
+    def delay(self, attempt):
+        """Return the jittered delay before retry number ``attempt``."""
+        step = min(self.cap, self.base * 2 ** (attempt - 1))
+        return self.floor + random.uniform(0, step)
+
+
+class RetryPolicy(object):
+
+    """The retry rules, attempt limit and delay limit for a client."""
+
+    def __init__(self, max_attempts=None, max_total_delay=None, rules=None,
+                 budget=None):
+        """Set up the policy.
+
+        Args:
+            max_attempts (int): Tries per request, the first included.
+                Defaults to ``Config.max_http_attempts``.
+            max_total_delay (float): The most time to spend waiting between
+                tries of one request. Defaults to ``Config.retry_max_delay``.
+            rules (dict): Rules to add or replace, keyed by status code,
+                ``'5xx'`` or ``'connection'``. A value of None stops that
+                kind of failure from being retried.
+            budget (RetryBudget): The budget retries are taken from.
+                Defaults to one shared by the whole process.
+        """
+        if max_attempts is None:
+            max_attempts = Config.max_http_attempts
+        if max_total_delay is None:
+            max_total_delay = Config.retry_max_delay
+        self.max_attempts = max_attempts
+        self.max_total_delay = max_total_delay
+        self.rules = {
+            423: RetryRule(base=1, cap=30, floor=Config.retry_wait),
+            429: RetryRule(base=1, cap=30),
+            '5xx': RetryRule(base=1, cap=30, methods=('GET',)),
+            'connection': RetryRule(base=1, cap=30, methods=('GET',)),
+        }
+        self.rules.update(rules or {})
+        self.budget = budget if budget is not None else get_shared_budget()
+
+    def rule_for(self, response=None, error=None):
+        """Return the rule for a failed response or exception, if any."""
+        if error is not None:
+            if isinstance(error, (requests.exceptions.ConnectionError,
+                                  requests.exceptions.Timeout)):
+                return self.rules.get('connection')
+            return None
+        if response.status_code in self.rules:
+            return self.rules[response.status_code]
+        if 500 <= response.status_code < 600:
+            return self.rules.get('5xx')
+        return None
+
+    def start(self, method):
+        """Begin tracking the tries of one request.
+
+        Returns:
+            RetryState: Ask it for the delay after each failure.
+        """
+        self.budget.deposit()
+        return RetryState(self, method)
+
+
+class RetryState(object):
+
+    """The tries made so far for one request."""
+
+    def __init__(self, policy, method):
+        self.policy = policy
+        self.method = method
+        self.attempts = 0
+        self.total_delay = 0.0
+
+    def next_delay(self, response=None, error=None, retry_after=None):
+        """Return how long to wait before trying again, or None to give up.
+
+        Args:
+            response: The failed response, if there was one.
+            error (Exception): The exception raised, if there was one.
+            retry_after (float): Seconds Skytap asked us to wait, if it did.
+        """
+        self.attempts += 1
+        policy = self.policy
+        rule = policy.rule_for(response, error)
+        if rule is None or not rule.applies_to(self.method):
+            return None
+        if self.attempts >= policy.max_attempts:
+            return None
+
+        if retry_after is not None:
+            delay = retry_after + random.uniform(0, 1)
+        else:
+            delay = rule.delay(self.attempts)
+
+        if self.total_delay + delay > policy.max_total_delay:
+            return None
+        if not policy.budget.withdraw():
+            return None
+        self.total_delay += delay
+        return delay
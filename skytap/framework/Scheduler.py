@@ -0,0 +1,205 @@
+"""Let interactive requests go ahead of bulk ones.
+
+A nightly job pruning notes and a person looking up one environment share
+the same account rate limit. With a :class:`RequestScheduler` every request
+waits for one of a fixed number of slots before it takes a rate-limit token
+and goes out, and when requests queue up for a slot, who goes next is
+decided by weighted fair queuing between priority classes:
+
+=============== ====== =================================================
+class           weight use
+=============== ====== =================================================
+``interactive`` 8      someone is waiting at a terminal (``bin/skytap``)
+``normal``      4      the default
+``bulk``        1      background jobs
+=============== ====== =================================================
+
+So with both kinds queued, interactive requests get 8 slots for every one
+bulk gets. That's enough for interactive work to jump the queue, while bulk
+work still gets a guaranteed share and is never starved.
+
+Pick the class per block of code::
+
+    with priority('bulk'):
+        for env in skytap.Environments():
+            env.suspend()
+
+or per client with ``ApiClient(priority='bulk')``. The scheduler is shared
+by every client in the process once ``Config.scheduler_slots`` is set; 0
+(the default) turns it off. It only orders requests within one process.
+"""
+from collections import deque
+import threading
+import time
+
+import six
+
+from skytap.framework.Config import Config
+
+INTERACTIVE = 'interactive'
+NORMAL = 'normal'
+BULK = 'bulk'
+DEFAULT_WEIGHTS = {INTERACTIVE: 8, NORMAL: 4, BULK: 1}
+
+_local = threading.local()
+_shared_scheduler = None
+_shared_scheduler_lock = threading.Lock()
+
+
+def get_shared_scheduler():
+    """Return the process-wide scheduler, or None if it's turned off."""
+    global _shared_scheduler
+    if _shared_scheduler is None and Config.scheduler_slots > 0:
+        with _shared_scheduler_lock:
+            if _shared_scheduler is None:
+                _shared_scheduler = RequestScheduler(Config.scheduler_slots)
+    return _shared_scheduler
+
+
+def current_priority():
+    """Return the priority class in force on this thread."""
+    return getattr(_local, 'priority', NORMAL)
+
+
+class priority(object):
+
+    """Make requests in a ``with`` block with the given priority class."""
+
+    def __init__(self, name):
+        self.name = name
+        self._outer = None
+
+    def __enter__(self):
+        self._outer = current_priority()
+        _local.priority = self.name
+        return self
+
+    def __exit__(self, *exc_info):
+        _local.priority = self._outer
+
+
+class RequestScheduler(object):
+
+    """Hand out request slots by weighted fair queuing."""
+
+    def __init__(self, slots=4, weights=None):
+        """Set up the scheduler.
+
+        Args:
+            slots (int): Requests allowed out at once.
+            weights (dict): Weights to add or change, by class name.
+        """
+        self.slots = slots
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.dispatched = dict((name, 0) for name in self.weights)
+        self._in_use = 0
+        self._queues = dict((name, deque()) for name in self.weights)
+        self._start = dict((name, 0.0) for name in self.weights)
+        self._finish = dict((name, 0.0) for name in self.weights)
+        self._clock = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self, name=None, timeout=None):
+        """Wait for a slot.
+
+        Args:
+            name (str): The priority class. Defaults to the one in force
+                on this thread.
+            timeout (float): The longest to wait. None waits for good.
+
+        Returns:
+            bool: True once a slot is ours, False if we timed out.
+        """
+        if name is None:
+            name = current_priority()
+        if name not in self.weights:
+            raise ValueError('Unknown priority class: ' + str(name))
+        with self._condition:
+            if self._in_use < self.slots and not self.queued:
+                self._in_use += 1
+                self._charge(name, max(self._finish[name], self._clock))
+                return True
+
+            ticket = _Ticket()
+            if not self._queues[name]:
+                self._start[name] = max(self._finish[name], self._clock)
+            self._queues[name].append(ticket)
+            deadline = None if timeout is None else time.time() + timeout
+            while not ticket.granted:
+                wait = None
+                if deadline is not None:
+                    wait = deadline - time.time()
+                    if wait <= 0:
+                        self._queues[name].remove(ticket)
+                        return False
+                self._condition.wait(wait)
+            return True
+
+    def release(self):
+        """Give a slot back, handing it to the next request in line."""
+        with self._condition:
+            self._in_use -= 1
+            if self.queued and self._in_use < self.slots:
+                self._next().granted = True
+                self._in_use += 1
+                self._condition.notify_all()
+
+    def slot(self, name=None):
+        """Hold a slot for the length of a ``with`` block."""
+        return _Slot(self, name)
+
+    @property
+    def queued(self):
+        """How many requests are waiting for a slot."""
+        return sum(len(queue) for queue in six.itervalues(self._queues))
+
+    def _next(self):
+        """Take the waiting request that would finish first.
+
+        Each class's head request has a virtual start time, set when it
+        reached the head of its queue, and takes ``1 / weight`` to finish,
+        so heavier classes get proportionally more turns.
+        """
+        best = None
+        for name, queue in six.iteritems(self._queues):
+            if not queue:
+                continue
+            finish = self._start[name] + 1.0 / self.weights[name]
+            if best is None or finish < best[0]:
+                best = (finish, name)
+        name = best[1]
+        self._charge(name, self._start[name])
+        ticket = self._queues[name].popleft()
+        if self._queues[name]:
+            self._start[name] = self._finish[name]
+        return ticket
+
+    def _charge(self, name, start):
+        """Move the virtual clock on by one request of class ``name``."""
+        self._clock = start
+        self._finish[name] = start + 1.0 / self.weights[name]
+        self.dispatched[name] += 1
+
+
+class _Ticket(object):
+
+    """A place in a scheduler queue."""
+
+    def __init__(self):
+        self.granted = False
+
+
+class _Slot(object):
+
+    """Context manager returned by :func:`RequestScheduler.slot`."""
+
+    def __init__(self, scheduler, name):
+        self.scheduler = scheduler
+        self.name = name
+
+    def __enter__(self):
+        self.scheduler.acquire(self.name)
+        return self.scheduler
+
+    def __exit__(self, *exc_info):
+        self.scheduler.release()
@@ -0,0 +1,102 @@
+"""Share one in-flight GET between every thread asking for the same thing.
+
+When several threads ask for the same URL at the same moment (a
+``refresh()`` racing a ``notes`` load, or two workers on the same
+environment), only the first request goes to Skytap. The others wait for
+it and get the very same decoded result, or the same exception. Unlike a
+cache, nothing is kept once the request finishes, so nobody sees stale
+data.
+
+Every client shares one :class:`SingleFlight` unless
+``Config.coalesce_gets`` is turned off.
+
+.. note::
+    Waiters get the same object as the thread that made the request. Treat
+    what comes back from the API as read-only.
+"""
+import sys
+import threading
+
+import six
+
+from skytap.framework.ApiExceptions import SkytapDeadlineExceededError
+from skytap.framework.Config import Config
+from skytap.framework.Deadline import current_deadline
+
+_shared_single_flight = None
+_shared_single_flight_lock = threading.Lock()
+
+
+def get_shared_single_flight():
+    """Return the process-wide :class:`SingleFlight`, or None if it's off."""
+    global _shared_single_flight
+    if _shared_single_flight is None and Config.coalesce_gets:
+        with _shared_single_flight_lock:
+            if _shared_single_flight is None:
+                _shared_single_flight = SingleFlight()
+    return _shared_single_flight
+
+
+class SingleFlight(object):
+
+    """Run a call once for all the threads that want it at the same time."""
+
+    def __init__(self):
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Return ``fn()``, or the result of the same call already running.
+
+        Args:
+            key: Identifies the call; calls with equal keys are shared.
+            fn: What to call if nobody is running it yet.
+
+        Waiting for another thread's call respects the current
+        :class:`~skytap.framework.Deadline.Deadline`.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return call.wait()
+
+        try:
+            call.result = fn()
+        except BaseException:
+            call.error = sys.exc_info()
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def __len__(self):
+        return len(self._calls)
+
+
+class _Call(object):
+
+    """One call in flight, and its outcome once it has one."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def wait(self):
+        deadline = current_deadline()
+        if deadline is None:
+            self.done.wait()
+        elif not self.done.wait(deadline.remaining()):
+            raise SkytapDeadlineExceededError(deadline.seconds)
+        if self.error is not None:
+            six.reraise(*self.error)
+        return self.result
@@ -0,0 +1,270 @@
+"""Latency histograms and request counts per endpoint family.
+
+A :class:`StatsCollector` is fed by the client :mod:`hooks
+<skytap.framework.Hooks>` and keeps, for each endpoint family
+(``configurations``, ``vms``, ``notes``...), how many requests were made,
+their statuses, retries, failures and bytes, and a :class:`Histogram` of
+how long they took::
+
+    stats = StatsCollector()
+    get_shared_hooks().register(stats)
+    run_the_job()
+    print(stats.report())
+
+The report lists the families by the total time spent in them, so the
+endpoints that dominate a slow job come first.
+
+:class:`Histogram` works the way an HDR histogram does: values are counted
+in buckets whose width grows with the value, so every value is kept to
+within 1% however big it is, in a few kilobytes, and recording one is a
+little arithmetic and a dict update.
+"""
+from collections import Counter
+import threading
+
+import six
+
+#: Percentiles included in :func:`StatsCollector.summary`.
+PERCENTILES = (50, 90, 99)
+
+
+class Histogram(object):
+
+    """Counts of values (seconds), to within a fixed relative precision.
+
+    Values are counted in units of ``resolution`` seconds (a microsecond by
+    default). Below ``2 ** precision_bits`` units each unit has its own
+    bucket; above that, each doubling of the value is split into
+    ``2 ** (precision_bits - 1)`` buckets, so a value is never off by more
+    than one part in ``2 ** (precision_bits - 1)``: under 1% with the
+    default of 8 bits.
+    """
+
+    def __init__(self, resolution=1e-6, precision_bits=8):
+        """Set up an empty histogram.
+
+        Args:
+            resolution (float): The smallest difference kept, in seconds.
+            precision_bits (int): Sets the relative precision, as above.
+        """
+        self.resolution = resolution
+        self._bits = precision_bits
+        self._linear = 1 << precision_bits
+        self._half = self._linear >> 1
+        self._counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self._lock = threading.Lock()
+
+    def _index(self, units):
+        if units < self._linear:
+            return units
+        shift = units.bit_length() - self._bits
+        return self._linear + (shift - 1) * self._half + \
+            (units >> shift) - self._half
+
+    def _bounds(self, index):
+        """Return the lowest and highest units counted in a bucket."""
+        if index < self._linear:
+            return index, index
+        shift = (index - self._linear) // self._half + 1
+        low = (self._half + (index - self._linear) % self._half) << shift
+        return low, low + (1 << shift) - 1
+
+    def record(self, seconds, count=1):
+        """Count a value ``count`` times."""
+        units = max(int(seconds / self.resolution), 0)
+        index = self._index(units)
+        with self._lock:
+            self._counts[index] = self._counts.get(index, 0) + count
+            self.count += count
+            self.total += seconds * count
+            if self.min is None or seconds < self.min:
+                self.min = seconds
+            if self.max is None or seconds > self.max:
+                self.max = seconds
+
+    def merge(self, other):
+        """Add the counts from another histogram with the same settings."""
+        if (other.resolution, other._bits) != (self.resolution, self._bits):
+            raise ValueError('Histograms have different precisions')
+        with other._lock:
+            counts = dict(other._counts)
+            count, total = other.count, other.total
+            low, high = other.min, other.max
+        with self._lock:
+            for index, n in six.iteritems(counts):
+                self._counts[index] = self._counts.get(index, 0) + n
+            self.count += count
+            self.total += total
+            if low is not None and (self.min is None or low < self.min):
+                self.min = low
+            if high is not None and (self.max is None or high > self.max):
+                self.max = high
+
+    @property
+    def mean(self):
+        """The mean value, or None if nothing's been recorded."""
+        if not self.count:
+            return None
+        return self.total / self.count
+
+    def percentile(self, percent):
+        """Return the value ``percent`` percent of values are at or below.
+
+        Returns the top of the bucket it falls in (never more than the
+        largest value recorded), or None if nothing's been recorded.
+        """
+        with self._lock:
+            if not self.count:
+                return None
+            wanted = max(1, int(round(self.count * percent / 100.0)))
+            seen = 0
+            for index in sorted(self._counts):
+                seen += self._counts[index]
+                if seen >= wanted:
+                    high = (self._bounds(index)[1] + 1) * self.resolution
+                    return min(high, self.max)
+            return self.max
+
+    def buckets(self):
+        """Return ``(upper bound in seconds, count)`` for each bucket used."""
+        with self._lock:
+            return [((self._bounds(index)[1] + 1) * self.resolution,
+                     self._counts[index]) for index in sorted(self._counts)]
+
+    def count_at_or_below(self, seconds):
+        """Return how many values were at or below ``seconds``.
+
+        Exact to within the histogram's precision.
+        """
+        return sum(n for upper, n in self.buckets() if upper <= seconds)
+
+
+class EndpointStats(object):
+
+    """Counts and latencies for one endpoint family."""
+
+    def __init__(self):
+        """Start from nothing."""
+        self.requests = 0
+        self.statuses = Counter()
+        self.retries = 0
+        self.errors = 0
+        self.bytes = 0
+        self.latency = Histogram()
+        self.ttfb = Histogram()
+
+
+class StatsCollector(object):
+
+    """Keeps :class:`EndpointStats` for each endpoint family.
+
+    Register it on a :class:`~skytap.framework.Hooks.Hooks` to start
+    collecting.
+    """
+
+    def __init__(self, by='family'):
+        """Set up the collector.
+
+        Args:
+            by (str): Group requests by endpoint ``'family'`` (``vms``) or
+                by URL ``'template'`` (``/configurations/:id/vms/:id``).
+        """
+        if by not in ('family', 'template'):
+            raise ValueError('Group by family or template, not ' + str(by))
+        self.by = by
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, event):
+        key = getattr(event, self.by)
+        with self._lock:
+            stats = self.endpoints.get(key)
+            if stats is None:
+                stats = self.endpoints[key] = EndpointStats()
+            return stats
+
+    def after_response(self, event):
+        """Count a response and how long it took."""
+        stats = self._stats(event)
+        with self._lock:
+            stats.requests += 1
+            stats.statuses[event.status] += 1
+            stats.bytes += event.bytes or 0
+        if event.total is not None:
+            stats.latency.record(event.total)
+        if event.ttfb is not None:
+            stats.ttfb.record(event.ttfb)
+
+    def on_retry(self, event):
+        """Count a retry."""
+        stats = self._stats(event)
+        with self._lock:
+            stats.retries += 1
+            if event.status is None:
+                stats.requests += 1
+
+    def on_error(self, event):
+        """Count a request that failed for good."""
+        stats = self._stats(event)
+        with self._lock:
+            stats.errors += 1
+            if event.status is None:
+                stats.requests += 1
+
+    def reset(self):
+        """Forget everything collected."""
+        with self._lock:
+            self.endpoints = {}
+
+    def summary(self):
+        """Return the numbers for each endpoint as plain dicts.
+
+        Latencies are in seconds, under ``latency`` (``count``, ``mean``,
+        ``max`` and ``p50``, ``p90`` and ``p99``).
+        """
+        with self._lock:
+            endpoints = dict(self.endpoints)
+        summary = {}
+        for key, stats in six.iteritems(endpoints):
+            latency = {'count': stats.latency.count,
+                       'total': stats.latency.total,
+                       'mean': stats.latency.mean,
+                       'max': stats.latency.max}
+            for percent in PERCENTILES:
+                latency['p' + str(percent)] = \
+                    stats.latency.percentile(percent)
+            summary[key] = {
+                'requests': stats.requests,
+                'statuses': dict(stats.statuses),
+                'retries': stats.retries,
+                'errors': stats.errors,
+                'bytes': stats.bytes,
+                'latency': latency,
+            }
+        return summary
+
+    def report(self):
+        """Return a table of the summary, most time spent first."""
+        summary = self.summary()
+        lines = ['%-32s %8s %7s %6s %9s %9s %9s %10s' % (
+            self.by, 'requests', 'retries', 'errors', 'p50', 'p99', 'max',
+            'total')]
+        order = sorted(summary, key=lambda k: -summary[k]['latency']['total'])
+        for key in order:
+            stats = summary[key]
+            latency = stats['latency']
+            lines.append('%-32s %8d %7d %6d %9s %9s %9s %10s' % (
+                key, stats['requests'], stats['retries'], stats['errors'],
+                _seconds(latency['p50']), _seconds(latency['p99']),
+                _seconds(latency['max']), _seconds(latency['total'])))
+        return '\n'.join(lines)
+
+
+def _seconds(value):
+    if value is None:
+        return '-'
+    return '%.3fs' % value
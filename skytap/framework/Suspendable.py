@@ -1,7 +1,8 @@
 """Add the Suspendable class to classes that can be run/suspended/etc."""
 
-from skytap.framework.ApiClient import ApiClient
 from skytap.framework.Config import Config
+from skytap.framework.Deadline import Deadline, activate, current_deadline
+from skytap.framework.Tracing import span, traced
 import time
 
 
@@ -34,8 +35,22 @@ class Suspendable(object):
         """Stop the object (environment/vm)."""
         self.change_state('stopped', wait)
 
+    @traced
     def change_state(self, state, wait=False):
-        """Change the state of the object (environment/vm)."""
+        """Change the state of the object (environment/vm).
+
+        With ``wait``, polls every 10 seconds until the new state is
+        reached, for up to ``Config.state_wait_timeout`` seconds (0 waits as
+        long as it takes). Run it inside ``client.deadline(seconds)`` to give
+        up sooner; see :mod:`skytap.framework.Deadline`.
+
+        Returns:
+            True, once the state is reached (or if it already was).
+
+        Raises:
+            SkytapDeadlineExceededError: If the wait runs out of time before
+                the state is reached.
+        """
         if state not in Suspendable.valid_states:
             raise ValueError(str(state) + ' not a valid state.')
 
@@ -46,10 +61,9 @@ class Suspendable(object):
         if Config.add_note_on_state_change:
             self.notes.add("Changing state via API to '" + state + "'")
 
-        api = ApiClient()
         url = self.url + '.json'
         data = {"runstate": state}
-        response = api.rest(url, {}, 'PUT', data)
+        self.api.rest_json(url, {}, 'PUT', data)
         if not wait:
             return True
 
@@ -59,11 +73,18 @@ class Suspendable(object):
         if state == 'halted':
             state = 'stopped'
 
-        self.refresh()
-        counter = 0
-        while not self.runstate == state and counter < 12:
-            time.sleep(10)
-            self.refresh()
-        if self.runstate == state:
-            return True
-        return False
+        limit = None
+        if Config.state_wait_timeout:
+            limit = Deadline(Config.state_wait_timeout)
+        with span('wait for ' + state):
+            with activate(limit):
+                deadline = current_deadline()
+                self.refresh()
+                while not self.runstate == state:
+                    wait = 10
+                    if deadline is not None:
+                        deadline.check()
+                        wait = min(wait, deadline.remaining())
+                    time.sleep(wait)
+                    self.refresh()
+        return True
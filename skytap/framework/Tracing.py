@@ -0,0 +1,282 @@
+"""Trace where the time goes in a multi-step operation.
+
+A single ``env.suspend(wait=True)`` is a refresh, a notes load, a note
+post, another notes load, the runstate PUT and then a polling loop. A
+:class:`Tracer` records a *span* for each of the package's higher-level
+operations (:func:`Suspendable.change_state
+<skytap.framework.Suspendable.Suspendable.change_state>`,
+:func:`Notes.add <skytap.models.Notes.Notes.add>`, the ``refresh`` of
+groups and resources...) and for every HTTP request and retry wait under
+them, and writes them out as Chrome trace-event JSON. Open the file in
+``chrome://tracing`` or https://ui.perfetto.dev to see each request nested
+under the call that made it::
+
+    with Tracer() as tracer:
+        env.suspend(wait=True)
+    tracer.save('suspend.json')
+
+Or set ``Config.trace_file`` (``SKYTAP_TRACE_FILE``) to trace the whole
+process, saved to that file when it exits. A tracer keeps at most
+``Config.trace_max_spans`` spans, dropping the oldest first, so a
+long-running process traced this way doesn't grow without end; the saved
+trace covers its last stretch.
+
+HTTP requests are seen through the shared :mod:`hooks
+<skytap.framework.Hooks>`, so clients given hooks of their own aren't
+traced. Spans nest by thread: pages fetched in parallel show up on the
+threads that fetched them. While no tracer is running, a traced call costs
+one global lookup.
+"""
+import atexit
+import contextlib
+import functools
+import json
+import os
+import threading
+from timeit import default_timer
+
+from skytap.framework.Config import Config
+from skytap.framework.Hooks import get_shared_hooks
+
+_active = None
+_active_lock = threading.Lock()
+_shared_tracer = None
+_shared_tracer_lock = threading.Lock()
+
+
+def get_shared_tracer():
+    """Return the process-wide tracer, or None if it's turned off.
+
+    If ``Config.trace_file`` is set, the tracer is started on first use and
+    saved to that file when the process exits.
+    """
+    global _shared_tracer
+    if _shared_tracer is None and Config.trace_file:
+        with _shared_tracer_lock:
+            if _shared_tracer is None:
+                tracer = Tracer(Config.trace_file)
+                atexit.register(tracer.save)
+                _shared_tracer = tracer.start()
+    return _shared_tracer
+
+
+def current_tracer():
+    """Return the running tracer, if there is one."""
+    return _active
+
+
+@contextlib.contextmanager
+def span(name, category='skytap', **args):
+    """Record a span, if a tracer is running; otherwise do nothing."""
+    tracer = _active
+    if tracer is None:
+        yield None
+    else:
+        with tracer.span(name, category, **args) as current:
+            yield current
+
+
+def traced(func):
+    """Record a span for each call of a method.
+
+    The span is named for the object's class and the method, as in
+    ``Environment.change_state``.
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        tracer = _active
+        if tracer is None:
+            return func(self, *args, **kwargs)
+        with tracer.span(type(self).__name__ + '.' + func.__name__):
+            return func(self, *args, **kwargs)
+    return wrapper
+
+
+class Span(object):
+
+    """One timed operation. Times are seconds from the tracer's start."""
+
+    def __init__(self, name, category, start, thread, args=None):
+        """Start a span."""
+        self.name = name
+        self.category = category
+        self.start = start
+        self.end = None
+        self.thread = thread
+        self.args = args or {}
+
+    @property
+    def duration(self):
+        """Seconds the span lasted, or None if it hasn't ended."""
+        if self.end is None:
+            return None
+        return self.end - self.start
+
+    def __repr__(self):
+        return '<Span ' + self.name + ' ' + str(self.duration) + '>'
+
+
+class Tracer(object):
+
+    """Records spans while it's running. Safe to use from many threads.
+
+    Only one tracer runs at a time; starting one stops any other.
+    """
+
+    def __init__(self, path=None, max_spans=None):
+        """Set up a tracer.
+
+        Args:
+            path (str): Where :func:`save` writes to.
+            max_spans (int): The most spans to keep. Once there are more,
+                the oldest tenth are dropped. Defaults to
+                ``Config.trace_max_spans``; 0 keeps them all.
+        """
+        self.path = path
+        if max_spans is None:
+            max_spans = Config.trace_max_spans
+        self.max_spans = max_spans
+        self.dropped = 0
+        self.spans = []
+        self._origin = default_timer()
+        self._threads = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start recording: traced calls and HTTP requests add spans."""
+        global _active
+        with _active_lock:
+            previous = _active
+            _active = self
+        if previous is not None and previous is not self:
+            get_shared_hooks().unregister(previous)
+        if previous is not self:
+            get_shared_hooks().register(self)
+        return self
+
+    def stop(self):
+        """Stop recording."""
+        global _active
+        with _active_lock:
+            if _active is not self:
+                return
+            _active = None
+        get_shared_hooks().unregister(self)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _now(self):
+        return default_timer() - self._origin
+
+    def _begin(self, name, category, args=None):
+        thread = threading.current_thread()
+        current = Span(name, category, self._now(), thread.ident, args)
+        with self._lock:
+            self._threads.setdefault(thread.ident, thread.name)
+            self.spans.append(current)
+            if self.max_spans and len(self.spans) > self.max_spans:
+                # Drop a batch at a time, not one span per span added.
+                drop = len(self.spans) - self.max_spans * 9 // 10
+                del self.spans[:drop]
+                self.dropped += drop
+        return current
+
+    @contextlib.contextmanager
+    def span(self, name, category='skytap', **args):
+        """Record a span around the ``with`` block.
+
+        If the block raises, the span notes the error.
+        """
+        current = self._begin(name, category, args)
+        try:
+            yield current
+        except BaseException as e:
+            current.args['error'] = repr(e)
+            raise
+        finally:
+            current.end = self._now()
+
+    # Hooks: one span per try at a request, plus one for each retry wait.
+
+    def before_request(self, event):
+        """Open the span for a try."""
+        self._local.request = self._begin(
+            event.method + ' ' + event.template, 'http',
+            {'url': event.url, 'attempt': event.attempt})
+
+    def after_response(self, event):
+        """Close the try's span with what came back."""
+        current = getattr(self._local, 'request', None)
+        if current is None:
+            return
+        current.end = self._now()
+        current.args['status'] = event.status
+        if event.bytes is not None:
+            current.args['bytes'] = event.bytes
+
+    def _failed(self, event):
+        current = getattr(self._local, 'request', None)
+        if current is None:
+            return
+        if current.end is None:
+            current.end = self._now()
+        if event.error is not None:
+            current.args['error'] = repr(event.error)
+
+    def on_retry(self, event):
+        """Note the failure and record the wait before the next try."""
+        self._failed(event)
+        if event.delay:
+            wait = self._begin('retry wait', 'http', {'delay': event.delay})
+            wait.end = wait.start + event.delay
+
+    def on_error(self, event):
+        """Note why the request failed."""
+        self._failed(event)
+
+    def chrome_trace(self):
+        """Return the spans as Chrome trace-event JSON (a dict)."""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+            threads = dict(self._threads)
+        now = self._now()
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                   'args': {'name': name}}
+                  for tid, name in sorted(threads.items())]
+        for current in spans:
+            end = current.end if current.end is not None else now
+            events.append({
+                'name': current.name,
+                'cat': current.category,
+                'ph': 'X',
+                'ts': round(current.start * 1e6, 1),
+                'dur': round((end - current.start) * 1e6, 1),
+                'pid': pid,
+                'tid': current.thread,
+                'args': current.args,
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save(self, path=None):
+        """Write :func:`chrome_trace` to a file.
+
+        Args:
+            path (str): Defaults to the path the tracer was made with.
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError('No path to save the trace to')
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f, default=str)
+
+    def clear(self):
+        """Forget every span recorded so far."""
+        with self._lock:
+            self.spans = []
+            self.dropped = 0
@@ -0,0 +1,305 @@
+"""The ways a request can be put on the wire.
+
+:class:`~skytap.framework.ApiClient.ApiClient` doesn't talk HTTP itself;
+it hands each try at a request to a transport, which sends it and returns
+a :class:`requests.Response`. Retries, rate limits, caching and everything
+else stay in the client, so any transport gets all of them. There are
+three:
+
+======================== ==================================================
+transport                sends requests with
+======================== ==================================================
+:class:`RequestsTransport` a :class:`requests.Session` (the default)
+:class:`Urllib3Transport`  a :class:`urllib3.PoolManager`, skipping the
+                         session's per-request work
+:class:`MemoryTransport`   a function in this process; nothing goes over
+                         the network
+======================== ==================================================
+
+``Config.transport`` (``'requests'`` or ``'urllib3'``) picks the one every
+client shares by default. Any one can be handed to a client directly::
+
+    def handler(request):
+        return 200, [{'id': 1, 'name': 'test'}]
+
+    api = ApiClient(transport=MemoryTransport(handler))
+
+:class:`~skytap.framework.AsyncApiClient.AsyncApiClient` takes the same
+transports, running them on a thread pool.
+"""
+import json
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+import six
+import urllib3
+from urllib3 import exceptions as urllib3_exceptions
+
+from skytap.framework.Config import Config
+
+_session = None
+_session_lock = threading.Lock()
+_shared_transport = None
+_shared_transport_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide :class:`requests.Session`.
+
+    The session is created on first use and then shared by every
+    :class:`~skytap.framework.ApiClient.ApiClient`, so TCP and TLS
+    connections to Skytap are pooled and kept alive between calls instead
+    of being opened for every request.
+
+    The pool size comes from ``Config.http_pool_size`` and keep-alive can be
+    turned off with ``Config.http_keep_alive``. Both are read when the session
+    is built; call :func:`reset_session` after changing them.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def reset_session():
+    """Close the shared session and transport so the next call builds new ones.
+
+    Useful after changing the pool or transport settings in :class:`Config`,
+    or in a child process after a fork, where sockets must not be shared.
+    """
+    global _session, _shared_transport
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+    with _shared_transport_lock:
+        if _shared_transport is not None:
+            _shared_transport.close()
+        _shared_transport = None
+
+
+def _build_session():
+    """Create a session with a connection pool sized from the config."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=Config.http_pool_size,
+                          pool_maxsize=Config.http_pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if not Config.http_keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+def get_shared_transport():
+    """Return the process-wide transport named by ``Config.transport``."""
+    global _shared_transport
+    if _shared_transport is None:
+        with _shared_transport_lock:
+            if _shared_transport is None:
+                _shared_transport = build_transport(Config.transport)
+    return _shared_transport
+
+
+def build_transport(name):
+    """Create a transport by name: ``'requests'`` or ``'urllib3'``."""
+    if name == 'requests':
+        return RequestsTransport()
+    if name == 'urllib3':
+        return Urllib3Transport()
+    raise ValueError('Unknown transport: ' + str(name))
+
+
+def make_response(request, status_code=200, body=None, headers=None):
+    """Build a :class:`requests.Response` to a request without any network.
+
+    Args:
+        request (requests.PreparedRequest): What it's an answer to.
+        status_code (int): The HTTP status.
+        body: Bytes or text are sent as they are; anything else is sent as
+            JSON.
+        headers (dict): Any headers to send.
+    """
+    response = requests.Response()
+    response.status_code = status_code
+    response.request = request
+    response.url = request.url
+    response.headers.update(headers or {})
+    if body is None:
+        body = b''
+    elif isinstance(body, six.text_type):
+        body = body.encode('utf-8')
+    elif not isinstance(body, (bytes, bytearray)):
+        body = json.dumps(body).encode('utf-8')
+        response.headers.setdefault('Content-Type', 'application/json')
+    response._content = bytes(body)
+    response.encoding = 'utf-8'
+    return response
+
+
+class Transport(object):
+
+    """Sends one request and returns the response.
+
+    Subclasses implement :func:`send`; it must be safe to call from many
+    threads at once.
+    """
+
+    def send(self, method, url, headers=None, auth=None, data=None,
+             timeout=None, stream=True):
+        """Send a request.
+
+        Args:
+            method (str): 'GET', 'PUT', 'POST' or 'DELETE'.
+            url (str): The full URL, query string included.
+            headers (dict): Headers to send.
+            auth (tuple): The (user, token) to log in with.
+            data (dict): More query parameters to add to the URL.
+            timeout: Seconds, or a (connect, read) pair, or None.
+            stream (bool): Leave the body to be read as it's used, rather
+                than reading it all before returning.
+
+        Returns:
+            requests.Response: The response, whatever its status.
+
+        Raises:
+            requests.exceptions.RequestException: If no response came back.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release any connections held."""
+        pass
+
+
+class RequestsTransport(Transport):
+
+    """Send requests with a :class:`requests.Session`."""
+
+    def __init__(self, session=None):
+        """Set up the transport.
+
+        Args:
+            session (requests.Session): Defaults to the shared, pooled
+                session from :func:`get_session`.
+        """
+        self._session = session
+
+    @property
+    def session(self):
+        """The session requests are sent with."""
+        if self._session is None:
+            return get_session()
+        return self._session
+
+    def send(self, method, url, headers=None, auth=None, data=None,
+             timeout=None, stream=True):
+        """Send a request through the session."""
+        call = getattr(self.session, method.lower())
+        return call(url, headers=headers, auth=auth, params=data,
+                    timeout=timeout, stream=stream)
+
+    def close(self):
+        """Close the session it was given; the shared one is left open."""
+        if self._session is not None:
+            self._session.close()
+
+
+class Urllib3Transport(Transport):
+
+    """Send requests straight through a :class:`urllib3.PoolManager`.
+
+    The responses are the same :class:`requests.Response` objects the
+    session gives, but cookies, proxies from the environment, redirects and
+    the rest of the session's per-request work are skipped.
+    """
+
+    def __init__(self, pool=None):
+        """Set up the transport.
+
+        Args:
+            pool (urllib3.PoolManager): Defaults to a new pool sized from
+                ``Config.http_pool_size``.
+        """
+        if pool is None:
+            pool = urllib3.PoolManager(num_pools=Config.http_pool_size,
+                                       maxsize=Config.http_pool_size,
+                                       cert_reqs='CERT_REQUIRED',
+                                       ca_certs=requests.certs.where())
+        self.pool = pool
+        self._adapter = HTTPAdapter()
+
+    def send(self, method, url, headers=None, auth=None, data=None,
+             timeout=None, stream=True):
+        """Send a request through the pool."""
+        request = requests.Request(method, url, headers=headers, auth=auth,
+                                   params=data).prepare()
+        if not Config.http_keep_alive:
+            request.headers['Connection'] = 'close'
+        if isinstance(timeout, tuple):
+            timeout = urllib3.Timeout(connect=timeout[0], read=timeout[1])
+        elif timeout is not None:
+            timeout = urllib3.Timeout(connect=timeout, read=timeout)
+
+        try:
+            raw = self.pool.urlopen(request.method, request.url,
+                                    body=request.body,
+                                    headers=request.headers,
+                                    redirect=False, retries=False,
+                                    preload_content=False,
+                                    decode_content=False, timeout=timeout)
+        except urllib3_exceptions.NewConnectionError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+        except urllib3_exceptions.ConnectTimeoutError as e:
+            raise requests.exceptions.ConnectTimeout(e, request=request)
+        except urllib3_exceptions.ReadTimeoutError as e:
+            raise requests.exceptions.ReadTimeout(e, request=request)
+        except urllib3_exceptions.SSLError as e:
+            raise requests.exceptions.SSLError(e, request=request)
+        except urllib3_exceptions.HTTPError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+
+        response = self._adapter.build_response(request, raw)
+        if not stream:
+            response.content
+        return response
+
+    def close(self):
+        """Close every pooled connection."""
+        self.pool.clear()
+
+
+class MemoryTransport(Transport):
+
+    """Answer requests with a function in this process.
+
+    The function is given the :class:`requests.PreparedRequest` and returns
+    a :class:`requests.Response`, or a ``(status, body)`` or
+    ``(status, body, headers)`` tuple to be made into one by
+    :func:`make_response`. Nothing touches the network, so the whole
+    package can be run against a fake Skytap as fast as the fake answers.
+    """
+
+    def __init__(self, handler):
+        """Set up the transport.
+
+        Args:
+            handler: Called with each request; returns its response.
+        """
+        self.handler = handler
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def send(self, method, url, headers=None, auth=None, data=None,
+             timeout=None, stream=True):
+        """Hand the request to the handler."""
+        request = requests.Request(method, url, headers=headers, auth=auth,
+                                   params=data).prepare()
+        with self._lock:
+            self.requests += 1
+        result = self.handler(request)
+        if isinstance(result, requests.Response):
+            return result
+        return make_response(request, *result)
@@ -58,9 +58,6 @@ the action is completed by Skytap.
     This is by design to conserve API calls as most usage doesn't need or use
     those fields.
 """
-import json
-
-from skytap.framework.ApiClient import ApiClient
 from skytap.framework.Suspendable import Suspendable
 import skytap.framework.Utils as Utils
 from skytap.Labels import Labels
@@ -74,9 +71,9 @@ class Environment(SkytapResource, Suspendable):
 
     """One Skytap environment."""
 
-    def __init__(self, env_json):
+    def __init__(self, env_json, client=None):
         """Init is mainly handled by the parent class."""
-        super(Environment, self).__init__(env_json)
+        super(Environment, self).__init__(env_json, client=client)
 
     def _calculate_custom_data(self):
         """Add custom data.
@@ -87,7 +84,7 @@ class Environment(SkytapResource, Suspendable):
         self.data['running'] = self.runstate == 'running'
         self.data['busy'] = self.runstate == 'busy'
         self.data['suspended'] = self.runstate == 'suspended'
-        self.data['vms'] = Vms(self.vms, self.url)
+        self.data['vms'] = Vms(self.vms, self.url, client=self.api)
 
     def __getattr__(self, key):
         """Load values for anything that doesn't get loaded by default.
@@ -98,27 +95,25 @@ class Environment(SkytapResource, Suspendable):
         if key == 'user_data':
             if key in self.data:
                 return self.data[key]
-            api = ApiClient()
-            user_json = api.rest(self.url + '/user_data.json')
-            self.data['user_data'] = UserData(json.loads(user_json), self.url)
+            user_json = self.api.rest_json(self.url + '/user_data.json')
+            self.data['user_data'] = UserData(user_json, self.url,
+                                              client=self.api)
             return self.user_data
 
         if key == 'notes':
-            api = ApiClient()
-            notes_json = api.rest(self.url + '/notes.json')
-            self.notes = Notes(notes_json, self.url)
+            notes_json = self.api.rest_json(self.url + '/notes.json')
+            self.notes = Notes(notes_json, self.url, client=self.api)
             return self.notes
 
         if key == 'labels':
-            api = ApiClient()
-            labels_json = api.rest(self.url + '/labels')
-            self.labels = Labels(labels_json, self.url)
+            labels_json = self.api.rest_json(self.url + '/labels')
+            self.labels = Labels(labels_json, self.url, client=self.api)
             return self.labels
 
         if key in ('sharing_portals', 'publish_sets'):
-            api = ApiClient()
-            portals_json = api.rest(self.url + '/publish_sets')
-            self.published_sets = SharingPortals(portals_json, self.url)
+            portals_json = self.api.rest_json(self.url + '/publish_sets')
+            self.published_sets = SharingPortals(portals_json, self.url,
+                                                 client=self.api)
             return self.published_sets
 
         return super(Environment, self).__getattr__(key)
@@ -130,8 +125,7 @@ class Environment(SkytapResource, Suspendable):
         """
         Utils.info('Deleting environment: ' +
                    str(self.id) + '(' + self.name + ')')
-        api = ApiClient()
-        response = api.rest(self.url_v1,
-                            {},
-                            'DELETE')
+        response = self.api.rest(self.url_v1,
+                                 {},
+                                 'DELETE')
         return response
@@ -1,7 +1,4 @@
 """Support for Skytap groups."""
-import json
-
-from skytap.framework.ApiClient import ApiClient
 import skytap.framework.Utils as Utils
 from skytap.models.SkytapResource import SkytapResource
 from skytap.Users import Users
@@ -18,9 +15,9 @@ class Group(SkytapResource):
         if key == 'users':
             if key in self.data:
                 return self.data[key]
-            api = ApiClient()
-            user_json = api.rest(self.url)
-            self.data['users'] = Users(json.loads(user_json)['users'])
+            user_json = self.api.rest_json(self.url)
+            self.data['users'] = Users(user_json['users'],
+                                       client=self.api)
             return self.users
 
         return super(Group, self).__getattr__(key)
@@ -30,7 +27,8 @@ class Group(SkytapResource):
             if (isinstance(self.data['users'], list)):
                 if len(self.data['users']) > 0:
                     if isinstance(self.data['users'][0], dict):
-                        self.data['users'] = Users(self.data['users'])
+                        self.data['users'] = Users(self.data['users'],
+                                                   client=self.api)
 
     def remove_user(self, user):
         """Remove a :class:`user` from the group.
@@ -54,10 +52,9 @@ class Group(SkytapResource):
 
         Utils.info('Removing user ' + str(user) +
                    ' from group: ' + self.name)
-        api = ApiClient()
-        user_json = api.rest(self.url + '/users/' + str(user),
-                             {},
-                             'DELETE')
+        self.api.rest_json(self.url + '/users/' + str(user),
+                           {},
+                           'DELETE')
 
         self.refresh()
         return user not in self.users
@@ -85,10 +82,9 @@ class Group(SkytapResource):
             raise TypeError('User must be an int.')
 
         Utils.info('Adding user ' + str(user) + ' to group: ' + self.name)
-        api = ApiClient()
-        user_json = api.rest(self.url + '/users/' + str(user) + '.json',
-                             {},
-                             'PUT')
+        self.api.rest_json(self.url + '/users/' + str(user) + '.json',
+                           {},
+                           'PUT')
         self.refresh()
         return user in self.users
 
@@ -96,8 +92,7 @@ class Group(SkytapResource):
         """Delete the group."""
         Utils.info('Deleting group: ' +
                    str(self.id) + ' (' + self.name + ')')
-        api = ApiClient()
-        response = api.rest(self.url_v1,
-                            {},
-                            'DELETE')
+        response = self.api.rest(self.url_v1,
+                                 {},
+                                 'DELETE')
         return response
@@ -1,7 +1,4 @@
 """Support for an interface resource in Skytap."""
-import json
-
-from skytap.framework.ApiClient import ApiClient  # noqa
 from skytap.models.PublishedServices import PublishedServices  # noqa
 from skytap.models.SkytapResource import SkytapResource  # noqa
 
@@ -10,10 +7,9 @@ class Interface(SkytapResource):
 
     def __getattr__(self, key):
         if key == 'services':
-            api = ApiClient()
-            services_json = json.loads(api.rest(self.url))
+            services_json = self.api.rest_json(self.url)
             self.services = PublishedServices(services_json["services"],
-                                              self.url)
+                                              self.url, client=self.api)
             return self.services
 
         return super(Interface, self).__getattr__(key)
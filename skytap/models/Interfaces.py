@@ -8,14 +8,15 @@ from skytap.models.SkytapGroup import SkytapGroup  # noqa
 class Interfaces(SkytapGroup):
     """A list of Interfaces."""
 
-    def __init__(self, interface_json, vm_url):
+    def __init__(self, interface_json, vm_url, client=None):
         """Create the list of Interfaces.
 
         Args:
             interfaces_json (string): The JSON from Skytap API to build the list
                                       from.
+            client (ApiClient): The client to make calls through.
         """
-        super(Interfaces, self).__init__()
+        super(Interfaces, self).__init__(client=client)
         self.load_list_from_json(interface_json, Interface, vm_url)
         for i in self.data:
             self.data[i].data['url'] = (vm_url + "/interfaces/"
@@ -5,6 +5,6 @@ class Label(SkytapResource):
 
     """One Skytap label."""
 
-    def __init__(self, label_json):
+    def __init__(self, label_json, client=None):
         """Init is mainly handled by the parent class."""
-        super(Label, self).__init__(label_json)
+        super(Label, self).__init__(label_json, client=client)
@@ -6,8 +6,8 @@ class Note(SkytapResource):
 
     """One note."""
 
-    def __init__(self, note_json):
-        super(Note, self).__init__(note_json)
+    def __init__(self, note_json, client=None):
+        super(Note, self).__init__(note_json, client=client)
 
     def __str__(self):
         return self.text
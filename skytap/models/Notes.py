@@ -1,5 +1,5 @@
 """Support for notes that are attached to VMs and environments."""
-from skytap.framework.ApiClient import ApiClient
+from skytap.framework.Tracing import traced
 import skytap.framework.Utils as Utils
 from skytap.models.Note import Note
 from skytap.models.SkytapGroup import SkytapGroup
@@ -9,12 +9,13 @@ class Notes(SkytapGroup):
 
     """A collection of notes."""
 
-    def __init__(self, note_json, env_url):
+    def __init__(self, note_json, env_url, client=None):
         """Build note list."""
-        super(Notes, self).__init__()
+        super(Notes, self).__init__(client=client)
         self.load_list_from_json(note_json, Note)
         self.url = env_url + '/notes.json'
 
+    @traced
     def add(self, note):
         """Add one note.
 
@@ -25,12 +26,12 @@ class Notes(SkytapGroup):
             str: The response from Skytap, typically the new note.
         """
         Utils.info('Adding note: ' + note)
-        api = ApiClient()
         data = {"text": note}
-        response = api.rest(self.url, data, 'POST')
+        response = self.client.rest(self.url, data, 'POST')
         self.refresh()
         return response
 
+    @traced
     def delete(self, note):
         """Delete one note.
 
@@ -48,11 +49,10 @@ class Notes(SkytapGroup):
         if not isinstance(note, Note):
             raise TypeError
         Utils.info('Deleting note ID: ' + str(note.id))
-        api = ApiClient()
         url = self.url.replace('.json', '/' + str(note.id))
-        response = api.rest(url,
-                            {},
-                            'DELETE')
+        response = self.client.rest(url,
+                                    {},
+                                    'DELETE')
         self.refresh()
         return response
 
@@ -112,6 +112,7 @@ class Notes(SkytapGroup):
         self.refresh()
         return count
 
+    @traced
     def refresh(self):
         """Refresh the notes.
 
@@ -124,6 +125,5 @@ class Notes(SkytapGroup):
         """
         if len(self.url) == 0:
             return KeyError
-        api = ApiClient()
-        note_json = api.rest(self.url)
+        note_json = self.client.rest_json(self.url, fresh=True)
         self.load_list_from_json(note_json, Note)
@@ -7,13 +7,13 @@ class Project(SkytapResource):
 
     """One Skytap project."""
 
-    def __init__(self, project_json):
+    def __init__(self, project_json, client=None):
         """Build one Skytap project."""
-        super(Project, self).__init__(project_json)
+        super(Project, self).__init__(project_json, client=client)
 
     def _calculate_custom_data(self):
         """Make the list of users into a Users list."""
-        self.data['users'] = Users(self.users)
+        self.data['users'] = Users(self.users, client=self.api)
         for key in self.users.keys():
             if self.users[key].url == self.owner_url:
                 self.owner_name = self.users[key].name
@@ -8,14 +8,15 @@ from skytap.models.PublishedService import PublishedService  # noqa
 class PublishedServices(SkytapGroup):
     """A list of Published Services."""
 
-    def __init__(self, service_json, interface_url):
+    def __init__(self, service_json, interface_url, client=None):
         """Create the list of Published Services.
 
         Args:
             services_json (string): The JSON from Skytap API to build the list
                                     from.
+            client (ApiClient): The client to make calls through.
         """
-        super(PublishedServices, self).__init__()
+        super(PublishedServices, self).__init__(client=client)
         self.load_list_from_json(service_json, PublishedService, interface_url)
         for s in self.data:
             self.data[s].data["url"] = (interface_url + "/services/"
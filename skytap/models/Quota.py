@@ -8,13 +8,14 @@ class Quota(SkytapResource):
 
     """One piece of quota information."""
 
-    def __init__(self, quota_json):
+    def __init__(self, quota_json, client=None):
         """Build the quota object.
 
         Args:
             quota_json (list): The quota data.
+            client (ApiClient): The client to make calls through.
         """
-        super(Quota, self).__init__(quota_json)
+        super(Quota, self).__init__(quota_json, client=client)
 
     def _calculate_custom_data(self):
         """Create a percentage used and time object, if applicable."""
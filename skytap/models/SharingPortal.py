@@ -42,8 +42,8 @@ class SharingPortal(NewSTResource, SkytapResource):
     _writable_fields = SHARING_PORTAL_WRITABLE_FIELDS
     _field_defs = SHARING_PORTAL_FIELD_DEFS
 
-    def __init__(self, portal_json):
-        super(SharingPortal, self).__init__(portal_json)
+    def __init__(self, portal_json, client=None):
+        super(SharingPortal, self).__init__(portal_json, client=client)
 
 
         self._new_convert_data_elements()
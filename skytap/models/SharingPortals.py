@@ -1,5 +1,5 @@
 """Support for sharing portals (were called published sets) that are attached to VMs and environments."""
-from skytap.framework.ApiClient import ApiClient
+from skytap.framework.Tracing import traced
 import skytap.framework.Utils as Utils
 from skytap.models.SharingPortal import SharingPortal
 from skytap.models.SkytapGroup import SkytapGroup
@@ -9,9 +9,9 @@ class SharingPortals(SkytapGroup):
 
     """A collection of notes."""
 
-    def __init__(self, portal_json, env_url):
+    def __init__(self, portal_json, env_url, client=None):
         """Build Portal list."""
-        super(SharingPortals, self).__init__()
+        super(SharingPortals, self).__init__(client=client)
         self.load_list_from_json(portal_json, SharingPortal)
         self.url = env_url + '/published_sets.json'
 
@@ -25,9 +25,8 @@ class SharingPortals(SkytapGroup):
             str: The response from Skytap, typically the new note.
         """
         Utils.info('Adding note: ' + note)
-        api = ApiClient()
         data = {"text": note}
-        response = api.rest(self.url, data, 'POST')
+        response = self.client.rest(self.url, data, 'POST')
         self.refresh()
         return response
 
@@ -57,11 +56,10 @@ class SharingPortals(SkytapGroup):
             raise TypeError
 
         Utils.info('Deleting portal ID: ' + del_id)
-        api = ApiClient()
         url = self.url.replace('.json', '/' + del_id)
-        response = api.rest(url,
-                            {},
-                            'DELETE')
+        response = self.client.rest(url,
+                                    {},
+                                    'DELETE')
         self.refresh()
         return response
 
@@ -81,6 +79,7 @@ class SharingPortals(SkytapGroup):
         self.refresh()
         return count
 
+    @traced
     def refresh(self):
         """Refresh the portals.
 
@@ -93,6 +92,5 @@ class SharingPortals(SkytapGroup):
         """
         if len(self.url) == 0:
             return KeyError
-        api = ApiClient()
-        portal_json = api.rest(self.url)
+        portal_json = self.client.rest_json(self.url, fresh=True)
         self.load_list_from_json(portal_json, SharingPortal)
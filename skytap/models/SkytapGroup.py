@@ -1,23 +1,76 @@
 """Base object to handle groups of Skytap objects."""
 import argparse
+import inspect
+import itertools
 import json
 import six
 
 from skytap.framework.ApiClient import ApiClient
 from skytap.framework.Json import SkytapJsonEncoder
+from skytap.framework.JsonStream import StreamedPage
+from skytap.framework.Tracing import traced
+
+
+_takes_client_cache = {}
+
+
+def _takes_client(target):
+    """Return True if a resource type can be built with ``client=``.
+
+    Worked out once per type, not for every item loaded.
+    """
+    takes = _takes_client_cache.get(target)
+    if takes is None:
+        takes = _takes_client_cache[target] = _inspect_takes_client(target)
+    return takes
+
+
+def _inspect_takes_client(target):
+    try:
+        if six.PY2:
+            spec = inspect.getargspec(target.__init__)
+            return 'client' in spec.args or spec.keywords is not None
+        params = inspect.signature(target).parameters
+    except (TypeError, ValueError):
+        return True
+    return 'client' in params or any(p.kind == p.VAR_KEYWORD
+                                     for p in params.values())
 
 
 class SkytapGroup(ApiClient, six.Iterator):
 
     """Base object for use with Skytap resource groups."""
 
-    def __init__(self):
-        super(SkytapGroup, self).__init__()
+    #: Where a top-level group loads its list from, with what parameters,
+    #: and the resource type each item becomes. Used by :func:`aload`.
+    _list_url = None
+    _list_params = None
+    _list_target = None
+
+    def __init__(self, client=None):
+        """Set up an empty group.
+
+        Groups take ``client`` as their last argument; pass it by keyword.
+
+        Args:
+            client (ApiClient): The client this group and the resources it
+                builds make their calls through. The group hands any client
+                calls made on it (``rest()``, ``last_status``...) to this
+                client instead of setting up one of its own. If not given,
+                the group is its own client.
+        """
+        if client is None:
+            super(SkytapGroup, self).__init__()
+            client = self
+        self.client = client
+        self._source_page = None
         self.data = {}
         self.itercount = 0
         self.search_fields = ['name']
 
-    def load_list_from_api(self, url, target, params=None):
+    @traced
+    def load_list_from_api(self, url, target, params=None, page_size=None,
+                           parallel=None, fresh=False):
         """Load something from the Skytap API and fill this object.
 
         .. note: This should rarely be called by anything but a child object,
@@ -28,6 +81,16 @@ class SkytapGroup(ApiClient, six.Iterator):
             target: The :class:`~skytap.models.SkytapResource`
                 type to load (For example: 'User')
             params (dict): Any URL parameters to add to URL.
+            page_size (int): Items to request per page. See
+                :func:`~skytap.framework.ApiClient.ApiClient.iter_pages`.
+            parallel (int): Pages to fetch at once after the first.
+            fresh (bool): Don't load from the client's response cache.
+
+        Resources are built one by one as the items of each page are
+        parsed off the wire, so a huge list never has to be held whole (see
+        :mod:`skytap.framework.JsonStream`). If the client hands back the
+        same first page we were last loaded from (a ``304 Not Modified`` or
+        a cache hit), the group is left as it is.
 
         This should look like, in the child object::
 
@@ -36,7 +99,26 @@ class SkytapGroup(ApiClient, six.Iterator):
         """
         if params is None:
             params = {}
-        self.load_list_from_json(self.rest(url, params), target, url)
+        pages = self.client.iter_pages(url, params, page_size, parallel,
+                                       stream=True, fresh=fresh)
+        first_page = next(pages)
+        if (first_page is self._source_page and
+                getattr(self, 'target', None) is target):
+            pages.close()
+            self.params = params
+            return
+
+        self._start_load(target, url)
+        self._source_page = None
+        if isinstance(first_page, list):
+            self._source_page = first_page
+        try:
+            for page in itertools.chain([first_page], pages):
+                if not isinstance(page, (list, StreamedPage)):
+                    raise TypeError
+                self._load_items(page, target)
+        finally:
+            pages.close()
         self.params = params
 
     def load_list_from_json(self, json_list, target, url=None, params=None):
@@ -54,37 +136,84 @@ class SkytapGroup(ApiClient, six.Iterator):
             self.load_list_from_json(json, Project)
 
         """
-        self.data = {}
-        self.target = target
+        self._start_load(target, url)
+        self._source_page = None
 
         if params:
             self.params = params
 
-        if url is not None:
-            self.url = url
-            if '/v2/' in self.url:
-                self.url_v1 = self.url.replace('/v2/', '/')
-                self.url_v2 = self.url
-            else:
-                self.url_v1 = self.url
-                self.url_v2 = None
-
         if isinstance(json_list, str):
-            self.json_from_load = json.loads(json_list)
-        elif isinstance(json_list, list):
-            self.json_from_load = json_list
-        else:
+            json_list = json.loads(json_list)
+        elif not isinstance(json_list, list):
             raise TypeError
-        for j in self.json_from_load:
+        self._load_items(json_list, target)
+
+    def _start_load(self, target, url=None):
+        """Empty the group before (re)loading it."""
+        self.data = {}
+        self.target = target
+
+        if url is not None:
+            self._set_url(url)
+
+    def _set_url(self, url):
+        """Set where the group is loaded (and refreshed) from."""
+        self.url = url
+        if '/v2/' in self.url:
+            self.url_v1 = self.url.replace('/v2/', '/')
+            self.url_v2 = self.url
+        else:
+            self.url_v1 = self.url
+            self.url_v2 = None
+
+    def _load_items(self, json_list, target):
+        """Build resources from a list of JSON items and add them.
+
+        Resource types written before clients could be passed in (ones
+        that don't take a ``client`` argument) are built without one, and
+        use the default client.
+        """
+        kwargs = {'client': self.client} if _takes_client(target) else {}
+        for j in json_list:
             # prefer an int for the ID since that's the most common and
             # easiest to work with, but some things (quotas) have string
             # ids, so we want to leave those alone. A given resource/group
             # will have to handle non-int keys differently if there's a
             # case where that's a problem.
             try:
-                self.data[int(j['id'])] = target(j)
+                self.data[int(j['id'])] = target(j, **kwargs)
             except ValueError:
-                self.data[j['id']] = target(j)
+                self.data[j['id']] = target(j, **kwargs)
+
+    @classmethod
+    def aload(cls, async_client=None, client=None, page_size=None):
+        """Load the group with asyncio instead of blocking.
+
+        Returns a coroutine; await it from inside an event loop:
+
+        .. code-block:: python
+
+            envs = await skytap.Environments.aload()
+
+        Any number of groups can be loaded at once on one loop (with
+        ``asyncio.gather``), their requests sharing the async client's
+        concurrency limit.
+
+        Args:
+            async_client (~skytap.framework.AsyncApiClient.AsyncApiClient):
+                The client to fetch the list with. A new one is made if
+                not given.
+            client (ApiClient): The client the loaded group and its
+                resources use for their own (blocking) calls later on.
+            page_size (int): Items to request per page.
+
+        Returns:
+            A coroutine that finishes with the loaded group.
+        """
+        if cls._list_url is None:
+            raise TypeError(cls.__name__ + ' cannot be loaded on its own.')
+        from skytap.framework.AsyncApiClient import load_group
+        return load_group(cls, async_client, client, page_size)
 
     def first(self):
         """Return the first record in the list.
@@ -130,11 +259,13 @@ class SkytapGroup(ApiClient, six.Iterator):
                     found.append(test)
         return found
 
+    @traced
     def refresh(self):
-        """Reload our data."""
+        """Reload our data, skipping the response cache."""
         self.load_list_from_api(self.url,
                                 self.target,
-                                self.params)
+                                self.params,
+                                fresh=True)
 
     def main(self, argv):
         """What to do when called from the command line.
@@ -181,6 +312,14 @@ class SkytapGroup(ApiClient, six.Iterator):
             json_return.append(json.loads(self.data[item].json()))
         return json_return
 
+    def __getattr__(self, key):
+        # Only reached for what the group doesn't have itself: with a client
+        # passed in, that's the state ApiClient.__init__ would have set up.
+        client = self.__dict__.get('client')
+        if client is None or client is self:
+            raise AttributeError(key)
+        return getattr(client, key)
+
     def __len__(self):
         return len(self.data)
 
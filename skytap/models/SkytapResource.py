@@ -1,8 +1,9 @@
 """Base class for all Skytap Resources."""
 import json
 
-from skytap.framework.ApiClient import ApiClient  # noqa
+from skytap.framework.ApiClient import get_default_client  # noqa
 from skytap.framework.Json import SkytapJsonEncoder  # noqa
+from skytap.framework.Tracing import traced  # noqa
 import skytap.framework.Utils as Utils  # noqa
 
 bool_fix = {'true': True, 'True': True, 'TRUE': True, 'Yes': True, True: True,
@@ -32,9 +33,19 @@ class SkytapResource(object):
     #       if the url_ext is not defined, we will look for the _ext_url property of the model, then try name of the model.
     _field_aliases = {}
 
-    def __init__(self, initial_json):
+    def __init__(self, initial_json, client=None):
+        """Build the resource from its JSON.
+
+        Args:
+            initial_json (dict): The resource data from Skytap.
+            client (ApiClient): The client any follow-up calls for this
+                resource (and the sub-models it creates) go through. If not
+                given, the process-wide default client is used.
+        """
         super(SkytapResource, self).__init__()
 
+        self.client = client
+        self._source_json = initial_json
         self.data = {}
         self.data["id"] = 0
         for k in initial_json.keys():
@@ -85,6 +96,13 @@ class SkytapResource(object):
         self._convert_data_elements()
         self._calculate_custom_data()
 
+    @property
+    def api(self):
+        """The :class:`~skytap.framework.ApiClient.ApiClient` for this resource."""
+        if self.client is None:
+            return get_default_client()
+        return self.client
+
     def _calculate_custom_data(self):
         """Used so objects can create and calculate new data elements."""
         pass
@@ -135,22 +153,28 @@ class SkytapResource(object):
         else:
             return current_value
 
+    @traced
     def refresh(self):
-        """Refresh the data in our object, if we have a URL to pull from."""
+        """Refresh the data in our object, if we have a URL to pull from.
+
+        The response cache is skipped, so this sees changes made since the
+        last GET. If the client hands back the same body we were built from
+        (a ``304 Not Modified``), there's nothing to rebuild.
+        """
         if 'url' not in self.data:
             return KeyError
-        api = ApiClient()
-        env_json = api.rest(self.url)
-        self.__init__(json.loads(env_json))
+        env_json = self.api.rest_json(self.url, fresh=True)
+        if env_json is self._source_json:
+            return
+        self.__init__(env_json, client=self.client)
 
     def __getattr__(self, key):
-        key = self._field_defs.get(key, key)
+        key = self._field_aliases.get(key, key)
 
         if key in self._sub_models:
-            api = ApiClient()
-            tmp_json = api.rest(self.url + self._sub_models[key]['ext_url'])
+            tmp_json = self.api.rest_json(self.url + self._sub_models[key]['ext_url'])
             tmp_obj = self._sub_models[key]['model']
-            tmp_ret = tmp_obj(tmp_json, self.url)
+            tmp_ret = tmp_obj(tmp_json, self.url, client=self.api)
             return tmp_ret
 
         if key not in self.data:
@@ -192,6 +216,10 @@ class SkytapResource(object):
                 if '.' in field_name:
                     fn1, fn2 = field_name.split('.', 1)
                     try:
+                        # copy the sub-dicts before changing them; they're
+                        # shared with self.data.
+                        tmp_ret_dict[fn1] = [dict(sub_dict) if isinstance(sub_dict, dict) else sub_dict
+                                             for sub_dict in tmp_ret_dict[fn1]]
                         for sub_field_index in range(len(tmp_ret_dict[fn1])):
                             tmp_value = self._get_for_json(
                                 field_name=fn2,
@@ -217,17 +245,21 @@ class SkytapResource(object):
             if self._block_field(tmp_ret_dict[key], key, only_writable, skip_none):
                 del tmp_ret_dict[key]
             else:
+                # build filtered copies; the nested lists and dicts are
+                # shared with self.data (and maybe with cached responses).
                 if isinstance(tmp_ret_dict[key], (list, tuple)):
-                    for index, item in enumerate(tmp_ret_dict[key]):
-                        if self._block_field(tmp_ret_dict[key][index][item], key, only_writable, skip_none, item):
-                            del tmp_ret_dict[key][index][item]
+                    tmp_ret_dict[key] = [self._filter_fields(sub_dict, key, only_writable, skip_none)
+                                         if isinstance(sub_dict, dict) else sub_dict
+                                         for sub_dict in tmp_ret_dict[key]]
 
                 elif isinstance(tmp_ret_dict[key], dict):
-                    for item in list(tmp_ret_dict[key]):
-                        if self._block_field(tmp_ret_dict[key][item], key, only_writable, skip_none, item):
-                            del tmp_ret_dict[key][item]
+                    tmp_ret_dict[key] = self._filter_fields(tmp_ret_dict[key], key, only_writable, skip_none)
         return tmp_ret_dict
 
+    def _filter_fields(self, sub_dict, fieldname, only_writable, skip_none):
+        return dict((item, value) for item, value in sub_dict.items()
+                    if not self._block_field(value, fieldname, only_writable, skip_none, item))
+
     def _block_field(self, value, fieldname, only_writable, skip_none, sub_fieldname=None):
         if sub_fieldname is not None:
             fieldname = '%s.%s' % (fieldname, sub_fieldname)
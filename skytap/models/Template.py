@@ -1,7 +1,4 @@
 """Support for an Template resource in Skytap."""
-import json
-
-from skytap.framework.ApiClient import ApiClient
 from skytap.models.Notes import Notes
 from skytap.models.SkytapResource import SkytapResource
 from skytap.models.UserData import UserData
@@ -12,16 +9,16 @@ class Template(SkytapResource):
 
     """One Skytap template."""
 
-    def __init__(self, tmp_json):
+    def __init__(self, tmp_json, client=None):
         """Init is mainly handled by the parent class."""
-        super(Template, self).__init__(tmp_json)
+        super(Template, self).__init__(tmp_json, client=client)
 
     def _calculate_custom_data(self):
         """Add custom data.
 
         Convert the list of VMs into a Vms object group.
         """
-        self.data['vms'] = Vms(self.vms, self.url)
+        self.data['vms'] = Vms(self.vms, self.url, client=self.api)
 
     def __getattr__(self, key):
         """Load values for anything that doesn't get loaded by default.
@@ -32,9 +29,9 @@ class Template(SkytapResource):
         if key == 'user_data':
             if key in self.data:
                 return self.data[key]
-            api = ApiClient()
-            user_json = api.rest(self.url + '/user_data.json')
-            self.user_data = UserData(json.loads(user_json))
+            user_json = self.api.rest_json(self.url + '/user_data.json')
+            self.user_data = UserData(user_json, self.url,
+                                      client=self.api)
             return self.user_data
 
         return super(Template, self).__getattr__(key)
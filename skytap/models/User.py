@@ -1,12 +1,11 @@
 from skytap.Environments import Environments
-from skytap.framework.ApiClient import ApiClient
 import skytap.framework.Utils as Utils
 from skytap.models.SkytapResource import SkytapResource
 
 
 class User(SkytapResource):
-    def __init__(self, user_json):
-        super(User, self).__init__(user_json)
+    def __init__(self, user_json, client=None):
+        super(User, self).__init__(user_json, client=client)
 
     def _calculate_custom_data(self):
         if 'sso_enabled' in self.data:
@@ -21,7 +20,7 @@ class User(SkytapResource):
             if (isinstance(self.data['configurations'], list)):
                 if len(self.data['configurations']) > 0:
                     if isinstance(self.data['configurations'][0], dict):
-                        self.data['configurations'] = Environments(self.data['configurations'])  # noqa
+                        self.data['configurations'] = Environments(self.data['configurations'], client=self.api)  # noqa
 
     def delete(self, transfer_user):
         """Delete the user."""
@@ -32,11 +31,9 @@ class User(SkytapResource):
         Utils.info('Deleting user: ' +
                    str(self.id) + ' (' + self.name + ') and transferring ' +
                    'resources to user id: ' + str(transfer_user))
-        api = ApiClient()
-
         transfer = {"transfer_user_id": str(transfer_user)}
 
-        response = api.rest(self.url,
-                            transfer,
-                            'DELETE')
+        response = self.api.rest(self.url,
+                                 transfer,
+                                 'DELETE')
         return response
@@ -1,13 +1,12 @@
 import json
 
-from skytap.framework.ApiClient import ApiClient
 import skytap.framework.Utils as Utils
 from skytap.models.SkytapResource import SkytapResource
 
 
 class UserData(SkytapResource):
-    def __init__(self, contents, env_url):
-        super(UserData, self).__init__(contents)
+    def __init__(self, contents, env_url, client=None):
+        super(UserData, self).__init__(contents, client=client)
         self.url = env_url + '/user_data.json'
 
     def __str__(self):
@@ -37,10 +36,9 @@ class UserData(SkytapResource):
         if add_key:
             Utils.info('Adding key \"' + key + '\" with value \"'
                        '' + value + '\"')
-            api = ApiClient()
             new_content = "" + key + ": " + value + "\n" + self.contents
             data = {"contents": new_content}
-            response = api.rest(self.url, data, 'POST')
+            response = self.api.rest(self.url, data, 'POST')
             self.data[key] = value
             self.refresh()
             return response
@@ -75,9 +73,8 @@ class UserData(SkytapResource):
 
         if del_key:
             Utils.info('Deleting key \"' + key + '\".')
-            api = ApiClient()
             data = {"contents": "" + new_content}
-            response = api.rest(self.url, data, 'POST')
+            response = self.api.rest(self.url, data, 'POST')
             self.refresh()
             return response
         else:
@@ -123,9 +120,8 @@ class UserData(SkytapResource):
             new_content += (text.strip() + "\n")
 
         Utils.info('Adding line: \"' + text + '\"')
-        api = ApiClient()
         data = {"contents": new_content}
-        response = api.rest(self.url, data, 'POST')
+        response = self.api.rest(self.url, data, 'POST')
         self.refresh()
         return response
 
@@ -153,9 +149,8 @@ class UserData(SkytapResource):
                         line_found = True
 
         Utils.info('Removing line: \"' + str(line) + '\"')
-        api = ApiClient()
         data = {"contents": new_content.lstrip()}
-        response = api.rest(self.url, data, 'POST')
+        response = self.api.rest(self.url, data, 'POST')
         self.refresh()
         return response
 
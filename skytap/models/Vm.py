@@ -1,7 +1,4 @@
 """Support for a VM resource in Skytap."""
-import json
-
-from skytap.framework.ApiClient import ApiClient
 from skytap.framework.Suspendable import Suspendable
 import skytap.framework.Utils as Utils
 from skytap.models.Interfaces import Interfaces
@@ -15,9 +12,9 @@ class Vm(SkytapResource, Suspendable):
 
     """One Skytap VM."""
 
-    def __init__(self, vm_json):
+    def __init__(self, vm_json, client=None):
         """Init is mainly handled by the parent class."""
-        super(Vm, self).__init__(vm_json)
+        super(Vm, self).__init__(vm_json, client=client)
 
     def _calculate_custom_data(self):
         """Add custom data.
@@ -38,30 +35,27 @@ class Vm(SkytapResource, Suspendable):
         if key == 'user_data':
             if key in self.data:
                 return self.data[key]
-            api = ApiClient()
-            user_json = api.rest(self.url + '/user_data.json')
-            self.user_data = UserData(json.loads(user_json), self.url)
+            user_json = self.api.rest_json(self.url + '/user_data.json')
+            self.user_data = UserData(user_json, self.url,
+                                      client=self.api)
             return self.user_data
 
         if key == 'notes':
-            api = ApiClient()
-            notes_json = api.rest(self.url + '/notes.json')
-            self.notes = Notes(notes_json, self.url)
+            notes_json = self.api.rest_json(self.url + '/notes.json')
+            self.notes = Notes(notes_json, self.url, client=self.api)
             return self.notes
 
         if key == 'interfaces':
             if key in self.data:
                 return self.data[key]
-            api = ApiClient()
-            interfaces_json = json.loads(api.rest(self.url))
+            interfaces_json = self.api.rest_json(self.url)
             self.interfaces = Interfaces(interfaces_json["interfaces"],
-                                         self.url)
+                                         self.url, client=self.api)
             return self.interfaces
 
         if key == 'labels':
-            api = ApiClient()
-            labels_json = api.rest(self.url + '/labels')
-            self.labels = Labels(labels_json, self.url)
+            labels_json = self.api.rest_json(self.url + '/labels')
+            self.labels = Labels(labels_json, self.url, client=self.api)
             return self.labels
 
         return super(Vm, self).__getattr__(key)
@@ -72,8 +66,7 @@ class Vm(SkytapResource, Suspendable):
         In general, it'd seem wise not to do this very often.
         """
         Utils.info('Deleting VM: ' + str(self.id) + '(' + self.name + ')')
-        api = ApiClient()
-        response = api.rest(self.url,
-                            {},
-                            'DELETE')
+        response = self.api.rest(self.url,
+                                 {},
+                                 'DELETE')
         return response
@@ -8,16 +8,17 @@ from skytap.models.Vm import Vm
 class Vms(SkytapGroup):
     """A list of VMs."""
 
-    def __init__(self, vms_json, env_url):
+    def __init__(self, vms_json, env_url, client=None):
         """Create the list of VMs.
 
         Args:
             vms_json (string): The JSON from Skytap API to build the list from.
             parent (Environment or Template): The parent object -
                                               environment or template.
+            client (ApiClient): The client to make calls through.
 
         """
-        super(Vms, self).__init__()
+        super(Vms, self).__init__(client=client)
         self.load_list_from_json(vms_json, Vm, env_url)
         for v in self.data:
             self.data[v].data['url'] = (env_url + '/vms/'
@@ -4,8 +4,8 @@ from skytap.models.SkytapResource import SkytapResource
 
 
 class Vpn(SkytapResource):
-    def __init__(self, vpn_json):
-        super(Vpn, self).__init__(vpn_json)
+    def __init__(self, vpn_json, client=None):
+        super(Vpn, self).__init__(vpn_json, client=client)
 
     def _calculate_custom_data(self):
         self.active = self.status == 'active'
@@ -0,0 +1,116 @@
+"""Tests of the asyncio client and async group loading.
+
+This module needs Python 3.5 or later to import, so it isn't named as a
+test module; testAsyncApiClient runs it where it can.
+"""
+import asyncio
+import json
+import sys
+from unittest import TestCase
+
+import requests
+from six.moves.urllib.parse import parse_qs, urlparse
+
+sys.path.append('..')
+from skytap.Environments import Environments  # noqa
+from skytap.framework.ApiExceptions import Skytap404NotFoundError  # noqa
+from skytap.framework.AsyncApiClient import AsyncApiClient  # noqa
+from skytap.framework.Retry import RetryBudget, RetryPolicy, RetryRule  # noqa
+
+
+class PagingTransport(object):
+    """An async transport serving a paginated list of ``total`` items."""
+
+    def __init__(self, total=25, statuses=None):
+        self.total = total
+        self.statuses = list(statuses or [])
+        self.in_flight = 0
+        self.peak = 0
+        self.urls = []
+
+    async def send(self, method, url, headers=None, auth=None, data=None,
+                   timeout=None):
+        self.urls.append(url)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+
+        response = requests.Response()
+        response.url = url
+        response.request = requests.Request(method, url).prepare()
+        if self.statuses:
+            response.status_code = self.statuses.pop(0)
+            response._content = b'{}'
+            return response
+
+        query = parse_qs(urlparse(url).query)
+        offset = int(query.get('offset', [0])[0])
+        count = int(query.get('count', [10])[0])
+        end = min(offset + count, self.total)
+        items = [{'id': i, 'name': 'env_' + str(i), 'runstate': 'running',
+                  'url': 'https://cloud.skytap.com/v2/configurations/' +
+                  str(i), 'vms': []}
+                 for i in range(offset, end)]
+        response.status_code = 200
+        response._content = json.dumps(items).encode('utf-8')
+        response.headers['content-range'] = ('items ' + str(offset) + '-' +
+                                             str(end - 1) + '/' +
+                                             str(self.total))
+        return response
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def quick_policy():
+    rules = {429: RetryRule(base=0, cap=0)}
+    return RetryPolicy(rules=rules, budget=RetryBudget(ratio=1))
+
+
+class TestAsyncApiClient(TestCase):
+
+    def test_joins_pages(self):
+        transport = PagingTransport(total=25)
+        api = AsyncApiClient(transport=transport)
+        result = run(api.rest_json('/v2/configurations'))
+        self.assertEqual([item['id'] for item in result], list(range(25)))
+        self.assertEqual(len(transport.urls), 3)
+
+    def test_concurrency_is_bounded(self):
+        transport = PagingTransport(total=200)
+        api = AsyncApiClient(transport=transport, max_concurrency=3)
+        pages = run(api.get_pages('/v2/configurations', page_size=5))
+        self.assertEqual(len(pages), 40)
+        self.assertLessEqual(transport.peak, 3)
+        self.assertGreater(transport.peak, 1)
+
+    def test_retries(self):
+        transport = PagingTransport(total=3, statuses=[429, 429])
+        api = AsyncApiClient(transport=transport, retry_policy=quick_policy())
+        self.assertEqual(len(run(api.rest_json('/v2/configurations'))), 3)
+        self.assertEqual(len(transport.urls), 3)
+
+    def test_errors(self):
+        transport = PagingTransport(statuses=[404])
+        api = AsyncApiClient(transport=transport)
+        self.assertRaises(Skytap404NotFoundError, run,
+                          api.rest_json('/v2/configurations/1'))
+
+
+class TestAsyncLoad(TestCase):
+
+    def test_aload(self):
+        transport = PagingTransport(total=12)
+        api = AsyncApiClient(transport=transport)
+        envs = run(Environments.aload(api))
+        self.assertIsInstance(envs, Environments)
+        self.assertEqual(len(envs), 12)
+        self.assertEqual(envs[3].name, 'env_3')
+        self.assertEqual(envs.url, '/v2/configurations')
+        self.assertIn('scope=company', transport.urls[0])
@@ -1,9 +1,19 @@
 """Test Skytap general API client."""
+import gzip
+import io
 import json
+import requests
 import sys
+import threading
+
+from six.moves.urllib.parse import parse_qs, urlparse
+from urllib3.response import HTTPResponse
 
 sys.path.append('..')
+from skytap.framework import ApiClient as ApiClientModule  # noqa
 from skytap.framework.ApiClient import ApiClient  # noqa
+from skytap.framework.Config import Config  # noqa
+from skytap.Labels import Labels  # noqa
 
 
 class TestApiClient(object):
@@ -16,3 +26,190 @@ class TestApiClient(object):
         response = self.api_client.rest('/v2/configurations')
         json_check = json.loads(response)
         assert len(json_check) > 0, "JSON didn't result in any rows"
+
+
+def test_clients_share_pooled_session():
+    """Every client should reuse the one keep-alive session."""
+    fixture, Config.api_is_test_fixture = Config.api_is_test_fixture, False
+    try:
+        first = ApiClient()
+        second = ApiClient()
+    finally:
+        Config.api_is_test_fixture = fixture
+    assert first.session is second.session
+    assert first.session.get_adapter('https://cloud.skytap.com') is not None
+
+
+class PagingSession(requests.Session):
+    """A requests.Session that serves a paged list instead of the network."""
+
+    def __init__(self, total, default_count=10):
+        super(PagingSession, self).__init__()
+        self.total = total
+        self.default_count = default_count
+        self.urls = []
+        self.lock = threading.Lock()
+
+    def get(self, url, headers=None, auth=None, params=None, **kwargs):
+        with self.lock:
+            self.urls.append(url)
+        query = parse_qs(urlparse(url).query)
+        offset = int(query.get('offset', [0])[0])
+        count = int(query.get('count', [self.default_count])[0])
+        total = self.total_for(url)
+        items = [{'id': i, 'name': 'env_%d' % i}
+                 for i in range(offset, min(offset + count, total))]
+        headers = {}
+        if total > self.default_count:
+            headers['content-range'] = 'items %d-%d/%d' % (
+                offset, offset + len(items) - 1, total)
+        return make_response(200, json.dumps(items), headers, url)
+
+    def total_for(self, url):
+        return self.total
+
+
+def make_response(status, text, headers=None, url='https://cloud.skytap.com/'):
+    """Build a requests.Response without touching the network."""
+    response = requests.Response()
+    response.status_code = status
+    response._content = text.encode('utf-8')
+    response.headers.update(headers or {})
+    response.url = url
+    response.request = requests.Request('GET', url).prepare()
+    return response
+
+
+def test_iter_pages_yields_each_page():
+    session = PagingSession(25)
+    api = ApiClient(session=session)
+    pages = list(api.iter_pages('/v2/configurations', page_size=10))
+    assert [len(p) for p in pages] == [10, 10, 5]
+    assert len(session.urls) == 3
+
+
+def test_iter_pages_parallel_keeps_order():
+    session = PagingSession(95)
+    api = ApiClient(session=session)
+    pages = api.iter_pages('/v2/configurations', page_size=10, parallel=4)
+    ids = [item['id'] for page in pages for item in page]
+    assert ids == list(range(95))
+
+
+def test_rest_joins_pages_without_refetching():
+    session = PagingSession(25)
+    api = ApiClient(session=session)
+    result = json.loads(api.rest('/v2/configurations'))
+    assert len(result) == 25
+    assert len(session.urls) == 3
+    assert 'count=25' not in ' '.join(session.urls)
+
+
+def test_rest_json_returns_decoded_objects():
+    api = ApiClient(session=PagingSession(25))
+    result = api.rest_json('/v2/configurations')
+    assert isinstance(result, list)
+    assert result[0] == {'id': 0, 'name': 'env_0'}
+    assert json.loads(api.rest('/v2/configurations')) == result
+
+
+def test_group_loads_from_pages():
+    session = PagingSession(25)
+    labels = Labels(client=ApiClient(session=session))
+    assert len(labels) == 25
+    assert labels[24].name == 'env_24'
+    assert 'offset' not in labels.params
+
+
+def test_request_returns_its_own_metadata():
+    api = ApiClient(session=PagingSession(25))
+    resp = api.request('/v2/configurations', {'count': 10})
+    assert resp.status_code == 200
+    assert resp.range == (0, 25)
+    assert resp.total == 25
+    assert resp.attempts == 1
+    assert len(resp.json()) == 10
+    assert api.last_response is resp
+    assert api.last_range == '25'
+
+
+class SizedListSession(PagingSession):
+    """Serves /lists/<n> as a paged list of n items."""
+
+    def __init__(self):
+        super(SizedListSession, self).__init__(0)
+
+    def total_for(self, url):
+        return int(urlparse(url).path.split('/')[-1])
+
+
+def test_shared_client_is_thread_safe():
+    """Threads sharing a client never see each other's responses."""
+    api = ApiClient(session=SizedListSession())
+    api.single_flight = None
+    errors = []
+
+    def worker(total):
+        for _ in range(5):
+            result = api.rest_json('/lists/%d' % total)
+            if len(result) != total:
+                errors.append((total, len(result)))
+            if api.last_range != (str(total) if total > 10 else 0):
+                errors.append((total, api.last_range))
+
+    threads = [threading.Thread(target=worker, args=(total,))
+               for total in (5, 25, 45, 8, 95)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert api.last_response is None
+
+
+class GzipSession(requests.Session):
+    """Serves a gzipped JSON body off a (fake) socket, like Skytap would."""
+
+    def __init__(self, items):
+        super(GzipSession, self).__init__()
+        body = io.BytesIO()
+        with gzip.GzipFile(fileobj=body, mode='wb') as f:
+            f.write(json.dumps(items).encode('utf-8'))
+        self.body = body.getvalue()
+        self.sent_headers = None
+
+    def get(self, url, headers=None, auth=None, params=None, **kwargs):
+        self.sent_headers = headers
+        raw = HTTPResponse(body=io.BytesIO(self.body),
+                           headers={'Content-Encoding': 'gzip'},
+                           status=200, preload_content=False)
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = raw
+        response.headers.update(raw.headers)
+        response.url = url
+        return response
+
+
+def test_gzip_body_is_streamed_and_not_kept():
+    items = [{'id': i, 'name': 'env_%d' % i} for i in range(2000)]
+    session = GzipSession(items)
+    api = ApiClient(session=session)
+    resp = api.request('/v2/configurations')
+    assert 'gzip' in session.sent_headers['Accept-Encoding']
+    assert resp.json() == items
+    assert resp.json() is resp.json()
+    assert resp.response._content is False  # no full copy left behind
+
+
+def test_streamed_body_decoded_as_text_where_needed():
+    # Before Python 3.6, json.loads won't take the body's bytes.
+    items = [{'id': i, 'name': 'env_%d' % i} for i in range(10)]
+    from_bytes = ApiClientModule._JSON_FROM_BYTES
+    ApiClientModule._JSON_FROM_BYTES = False
+    try:
+        resp = ApiClient(session=GzipSession(items)).request(
+            '/v2/configurations')
+        assert resp.json() == items
+    finally:
+        ApiClientModule._JSON_FROM_BYTES = from_bytes
@@ -0,0 +1,9 @@
+"""Test the asyncio client and async group loading.
+
+The tests are in asyncio_cases, which only imports on Python 3.5 or later;
+on older versions there's nothing here to run.
+"""
+import sys
+
+if sys.version_info >= (3, 5):
+    from asyncio_cases import TestAsyncApiClient, TestAsyncLoad  # noqa
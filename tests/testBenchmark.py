@@ -0,0 +1,118 @@
+"""Test the group loading and serialization benchmarks."""
+import json
+import os
+import sys
+import tempfile
+from unittest import TestCase
+
+sys.path.append('..')
+from skytap.framework import Benchmark  # noqa
+from skytap.models.Environment import Environment  # noqa
+from skytap.models.Vm import Vm  # noqa
+
+
+class TestBenchmark(TestCase):
+
+    def test_runs_every_case(self):
+        results = Benchmark.run(sizes=[5, 20], repeat=1)
+        self.assertEqual(len(results['results']), 2 * len(Benchmark.CASES))
+        self.assertEqual(results['source'], 'simulator')
+        for result in results['results']:
+            self.assertIn(result['case'], Benchmark.CASES)
+            self.assertTrue(result['seconds'] >= 0)
+            if Benchmark.tracemalloc is not None:
+                self.assertTrue(result['peak_bytes'] >= 0)
+        json.dumps(results)
+
+    def test_without_tracemalloc(self):
+        tracemalloc, Benchmark.tracemalloc = Benchmark.tracemalloc, None
+        try:
+            results = Benchmark.run(sizes=[5], cases=['find'], repeat=1)
+        finally:
+            Benchmark.tracemalloc = tracemalloc
+        result = results['results'][0]
+        self.assertTrue(result['seconds'] >= 0)
+        self.assertEqual(result['peak_bytes'], None)
+        self.assertIn(' - ', Benchmark.format_result(result))
+
+    def test_workload_group(self):
+        items = Benchmark.simulated_items(3)
+        workload = Benchmark.Workload(items, 10, Environment)
+        self.assertEqual(len(workload.group), 10)
+        self.assertEqual(workload.search, 'Environment 3')
+        found = workload.group.find(workload.search)
+        self.assertTrue(len(found) >= 1)
+
+    def test_stretch(self):
+        items = [{'id': '7', 'name': 'a'}, {'id': '8', 'name': 'b'}]
+        self.assertEqual(Benchmark.stretch(items, 1), items[:1])
+        stretched = Benchmark.stretch(items, 5)
+        self.assertEqual([i['id'] for i in stretched], ['1', '2', '3', '4', '5'])
+        self.assertEqual(stretched[4]['name'], 'a')
+        self.assertEqual(items[0]['id'], '7')
+        with self.assertRaises(ValueError):
+            Benchmark.stretch([], 5)
+
+    def test_payload(self):
+        items = Benchmark.simulated_items(2)
+        results = Benchmark.run(sizes=[4], cases=['find'], repeat=1,
+                                items=items)
+        self.assertEqual(results['source'], 'payload')
+        self.assertEqual(len(results['results']), 1)
+
+    def test_unknown_case(self):
+        with self.assertRaises(ValueError):
+            Benchmark.run(sizes=[1], cases=['nothing'])
+
+    def test_compare(self):
+        baseline = {'results': [
+            {'case': 'json', 'size': 100, 'seconds': 1.0, 'peak_bytes': 100},
+            {'case': 'find', 'size': 100, 'seconds': 1.0, 'peak_bytes': 100},
+        ]}
+        current = {'results': [
+            {'case': 'json', 'size': 100, 'seconds': 1.05, 'peak_bytes': 150},
+            {'case': 'find', 'size': 100, 'seconds': 2.0, 'peak_bytes': 90},
+            {'case': 'iterate', 'size': 100, 'seconds': 9.0, 'peak_bytes': 1},
+        ]}
+        regressions = Benchmark.compare(baseline, current, threshold=0.10)
+        self.assertEqual([(r['case'], r['metric']) for r in regressions],
+                         [('json', 'peak_bytes'), ('find', 'seconds')])
+        self.assertAlmostEqual(regressions[1]['change'], 1.0)
+
+    def test_command_line(self):
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            args = ['--sizes', '5', '--cases', 'find', '--repeat', '1']
+            self.assertEqual(Benchmark.main(args + ['--output', path]), 0)
+            saved = Benchmark.load(path)
+            self.assertEqual(saved['results'][0]['case'], 'find')
+            for result in saved['results']:
+                result['seconds'] = result['peak_bytes'] = 1e-12
+            Benchmark.save(saved, path)
+            self.assertEqual(Benchmark.main(args + ['--compare', path]), 1)
+        finally:
+            os.remove(path)
+
+    def test_json_with_list_of_dicts(self):
+        """Lists of dicts (like VM interfaces) convert to JSON."""
+        vm = Vm({'id': 1, 'name': 'vm', 'runstate': 'running',
+                 'interfaces': [{'id': 'nic-1', 'ip': None}]})
+        self.assertEqual(json.loads(vm.json())['interfaces'],
+                         [{'id': 'nic-1', 'ip': None}])
+        self.assertEqual(json.loads(vm.json(skip_none=True))['interfaces'],
+                         [{'id': 'nic-1'}])
+
+    def test_json_leaves_data_alone(self):
+        """Filtering nested fields for JSON doesn't change the resource."""
+        source = {'id': 1, 'name': 'vm', 'runstate': 'running',
+                  'interfaces': [{'id': 'nic-1', 'ip': None}],
+                  'hardware': {'cpus': 2, 'svms': None}}
+        vm = Vm(json.loads(json.dumps(source)))
+        before = vm.json()
+        vm.json(skip_none=True)
+        vm.json(only_writable=True)
+        self.assertEqual(vm.data['interfaces'], source['interfaces'])
+        self.assertEqual(vm.data['hardware'], source['hardware'])
+        self.assertEqual(vm._source_json['interfaces'], source['interfaces'])
+        self.assertEqual(vm.json(), before)
@@ -0,0 +1,190 @@
+"""Test the client-side response cache."""
+import json
+import sys
+import time
+from unittest import TestCase
+
+import requests
+
+sys.path.append('..')
+from skytap.framework.ApiClient import ApiClient  # noqa
+from skytap.framework.Cache import ResponseCache, ValidatorCache  # noqa
+from skytap.framework.Cache import endpoint_path  # noqa
+from skytap.Labels import Labels  # noqa
+from skytap.models.Label import Label  # noqa
+
+
+class CountingSession(requests.Session):
+    """A requests.Session that answers every call with ``body``."""
+
+    def __init__(self):
+        super(CountingSession, self).__init__()
+        self.calls = []
+        self.body = [{'id': 1, 'name': 'one'}]
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method.upper(), url))
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(self.body).encode()
+        response.url = url
+        response.request = requests.Request(method, url).prepare()
+        return response
+
+
+class TestResponseCache(TestCase):
+
+    def test_endpoint_path(self):
+        self.assertEqual(
+            endpoint_path('https://cloud.skytap.com/v2/configurations/1.json'),
+            '/configurations/1')
+        self.assertEqual(endpoint_path('https://cloud.skytap.com/users?x=1'),
+                         '/users')
+
+    def test_ttl_expiry(self):
+        cache = ResponseCache(ttl=0.05)
+        cache.set('GET', 'https://cloud.skytap.com/v2/users', {}, ['a'])
+        self.assertEqual(cache.get('GET', 'https://cloud.skytap.com/v2/users'),
+                         (True, ['a']))
+        time.sleep(0.06)
+        self.assertEqual(cache.get('GET', 'https://cloud.skytap.com/v2/users'),
+                         (False, None))
+
+    def test_per_endpoint_ttls(self):
+        cache = ResponseCache(ttl=30, ttls={'/v2/configurations': 0,
+                                            '/v2/configurations/1/notes': 5})
+        self.assertEqual(cache.ttl_for('https://x/v2/users'), 30)
+        self.assertEqual(cache.ttl_for('https://x/v2/configurations/2'), 0)
+        self.assertEqual(cache.ttl_for('https://x/configurations/1/notes.json'),
+                         5)
+        cache.set('GET', 'https://x/v2/configurations', {}, [])
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(max_entries=2)
+        cache.set('GET', 'https://x/v2/users', {}, 1)
+        cache.set('GET', 'https://x/v2/groups', {}, 2)
+        cache.get('GET', 'https://x/v2/users')
+        cache.set('GET', 'https://x/v2/projects', {}, 3)
+        self.assertTrue(cache.get('GET', 'https://x/v2/users')[0])
+        self.assertFalse(cache.get('GET', 'https://x/v2/groups')[0])
+        self.assertTrue(cache.get('GET', 'https://x/v2/projects')[0])
+
+    def test_params_are_part_of_the_key(self):
+        cache = ResponseCache()
+        cache.set('GET', 'https://x/v2/configurations', {'scope': 'company'}, 1)
+        self.assertFalse(cache.get('GET', 'https://x/v2/configurations')[0])
+
+    def test_invalidate_parents_and_children(self):
+        cache = ResponseCache()
+        for url in ('https://x/v2/configurations',
+                    'https://x/v2/configurations/123',
+                    'https://x/v2/configurations/123/notes.json',
+                    'https://x/v2/configurations/1234',
+                    'https://x/v2/users'):
+            cache.set('GET', url, {}, url)
+        dropped = cache.invalidate('https://x/configurations/123')
+        self.assertEqual(dropped, 3)
+        self.assertTrue(cache.get('GET', 'https://x/v2/configurations/1234')[0])
+        self.assertTrue(cache.get('GET', 'https://x/v2/users')[0])
+
+
+class TestClientCaching(TestCase):
+
+    def setUp(self):
+        self.session = CountingSession()
+        self.api = ApiClient(session=self.session, cache=ResponseCache())
+
+    def test_repeated_gets_are_served_from_cache(self):
+        first = self.api.rest_json('/v2/configurations', {'scope': 'company'})
+        second = self.api.rest_json('/v2/configurations', {'scope': 'company'})
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.session.calls), 1)
+        self.assertEqual(self.api.cache.hits, 1)
+
+    def test_refresh_skips_the_cache(self):
+        self.session.body = {'id': 1, 'name': 'one',
+                             'url': 'https://cloud.skytap.com/v2/users/1'}
+        label = Label(self.api.rest_json('/v2/users/1'), client=self.api)
+        self.session.body = dict(self.session.body, name='two')
+        self.assertEqual(self.api.rest_json('/v2/users/1')['name'], 'one')
+        label.refresh()
+        self.assertEqual(label.name, 'two')
+        # The fresh answer replaces the cached one.
+        self.assertEqual(self.api.rest_json('/v2/users/1')['name'], 'two')
+
+    def test_group_refresh_skips_the_cache(self):
+        labels = Labels(client=self.api)
+        self.session.body = [{'id': 1, 'name': 'two'}]
+        labels.refresh()
+        self.assertEqual(labels[1].name, 'two')
+
+    def test_writes_invalidate(self):
+        self.api.rest_json('/v2/configurations')
+        self.api.rest_json('/configurations/123', {}, 'DELETE')
+        self.api.rest_json('/v2/configurations')
+        self.assertEqual([c[0] for c in self.session.calls],
+                         ['GET', 'DELETE', 'GET'])
+
+
+class ETagSession(requests.Session):
+    """A requests.Session that honours If-None-Match for one resource."""
+
+    def __init__(self, body):
+        super(ETagSession, self).__init__()
+        self.body = body
+        self.etag = '"v1"'
+        self.statuses = []
+
+    def request(self, method, url, headers=None, **kwargs):
+        response = requests.Response()
+        if (headers or {}).get('If-None-Match') == self.etag:
+            response.status_code = 304
+            response._content = b''
+        else:
+            response.status_code = 200
+            response._content = json.dumps(self.body).encode()
+        response.headers['ETag'] = self.etag
+        response.url = url
+        response.request = requests.Request(method, url).prepare()
+        self.statuses.append(response.status_code)
+        return response
+
+
+class TestConditionalRequests(TestCase):
+
+    def setUp(self):
+        self.session = ETagSession({'id': 1, 'name': 'one',
+                                    'url': 'https://cloud.skytap.com/v2/users/1'})
+        self.api = ApiClient(session=self.session, validators=ValidatorCache())
+
+    def test_not_modified_returns_stored_body(self):
+        first = self.api.rest_json('/v2/users/1')
+        second = self.api.rest_json('/v2/users/1')
+        self.assertIs(first, second)
+        self.assertEqual(self.session.statuses, [200, 304])
+
+    def test_changed_resource_is_downloaded(self):
+        self.api.rest_json('/v2/users/1')
+        self.session.etag = '"v2"'
+        self.session.body = {'id': 1, 'name': 'two'}
+        self.assertEqual(self.api.rest_json('/v2/users/1')['name'], 'two')
+        self.assertEqual(self.session.statuses, [200, 200])
+
+    def test_refresh_skips_rebuild_when_unchanged(self):
+        label = Label(self.api.rest_json('/v2/users/1'), client=self.api)
+        data = label.data
+        label.refresh()
+        self.assertIs(label.data, data)
+        self.session.etag = '"v2"'
+        self.session.body = dict(self.session.body, name='two')
+        label.refresh()
+        self.assertEqual(label.name, 'two')
+
+    def test_group_refresh_skips_rebuild_when_unchanged(self):
+        self.session.body = [{'id': 1, 'name': 'one'}]
+        labels = Labels(client=self.api)
+        first = labels[1]
+        labels.refresh()
+        self.assertIs(labels[1], first)
+        self.assertEqual(self.session.statuses, [200, 304])
@@ -0,0 +1,141 @@
+"""Test recording API traffic to cassettes and replaying it."""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from unittest import TestCase
+
+sys.path.append('..')
+from skytap.Environments import Environments  # noqa
+from skytap.framework import Cassette as cassettes  # noqa
+from skytap.framework.ApiClient import ApiClient  # noqa
+from skytap.framework.Cassette import Cassette  # noqa
+from skytap.framework.Cassette import CassetteMissError  # noqa
+from skytap.framework.Cassette import RecordingTransport  # noqa
+from skytap.framework.Cassette import ReplayTransport  # noqa
+from skytap.framework.Config import Config  # noqa
+from skytap.framework.Fixtures import ResponseConfig  # noqa
+from skytap.framework.Fixtures import SimulatorManager  # noqa
+from skytap.framework.Fixtures import SkytapSimulator  # noqa
+from skytap.framework.Retry import RetryBudget, RetryPolicy, RetryRule  # noqa
+from skytap.framework.Transport import MemoryTransport  # noqa
+
+NO_WAIT = RetryPolicy(rules={429: RetryRule(base=0, cap=0)},
+                      budget=RetryBudget(ratio=1))
+
+
+class TestCassette(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def record(self, environments=30, cassette=None):
+        manager = SimulatorManager(
+            SkytapSimulator(environments=environments, page_size=10))
+        manager.add_response_config(ResponseConfig(
+            match_url='*/v2/configurations*', status_code=429,
+            headers={'Retry-After': '0'}, times=1, priority=1))
+        cassette = cassette or Cassette(os.path.join(self.dir, 'run.json.gz'))
+        api = ApiClient(transport=MemoryTransport(manager.respond),
+                        cassette=cassette, retry_policy=NO_WAIT)
+        envs = Environments(client=api)
+        return cassette, envs
+
+    def test_record_and_replay(self):
+        cassette, envs = self.record()
+        self.assertEqual(len(cassette), 4)
+        first = cassette.interactions[0]
+        self.assertEqual(first['status'], 429)
+        self.assertEqual(first['headers']['Retry-After'], '0')
+        self.assertIn('content-range', cassette.interactions[1]['headers'])
+        self.assertTrue(all(i['at'] >= 0 for i in cassette.interactions))
+        cassette.save()
+
+        replay = ReplayTransport(Cassette.load(cassette.path), speed=None)
+        api = ApiClient(transport=replay, retry_policy=NO_WAIT)
+        replayed = Environments(client=api)
+        self.assertEqual(sorted(replayed.keys()), sorted(envs.keys()))
+        self.assertEqual(replay.requests, 4)
+
+    def test_saved_uncompressed(self):
+        cassette, _ = self.record(environments=5)
+        path = os.path.join(self.dir, 'run.json')
+        cassette.save(path)
+        self.assertEqual(len(Cassette.load(path)), 2)
+
+    def test_redacted(self):
+        def handler(request):
+            return 200, {'token': 'sekrit', 'name': 'sekrit',
+                         'user': {'api_token': 'abc123'},
+                         'description': 'not so sekrit'}, {
+                'Set-Cookie': 'session=sekrit', 'X-Token': 'sekrit',
+                'Authorization': 'Basic dXNlcjpzZWtyaXQ='}
+
+        cassette = Cassette(redact=['sekrit'])
+        api = ApiClient(transport=RecordingTransport(
+            MemoryTransport(handler), cassette))
+        result = api.rest_json('/v2/configurations', {'key': 'sekrit'})
+        self.assertEqual(result['token'], 'sekrit')
+        interaction = cassette.interactions[0]
+        self.assertIn('key=REDACTED', interaction['url'])
+        self.assertNotIn('Set-Cookie', interaction['headers'])
+        self.assertEqual(interaction['headers']['X-Token'], 'REDACTED')
+        self.assertEqual(interaction['headers']['Authorization'], 'REDACTED')
+        self.assertEqual(json.loads(interaction['body']), {
+            'token': 'REDACTED', 'name': 'REDACTED',
+            'user': {'api_token': 'REDACTED'},
+            'description': 'not so sekrit'})
+
+    def test_short_token_leaves_other_text_alone(self):
+        cassette, envs = self.record(environments=5,
+                                     cassette=Cassette(redact=['y']))
+        urls = [i['url'] for i in cassette.interactions]
+        self.assertTrue(all('scope=company' in url for url in urls))
+        self.assertNotIn('REDACTED', str(cassette.interactions))
+        replay = ReplayTransport(cassette, speed=None)
+        api = ApiClient(transport=replay, retry_policy=NO_WAIT)
+        self.assertEqual(sorted(Environments(client=api).keys()),
+                         sorted(envs.keys()))
+
+    def test_repeats_in_order(self):
+        cassette = Cassette()
+        cassette.interactions = [
+            {'method': 'GET', 'url': 'https://x/v2/vms/1?b=2&a=1', 'at': 0,
+             'elapsed': 0.05, 'status': 200, 'headers': {}, 'body': '{"n":1}'},
+            {'method': 'GET', 'url': 'https://x/v2/vms/1?a=1&b=2', 'at': 1,
+             'elapsed': 0.05, 'status': 200, 'headers': {}, 'body': '{"n":2}'},
+        ]
+        api = ApiClient(transport=ReplayTransport(cassette, speed=10),
+                        retry_policy=RetryPolicy(max_attempts=1))
+        started = time.time()
+        answers = [api.rest_json('https://y/v2/vms/1', {'a': 1, 'b': 2})['n']
+                   for _ in range(3)]
+        self.assertEqual(answers, [1, 2, 2])
+        self.assertTrue(time.time() - started >= 0.015)
+        with self.assertRaises(CassetteMissError):
+            api.request('https://y/v2/vms/2')
+
+    def test_shared_cassette(self):
+        path = os.path.join(self.dir, 'shared.json')
+        original = cassettes._shared_cassette
+        Config.record_cassette = path
+        cassettes._shared_cassette = None
+        try:
+            shared = cassettes.get_shared_cassette(register=False)
+            self.assertIs(cassettes.get_shared_cassette(), shared)
+            api = ApiClient(transport=MemoryTransport(
+                lambda request: (200, [])))
+            self.assertIsInstance(api.transport, RecordingTransport)
+            api.rest_json('/v2/projects')
+            self.assertEqual(len(shared), 1)
+            shared.save()
+            self.assertEqual(len(Cassette.load(path)), 1)
+        finally:
+            Config.record_cassette = ''
+            cassettes._shared_cassette = original
+        self.assertIsNone(cassettes.get_shared_cassette())
@@ -0,0 +1,125 @@
+"""Test the per-endpoint circuit breaker."""
+import sys
+import time
+from unittest import TestCase
+
+import requests
+
+sys.path.append('..')
+from skytap.framework.ApiClient import ApiClient  # noqa
+from skytap.framework.ApiExceptions import Skytap500SystemError  # noqa
+from skytap.framework.ApiExceptions import SkytapCircuitOpenError  # noqa
+from skytap.framework.CircuitBreaker import CircuitBreaker  # noqa
+from skytap.framework.CircuitBreaker import endpoint_family  # noqa
+from skytap.framework.Config import Config  # noqa
+from skytap.framework.Retry import RetryBudget, RetryPolicy, RetryRule  # noqa
+
+
+class StatusSession(requests.Session):
+    """A requests.Session answering every request with ``status``."""
+
+    def __init__(self, status):
+        super(StatusSession, self).__init__()
+        self.status = status
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        response = requests.Response()
+        response.status_code = self.status
+        response._content = b'{}'
+        response.url = url
+        response.request = requests.Request(method, url).prepare()
+        return response
+
+
+class TestEndpointFamily(TestCase):
+
+    def test_families(self):
+        self.assertEqual(endpoint_family(
+            'https://cloud.skytap.com/v2/configurations/1.json'),
+            'configurations')
+        self.assertEqual(endpoint_family('/v2/configurations/1/vms/2'), 'vms')
+        self.assertEqual(endpoint_family('/configurations/1/notes.json'),
+                         'notes')
+        self.assertEqual(endpoint_family('/v2/company/quotas'), 'quotas')
+
+
+class TestCircuitBreaker(TestCase):
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(threshold=3, reset_timeout=60)
+        for _ in range(2):
+            breaker.failure('/v2/users')
+        self.assertEqual(breaker.state('users'), 'closed')
+        breaker.failure('/v2/users/5')
+        self.assertEqual(breaker.state('/v2/users'), 'open')
+        self.assertRaises(SkytapCircuitOpenError, breaker.before, '/v2/users')
+        breaker.before('/v2/configurations')
+        self.assertEqual(breaker.states(), {'users': 'open'})
+
+    def test_success_resets_count(self):
+        breaker = CircuitBreaker(threshold=2)
+        breaker.failure('/v2/users')
+        breaker.success('/v2/users')
+        breaker.failure('/v2/users')
+        self.assertEqual(breaker.state('users'), 'closed')
+
+    def test_half_open_trial(self):
+        breaker = CircuitBreaker(threshold=1, reset_timeout=0.05)
+        breaker.failure('/v2/users')
+        time.sleep(0.06)
+        self.assertEqual(breaker.state('users'), 'half-open')
+        breaker.before('/v2/users')
+        self.assertRaises(SkytapCircuitOpenError, breaker.before, '/v2/users')
+        breaker.failure('/v2/users')
+        self.assertEqual(breaker.state('users'), 'open')
+        time.sleep(0.06)
+        breaker.before('/v2/users')
+        breaker.success('/v2/users')
+        self.assertEqual(breaker.state('users'), 'closed')
+
+
+class TestClientBreaker(TestCase):
+
+    def test_fails_fast_once_open(self):
+        session = StatusSession(500)
+        api = ApiClient(session=session,
+                        breaker=CircuitBreaker(threshold=2, reset_timeout=60))
+        for _ in range(2):
+            self.assertRaises(Skytap500SystemError, api.rest_json,
+                              '/v2/projects', {}, 'POST', '{}')
+        self.assertRaises(SkytapCircuitOpenError, api.rest_json,
+                          '/v2/projects/3')
+        self.assertEqual(session.calls, 2)
+
+    def test_client_errors_do_not_trip(self):
+        session = StatusSession(404)
+        breaker = CircuitBreaker(threshold=1)
+        api = ApiClient(session=session, breaker=breaker)
+        for _ in range(3):
+            self.assertRaises(Exception, api.rest_json, '/v2/projects/3')
+        self.assertEqual(breaker.state('projects'), 'closed')
+
+    def test_retries_count_once(self):
+        session = StatusSession(500)
+        breaker = CircuitBreaker(threshold=2, reset_timeout=60)
+        policy = RetryPolicy(max_attempts=3,
+                             rules={'5xx': RetryRule(base=0, cap=0)},
+                             budget=RetryBudget(ratio=1))
+        api = ApiClient(session=session, breaker=breaker,
+                        retry_policy=policy)
+        self.assertRaises(Skytap500SystemError, api.rest_json,
+                          '/v2/projects/3')
+        self.assertEqual(session.calls, 3)
+        self.assertEqual(breaker.state('projects'), 'closed')
+        # The next request's first failure opens the circuit, so its retry
+        # isn't sent.
+        self.assertRaises(SkytapCircuitOpenError, api.rest_json,
+                          '/v2/projects/3')
+        self.assertEqual(session.calls, 4)
+        self.assertEqual(breaker.state('projects'), 'open')
+
+    def test_off_by_default(self):
+        self.assertEqual(Config.breaker_threshold, 0)
+        self.assertIsNone(ApiClient(session=StatusSession(200)).breaker)
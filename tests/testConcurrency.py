@@ -0,0 +1,105 @@
+"""Test the adaptive concurrency governor."""
+import sys
+import threading
+import time
+from email.utils import formatdate
+from unittest import TestCase
+
+import requests
+
+sys.path.append('..')
+from skytap.framework.ApiClient import ApiClient  # noqa
+from skytap.framework.Concurrency import ConcurrencyGovernor  # noqa
+
+
+class OkSession(requests.Session):
+    """A requests.Session that answers everything with an empty list."""
+
+    def request(self, method, url, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'[]'
+        response.url = url
+        response.request = requests.Request(method, url).prepare()
+        return response
+
+
+class TestConcurrencyGovernor(TestCase):
+
+    def test_additive_increase(self):
+        governor = ConcurrencyGovernor(initial=2, maximum=4)
+        # 2 -> 2.5 -> 2.9 -> 3.24: about one step per window of successes.
+        for _ in range(3):
+            governor.success()
+        self.assertEqual(governor.limit, 3)
+        for _ in range(20):
+            governor.success()
+        self.assertEqual(governor.limit, 4)
+
+    def test_multiplicative_decrease_with_cooldown(self):
+        governor = ConcurrencyGovernor(initial=16, cooldown=60)
+        governor.throttled()
+        governor.throttled()
+        self.assertEqual(governor.limit, 8)
+        self.assertEqual([h[2] for h in governor.history],
+                         ['start', 'decrease'])
+
+    def test_never_below_minimum(self):
+        governor = ConcurrencyGovernor(initial=2, minimum=1, cooldown=0)
+        for _ in range(5):
+            governor.throttled()
+        self.assertEqual(governor.limit, 1)
+
+    def test_limit_caps_in_flight(self):
+        governor = ConcurrencyGovernor(initial=2, maximum=2)
+        peak = []
+        lock = threading.Lock()
+
+        def worker():
+            with governor.slot():
+                with lock:
+                    peak.append(governor.in_flight)
+                time.sleep(0.02)
+
+        threads = [threading.Thread(target=worker) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(max(peak), 2)
+        self.assertEqual(governor.in_flight, 0)
+
+    def test_retry_after_pauses_new_requests(self):
+        governor = ConcurrencyGovernor(initial=4)
+        governor.throttled(retry_after=0.1)
+        start = time.time()
+        governor.acquire()
+        governor.release()
+        self.assertGreaterEqual(time.time() - start, 0.09)
+
+    def test_client_feeds_governor(self):
+        governor = ConcurrencyGovernor(initial=1, maximum=8)
+        api = ApiClient(session=OkSession(), governor=governor)
+        for _ in range(4):
+            api.rest_json('/v2/users')
+        self.assertEqual(governor.limit, 3)
+        self.assertEqual(governor.in_flight, 0)
+
+
+class TestRetryAfter(TestCase):
+
+    def parse(self, value):
+        response = requests.Response()
+        response.headers['Retry-After'] = value
+        return ApiClient._retry_after(response)
+
+    def test_seconds(self):
+        self.assertEqual(self.parse('7'), 7)
+
+    def test_http_date(self):
+        self.assertIn(self.parse(formatdate(time.time() + 30, usegmt=True)),
+                      (29, 30))
+
+    def test_missing_or_bad(self):
+        self.assertIsNone(ApiClient._retry_after(requests.Response()))
+        self.assertIsNone(self.parse('soon'))
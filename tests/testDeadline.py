@@ -0,0 +1,133 @@
+"""Test request timeouts and operation deadlines."""
+import sys
+import time
+from unittest import TestCase
+
+import requests
+
+sys.path.append('..')
+from skytap.framework.ApiClient import ApiClient  # noqa
+from skytap.framework.ApiExceptions import SkytapDeadlineExceededError  # noqa
+from skytap.framework.Config import Config  # noqa
+from skytap.framework.Deadline import Deadline, current_deadline  # noqa
+from skytap.framework.Retry import RetryBudget, RetryPolicy, RetryRule  # noqa
+from skytap.framework.Suspendable import Suspendable  # noqa
+
+
+class TimeoutSession(requests.Session):
+    """A requests.Session that records timeouts and answers with a status."""
+
+    def __init__(self, status=200):
+        super(TimeoutSession, self).__init__()
+        self.status = status
+        self.timeouts = []
+
+    def request(self, method, url, **kwargs):
+        self.timeouts.append(kwargs.get('timeout'))
+        response = requests.Response()
+        response.status_code = self.status
+        response._content = b'[]'
+        response.url = url
+        response.request = requests.Request(method, url).prepare()
+        return response
+
+
+class TestDeadline(TestCase):
+
+    def test_nesting_only_shortens(self):
+        self.assertIsNone(current_deadline())
+        with Deadline(5) as outer:
+            with Deadline(60):
+                self.assertIs(current_deadline(), outer)
+            with Deadline(1) as inner:
+                self.assertIs(current_deadline(), inner)
+            self.assertIs(current_deadline(), outer)
+        self.assertIsNone(current_deadline())
+
+    def test_check(self):
+        deadline = Deadline(0)
+        self.assertTrue(deadline.expired)
+        self.assertRaises(SkytapDeadlineExceededError, deadline.check)
+
+
+class TestClientDeadlines(TestCase):
+
+    def test_configured_timeouts_sent(self):
+        session = TimeoutSession()
+        ApiClient(session=session).rest_json('/v2/users')
+        self.assertEqual(session.timeouts,
+                         [(Config.connect_timeout, Config.read_timeout)])
+
+    def test_deadline_trims_timeouts(self):
+        session = TimeoutSession()
+        api = ApiClient(session=session)
+        with api.deadline(2):
+            api.rest_json('/v2/users')
+        connect, read = session.timeouts[0]
+        self.assertLessEqual(connect, 2)
+        self.assertLessEqual(read, 2)
+
+    def test_no_retry_past_deadline(self):
+        session = TimeoutSession(423)
+        policy = RetryPolicy(rules={423: RetryRule(base=0, cap=0, floor=5)},
+                             budget=RetryBudget(ratio=1))
+        api = ApiClient(session=session, retry_policy=policy)
+        start = time.time()
+        with api.deadline(1):
+            self.assertRaises(SkytapDeadlineExceededError,
+                              api.rest_json, '/v2/users')
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual(len(session.timeouts), 1)
+
+    def test_expired_deadline_sends_nothing(self):
+        session = TimeoutSession()
+        api = ApiClient(session=session)
+        with api.deadline(0):
+            self.assertRaises(SkytapDeadlineExceededError,
+                              api.rest_json, '/v2/users')
+        self.assertEqual(session.timeouts, [])
+
+
+class StuckResource(Suspendable):
+    """Something that never leaves the 'stopped' state."""
+
+    runstate = 'stopped'
+    url = 'https://cloud.skytap.com/v2/configurations/1'
+
+    def __init__(self, api):
+        self.api = api
+        self.refreshes = 0
+
+    def refresh(self):
+        self.refreshes += 1
+
+
+class TestWaitLoop(TestCase):
+
+    def test_wait_stops_at_deadline(self):
+        add_note = Config.add_note_on_state_change
+        Config.add_note_on_state_change = False
+        try:
+            resource = StuckResource(ApiClient(session=TimeoutSession()))
+            start = time.time()
+            with Deadline(0.2):
+                self.assertRaises(SkytapDeadlineExceededError,
+                                  resource.run, True)
+            self.assertLess(time.time() - start, 2)
+        finally:
+            Config.add_note_on_state_change = add_note
+
+    def test_wait_gives_up_after_configured_time(self):
+        add_note = Config.add_note_on_state_change
+        timeout = Config.state_wait_timeout
+        Config.add_note_on_state_change = False
+        Config.state_wait_timeout = 0.2
+        try:
+            resource = StuckResource(ApiClient(session=TimeoutSession()))
+            start = time.time()
+            self.assertRaises(SkytapDeadlineExceededError, resource.run, True)
+            self.assertLess(time.time() - start, 2)
+            self.assertIsNone(current_deadline())
+        finally:
+            Config.add_note_on_state_change = add_note
+            Config.state_wait_timeout = timeout
@@ -0,0 +1,150 @@
+"""Test hedged GET requests."""
+import sys
+import threading
+import time
+from unittest import TestCase
+
+import requests
+
+sys.path.append('..')
+from skytap.framework.ApiClient import ApiClient  # noqa
+from skytap.framework.Concurrency import ConcurrencyGovernor  # noqa
+from skytap.framework.Fixtures import ResponseConfig  # noqa
+from skytap.framework.Hedging import HedgePolicy  # noqa
+from skytap.framework.RateLimiter import TokenBucket  # noqa
+
+
+class SlowFirstSession(requests.Session):
+    """A requests.Session whose first answer is slow and the rest quick."""
+
+    def __init__(self, slow=0.5):
+        super(SlowFirstSession, self).__init__()
+        self.slow = slow
+        self.calls = 0
+        self.closed = []
+        self.lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+        if call == 1:
+            time.sleep(self.slow)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = ('{"call": %d}' % call).encode('utf-8')
+        response.url = url
+        response.request = requests.Request(method, url).prepare()
+        response.close = lambda: self.closed.append(call)
+        return response
+
+
+class FixtureClient(ApiClient):
+    _is_test_fixture = True
+
+
+def quick_hedging():
+    return HedgePolicy(initial_delay=0.05, min_delay=0.01)
+
+
+class TestHedgePolicy(TestCase):
+
+    def test_delay_follows_percentile(self):
+        policy = HedgePolicy(percentile=90, min_samples=10, min_delay=0)
+        self.assertEqual(policy.delay(), policy.initial_delay)
+        for i in range(1, 101):
+            policy.record(i / 100.0)
+        self.assertAlmostEqual(policy.delay(), 0.9, places=2)
+
+    def test_delay_is_clamped(self):
+        policy = HedgePolicy(min_samples=1, min_delay=0.5, max_delay=2)
+        policy.record(0.01)
+        self.assertEqual(policy.delay(), 0.5)
+        policy = HedgePolicy(min_samples=1, min_delay=0.5, max_delay=2)
+        policy.record(30)
+        self.assertEqual(policy.delay(), 2)
+
+    def test_callers_dont_queue_for_the_pool(self):
+        # More callers than hedge threads: none of them wait for a thread,
+        # so none run past the hedge delay and get hedged.
+        policy = HedgePolicy(initial_delay=0.1, max_workers=1)
+        results = []
+
+        def call():
+            results.append(policy.run(lambda: time.sleep(0.05) or 'ok'))
+
+        threads = [threading.Thread(target=call) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['ok'] * 4)
+        self.assertEqual(policy.hedged, 0)
+
+
+class TestClientHedging(TestCase):
+
+    def test_slow_get_is_hedged(self):
+        session = SlowFirstSession()
+        api = ApiClient(session=session, hedging=quick_hedging())
+        start = time.time()
+        self.assertEqual(api.rest_json('/v2/configurations/1'), {'call': 2})
+        self.assertLess(time.time() - start, 0.4)
+        self.assertEqual(api.hedging.hedged, 1)
+        self.assertEqual(api.hedging.hedge_wins, 1)
+        time.sleep(0.6)
+        self.assertEqual(session.closed, [1])
+
+    def test_fast_get_not_hedged(self):
+        session = SlowFirstSession(slow=0)
+        api = ApiClient(session=session, hedging=quick_hedging())
+        api.rest_json('/v2/configurations/1')
+        self.assertEqual(session.calls, 1)
+        self.assertEqual(api.hedging.hedged, 0)
+
+    def test_writes_never_hedged(self):
+        session = SlowFirstSession(slow=0.2)
+        api = ApiClient(session=session, hedging=quick_hedging())
+        api.rest_json('/v2/configurations/1', {}, 'PUT', {'name': 'x'})
+        self.assertEqual(session.calls, 1)
+        self.assertEqual(api.hedging.hedged, 0)
+
+    def test_hedge_needs_a_rate_limit_token(self):
+        session = SlowFirstSession(slow=0.2)
+        api = ApiClient(session=session, hedging=quick_hedging(),
+                        rate_limiter=TokenBucket(rate=0.01, burst=1))
+        self.assertEqual(api.rest_json('/v2/configurations/1'), {'call': 1})
+        self.assertEqual(session.calls, 1)
+        self.assertEqual(api.hedging.hedged, 0)
+
+    def test_hedge_needs_a_governor_slot(self):
+        session = SlowFirstSession(slow=0.2)
+        governor = ConcurrencyGovernor(initial=1, maximum=1)
+        api = ApiClient(session=session, hedging=quick_hedging(),
+                        governor=governor)
+        self.assertEqual(api.rest_json('/v2/configurations/1'), {'call': 1})
+        self.assertEqual(api.hedging.hedged, 0)
+
+    def test_hedge_holds_its_own_governor_slot(self):
+        session = SlowFirstSession(slow=0.3)
+        governor = ConcurrencyGovernor(initial=2, maximum=2)
+        api = ApiClient(session=session, hedging=quick_hedging(),
+                        governor=governor)
+        self.assertEqual(api.rest_json('/v2/configurations/1'), {'call': 2})
+        # The slow first try still holds a slot until its answer is in.
+        self.assertEqual(governor.in_flight, 1)
+        time.sleep(0.4)
+        self.assertEqual(governor.in_flight, 0)
+
+    def test_fixture_clients_hedge(self):
+        api = FixtureClient(hedging=quick_hedging())
+        api._sim_manager.add_response_config(
+            ResponseConfig(match_url='*/v2/configurations/1',
+                           status_code=None, latency=0.5, times=1,
+                           priority=1),
+            ResponseConfig(match_url='*/v2/configurations/1',
+                           text={'id': 1}))
+        start = time.time()
+        self.assertEqual(api.rest_json('/v2/configurations/1'), {'id': 1})
+        self.assertLess(time.time() - start, 0.4)
+        self.assertEqual(api.hedging.hedge_wins, 1)
@@ -0,0 +1,129 @@
+"""Test the per-request hooks."""
+import sys
+from unittest import TestCase
+
+import requests
+
+sys.path.append('..')
+from skytap.framework.ApiClient import ApiClient  # noqa
+from skytap.framework.ApiExceptions import Skytap404NotFoundError  # noqa
+from skytap.framework.Fixtures import ResponseConfig  # noqa
+from skytap.framework.Fixtures import SimulatorManager  # noqa
+from skytap.framework.Fixtures import SkytapSimulator  # noqa
+from skytap.framework.Hooks import Hooks, endpoint_template  # noqa
+from skytap.framework.Hooks import get_shared_hooks  # noqa
+from skytap.framework.Retry import RetryBudget, RetryPolicy, RetryRule  # noqa
+from skytap.framework.Transport import MemoryTransport  # noqa
+
+NO_WAIT = RetryPolicy(rules={429: RetryRule(base=0, cap=0)},
+                      budget=RetryBudget(ratio=1))
+
+
+class Recorder(object):
+
+    def __init__(self):
+        self.calls = []
+
+    def record(self, name, event):
+        self.calls.append((name, event.attempt, event.status))
+
+    def before_request(self, event):
+        self.record('before_request', event)
+
+    def after_response(self, event):
+        self.record('after_response', event)
+
+    def on_retry(self, event):
+        self.record('on_retry', event)
+
+    def on_error(self, event):
+        self.record('on_error', event)
+
+
+class TestHooks(TestCase):
+
+    def client(self, handler, **kwargs):
+        self.hooks = Hooks()
+        self.recorder = Recorder()
+        self.hooks.register(self.recorder)
+        return ApiClient(transport=MemoryTransport(handler),
+                         hooks=self.hooks, **kwargs)
+
+    def test_retried_request(self):
+        manager = SimulatorManager(SkytapSimulator(environments=3))
+        manager.add_response_config(ResponseConfig(
+            match_url='*/v2/configurations', status_code=429,
+            headers={'Retry-After': '0'}, times=1, priority=1))
+        events = []
+        api = self.client(manager.respond, retry_policy=NO_WAIT)
+        self.hooks.add('after_response', events.append)
+        api.rest_json('/v2/configurations/2.json')
+        self.assertEqual(self.recorder.calls, [('before_request', 1, None),
+                                               ('after_response', 1, 200)])
+        api.rest_json('/v2/configurations')
+        self.assertEqual(self.recorder.calls[2:], [
+            ('before_request', 1, None), ('after_response', 1, 429),
+            ('on_retry', 1, 429), ('before_request', 2, None),
+            ('after_response', 2, 200)])
+        event = events[0]
+        self.assertEqual(event.template, '/configurations/:id')
+        self.assertEqual(event.family, 'configurations')
+        self.assertTrue(event.bytes > 0)
+        self.assertTrue(0 <= event.ttfb <= event.total)
+
+    def test_http_error(self):
+        api = self.client(lambda request: (404, 'gone'),
+                          retry_policy=RetryPolicy(max_attempts=1))
+        errors = []
+        self.hooks.add('on_error', errors.append)
+        with self.assertRaises(Skytap404NotFoundError):
+            api.request('/v2/users/5')
+        self.assertEqual(self.recorder.calls[-1], ('on_error', 1, 404))
+        self.assertIsInstance(errors[0].error, Skytap404NotFoundError)
+
+    def test_connection_error(self):
+        def handler(request):
+            raise requests.exceptions.ConnectionError('down')
+
+        api = self.client(handler, retry_policy=RetryPolicy(
+            max_attempts=2, rules={'connection': RetryRule(base=0, cap=0)},
+            budget=RetryBudget(ratio=1)), breaker=None)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            api.request('/v2/users/5')
+        self.assertEqual([call[0] for call in self.recorder.calls], [
+            'before_request', 'on_retry', 'before_request', 'on_error'])
+
+    def test_broken_hook_is_ignored(self):
+        api = self.client(lambda request: (200, {}))
+
+        def broken(event):
+            raise RuntimeError('oops')
+
+        self.hooks.add('before_request', broken)
+        self.assertEqual(api.rest_json('/v2/users/1'), {})
+        self.assertEqual(len(self.recorder.calls), 2)
+
+    def test_add_and_remove(self):
+        hooks = Hooks()
+        self.assertFalse(hooks)
+        callback = hooks.add('on_error', lambda event: None)
+        self.assertTrue(hooks)
+        hooks.remove('on_error', callback)
+        self.assertFalse(hooks)
+        recorder = Recorder()
+        hooks.register(recorder)
+        self.assertTrue(hooks)
+        hooks.unregister(recorder)
+        self.assertFalse(hooks)
+        with self.assertRaises(ValueError):
+            hooks.add('whenever', callback)
+
+    def test_shared_hooks(self):
+        self.assertIs(ApiClient(transport=MemoryTransport(None)).hooks,
+                      get_shared_hooks())
+
+    def test_template(self):
+        self.assertEqual(
+            endpoint_template('https://x/v2/configurations/1/vms/2.json'),
+            '/configurations/:id/vms/:id')
+        self.assertEqual(endpoint_template('/v2/users'), '/users')
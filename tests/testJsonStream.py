@@ -0,0 +1,185 @@
+"""Test the incremental JSON array parser."""
+import gc
+import json
+import sys
+from unittest import TestCase
+
+import requests
+
+sys.path.append('..')
+from skytap.framework.ApiClient import ApiClient  # noqa
+from skytap.framework import JsonStream  # noqa
+from skytap.framework.JsonStream import ArrayParser, StreamedPage  # noqa
+from skytap.models.SkytapGroup import SkytapGroup  # noqa
+
+DOC = [
+    {'id': 1, 'name': 'café ☕', 'tags': ['a', 'b]', '{c}'],
+     'note': 'quote " and \\\\ backslash, comma'},
+    12345,
+    -0.5e3,
+    'plain',
+    None,
+    True,
+    [],
+    {},
+    {'deep': [[{'x': [1, 2, {'y': '],}'}]}]]},
+]
+
+
+def parse_in_chunks(data, size, accelerated):
+    parser = ArrayParser(accelerated=accelerated)
+    items = []
+    for i in range(0, len(data), size):
+        items.extend(parser.feed(data[i:i + size]))
+    items.extend(parser.close())
+    return items
+
+
+class TestArrayParser(TestCase):
+
+    def test_any_chunking_either_mode(self):
+        data = json.dumps(DOC, indent=2).encode('utf-8')
+        for accelerated in (True, False):
+            for size in (1, 2, 3, 7, 64, len(data)):
+                self.assertEqual(parse_in_chunks(data, size, accelerated),
+                                 DOC, (accelerated, size))
+
+    def test_numbers_split_across_chunks(self):
+        for accelerated in (True, False):
+            parser = ArrayParser(accelerated=accelerated)
+            self.assertEqual(parser.feed(b'[12'), [])
+            self.assertEqual(parser.feed(b'34'), [])
+            self.assertEqual(parser.feed(b',5'), [1234])
+            self.assertEqual(parser.feed(b']'), [5])
+            self.assertEqual(parser.close(), [])
+
+    def test_items_come_out_early(self):
+        parser = ArrayParser()
+        self.assertEqual(parser.feed(b'[{"id": 1}, {"id": 2}, {"id"'),
+                         [{'id': 1}, {'id': 2}])
+        self.assertEqual(parser.count, 2)
+
+    def test_empty(self):
+        self.assertEqual(parse_in_chunks(b' [ ] ', 1, True), [])
+        self.assertEqual(parse_in_chunks(b'[]', 1, False), [])
+
+    def test_incomplete(self):
+        parser = ArrayParser()
+        parser.feed(b'[1, 2')
+        self.assertRaises(ValueError, parser.close)
+
+    def test_not_an_array(self):
+        self.assertRaises(TypeError, ArrayParser().feed, b'{"error": 1}')
+
+    def test_bad_separator(self):
+        self.assertRaises(ValueError, ArrayParser().feed, b'[1 2]')
+
+    def test_long_item_decoded_once(self):
+        decoded = []
+
+        class CountingDecoder(json.JSONDecoder):
+            def raw_decode(self, s, idx=0):
+                decoded.append(len(s) - idx)
+                return super(CountingDecoder, self).raw_decode(s, idx)
+
+        item = {'notes': ['x' * 100] * 1000}
+        data = json.dumps([item]).encode('utf-8')
+        original = JsonStream._decoder
+        JsonStream._decoder = CountingDecoder()
+        try:
+            self.assertEqual(parse_in_chunks(data, 1024, True), [item])
+        finally:
+            JsonStream._decoder = original
+        self.assertLess(sum(decoded), 2 * len(data))
+
+
+class TestStreamedPage(TestCase):
+
+    def test_count_and_drain(self):
+        closed = []
+        page = StreamedPage([b'[1, 2,', b' 3]'], lambda: closed.append(1))
+        self.assertEqual(next(page), 1)
+        page.drain()
+        self.assertEqual(page.count, 3)
+        self.assertEqual(closed, [1])
+
+    def test_close_unread(self):
+        closed = []
+        page = StreamedPage([b'[1, 2]'], lambda: closed.append(1))
+        page.close()
+        self.assertEqual(closed, [1])
+        self.assertEqual(list(page), [])
+        page.close()
+        self.assertEqual(closed, [1])
+
+    def test_dropped_page_closes(self):
+        closed = []
+        page = StreamedPage([b'[1, 2]'], lambda: closed.append(1))
+        next(page)
+        del page
+        gc.collect()
+        self.assertEqual(closed, [1])
+
+
+class Item(object):
+
+    built = []
+
+    def __init__(self, item_json, client=None):
+        Item.built.append((item_json['id'], ChunkSession.sent))
+        self.id = item_json['id']
+
+
+class ChunkSession(requests.Session):
+    """Sends a list body a few bytes at a time, noting how much is out."""
+
+    sent = 0
+
+    def __init__(self, items):
+        super(ChunkSession, self).__init__()
+        self.body = json.dumps(items).encode('utf-8')
+        self.closed = 0
+
+    def get(self, url, headers=None, auth=None, params=None, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.raw = object()
+
+        def chunks(size, decode_unicode=False):
+            for i in range(0, len(self.body), 16):
+                ChunkSession.sent = i + 16
+                yield self.body[i:i + 16]
+        response.iter_content = chunks
+
+        def close():
+            self.closed += 1
+        response.close = close
+        return response
+
+
+class TestGroupStreaming(TestCase):
+
+    def test_resources_built_while_downloading(self):
+        items = [{'id': i, 'name': 'env_%d' % i} for i in range(50)]
+        session = ChunkSession(items)
+        group = SkytapGroup(client=ApiClient(session=session))
+        Item.built = []
+        group.load_list_from_api('/v2/configurations', Item)
+        self.assertEqual(len(group), 50)
+        first_id, sent_when_built = Item.built[0]
+        self.assertEqual(first_id, 0)
+        self.assertLess(sent_when_built, len(session.body) / 4)
+
+    def test_connection_closed_when_load_fails(self):
+        class Broken(Item):
+            def __init__(self, item_json, client=None):
+                if item_json['id'] == 3:
+                    raise ValueError(item_json)
+
+        items = [{'id': i} for i in range(50)]
+        session = ChunkSession(items)
+        group = SkytapGroup(client=ApiClient(session=session))
+        self.assertRaises(ValueError, group.load_list_from_api,
+                          '/v2/configurations', Broken)
+        self.assertEqual(session.closed, 1)
@@ -0,0 +1,182 @@
+"""Test the Prometheus metrics registry and endpoint."""
+import os
+import shutil
+import socket
+import sys
+import tempfile
+from unittest import TestCase
+
+import requests
+
+sys.path.append('..')
+from skytap.framework import Metrics  # noqa
+from skytap.framework.ApiClient import ApiClient  # noqa
+from skytap.framework.ApiExceptions import Skytap423BusyError  # noqa
+from skytap.framework.Cache import ResponseCache  # noqa
+from skytap.framework.CircuitBreaker import CircuitBreaker  # noqa
+from skytap.framework.Config import Config  # noqa
+from skytap.framework.Deadline import Deadline  # noqa
+from skytap.framework.Fixtures import ResponseConfig  # noqa
+from skytap.framework.Fixtures import SimulatorManager  # noqa
+from skytap.framework.Fixtures import SkytapSimulator  # noqa
+from skytap.framework.Hooks import Hooks, get_shared_hooks  # noqa
+from skytap.framework.Metrics import MetricsRegistry, MetricsServer  # noqa
+from skytap.framework.Retry import RetryBudget, RetryPolicy, RetryRule  # noqa
+from skytap.framework.Transport import MemoryTransport  # noqa
+
+NO_WAIT = RetryPolicy(max_attempts=3,
+                      rules={429: RetryRule(base=0, cap=0),
+                             423: RetryRule(base=0, cap=0),
+                             'connection': RetryRule(base=0, cap=0)},
+                      budget=RetryBudget(ratio=1))
+
+
+def samples(text):
+    """Return {'name{labels}': value} for every sample in the text."""
+    found = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            found[name] = float(value)
+    return found
+
+
+class TestMetricsRegistry(TestCase):
+
+    def setUp(self):
+        self.cache = ResponseCache(ttl=60)
+        self.registry = MetricsRegistry(cache=self.cache)
+        self.hooks = Hooks()
+        self.hooks.register(self.registry)
+        self.manager = SimulatorManager(SkytapSimulator(environments=3))
+
+    def client(self, handler=None, **kwargs):
+        kwargs.setdefault('retry_policy', NO_WAIT)
+        return ApiClient(transport=MemoryTransport(
+            handler or self.manager.respond), hooks=self.hooks,
+            cache=self.cache, **kwargs)
+
+    def test_counts_requests(self):
+        self.manager.add_response_config(
+            ResponseConfig(match_url='*/v2/configurations/1', status_code=429,
+                           headers={'Retry-After': '0'}, times=1, priority=1),
+            ResponseConfig(match_url='*/v2/configurations/2', status_code=423,
+                           priority=1))
+        api = self.client()
+        api.rest_json('/v2/configurations/1')
+        api.rest_json('/v2/configurations/1')
+        with self.assertRaises(Skytap423BusyError):
+            api.rest_json('/v2/configurations/2', {}, 'PUT', {'a': 1})
+        found = samples(self.registry.render())
+
+        ok = 'skytap_requests_total{family="configurations",method="GET",' \
+             'status="200"}'
+        self.assertEqual(found[ok], 1)
+        self.assertEqual(found['skytap_throttled_total{family='
+                               '"configurations",status="423"}'], 3)
+        self.assertEqual(found['skytap_retries_total{family='
+                               '"configurations",reason="429"}'], 1)
+        self.assertEqual(found['skytap_errors_total{family='
+                               '"configurations",reason="423"}'], 1)
+        self.assertEqual(found['skytap_requests_in_flight'], 0)
+        self.assertEqual(found['skytap_request_duration_seconds_count'
+                               '{family="configurations"}'], 5)
+        self.assertEqual(found['skytap_request_duration_seconds_bucket'
+                               '{family="configurations",le="+Inf"}'], 5)
+        self.assertEqual(found['skytap_cache_hits_total'], 1)
+        self.assertEqual(found['skytap_cache_hit_ratio'], 0.5)
+
+    def test_in_flight(self):
+        seen = []
+
+        def handler(request):
+            seen.append(samples(self.registry.render())[
+                'skytap_requests_in_flight'])
+            if len(seen) == 1:
+                raise requests.exceptions.ConnectionError('down')
+            return 200, {}
+
+        api = self.client(handler, breaker=CircuitBreaker())
+        api.rest_json('/v2/users/1')
+        self.assertEqual(seen, [1, 1])
+        self.assertEqual(self.registry.in_flight, 0)
+        self.assertEqual(self.registry.retries,
+                         {('users', 'connection'): 1})
+
+    def test_deadline_ends_the_try(self):
+        def handler(request):
+            raise requests.exceptions.ConnectionError('down')
+
+        policy = RetryPolicy(rules={'connection': RetryRule(base=60)},
+                             budget=RetryBudget(ratio=1))
+        api = self.client(handler, retry_policy=policy,
+                          breaker=CircuitBreaker())
+        with self.assertRaises(Exception):
+            with Deadline(5):
+                api.request('/v2/users/1')
+        self.assertEqual(self.registry.in_flight, 0)
+        self.assertEqual(list(self.registry.errors),
+                         [('users', 'SkytapDeadlineExceededError')])
+
+    def test_label_escaping(self):
+        self.registry.requests[('a"b\\c', 'GET', '200')] = 2
+        self.assertIn('family="a\\"b\\\\c"', self.registry.render())
+
+    def test_write(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'skytap.prom')
+            self.client().rest_json('/v2/users')
+            self.registry.write(path)
+            with open(path) as f:
+                self.assertEqual(f.read(), self.registry.render())
+            self.assertEqual(os.listdir(directory), ['skytap.prom'])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_reset(self):
+        self.client().rest_json('/v2/users')
+        self.registry.reset()
+        self.assertNotIn('skytap_requests_total{',
+                         self.registry.render())
+
+
+class TestMetricsServer(TestCase):
+
+    def test_serves_metrics(self):
+        registry = MetricsRegistry(cache=ResponseCache())
+        registry.requests[('vms', 'GET', '200')] = 7
+        with MetricsServer(registry) as server:
+            response = requests.get(server.url)
+            missing = requests.get(server.url.replace('/metrics', '/other'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers['Content-Type'].startswith(
+            'text/plain; version=0.0.4'))
+        self.assertIn('skytap_requests_total{family="vms",method="GET",'
+                      'status="200"} 7', response.text)
+        self.assertEqual(missing.status_code, 404)
+
+    def test_shared_registry(self):
+        original = Metrics._shared_metrics
+        Metrics._shared_metrics = None
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        try:
+            self.assertIsNone(Metrics.get_shared_metrics())
+            Config.metrics_port = port
+            api = ApiClient(transport=MemoryTransport(
+                lambda request: (200, {})))
+            registry = api.metrics
+            self.assertIs(Metrics.get_shared_metrics(), registry)
+            try:
+                api.rest_json('/v2/projects/1')
+                text = requests.get(registry.server.url).text
+            finally:
+                registry.server.stop()
+                get_shared_hooks().unregister(registry)
+            self.assertIn('skytap_requests_total{family="projects"', text)
+        finally:
+            Config.metrics_port = 0
+            Metrics._shared_metrics = original
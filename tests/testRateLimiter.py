@@ -0,0 +1,72 @@
+"""Test the client-side rate limiter."""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+sys.path.append('..')
+from skytap.framework.RateLimiter import FileTokenBucket, TokenBucket  # noqa
+
+
+class TestTokenBucket(TestCase):
+
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(rate=20, burst=3)
+        start = time.time()
+        for _ in range(3):
+            self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+        bucket.acquire()
+        elapsed = time.time() - start
+        self.assertGreaterEqual(elapsed, 0.04)
+
+    def test_timeout(self):
+        bucket = TokenBucket(rate=1, burst=1)
+        bucket.acquire()
+        self.assertFalse(bucket.acquire(timeout=0.05))
+
+    def test_shared_between_threads(self):
+        bucket = TokenBucket(rate=50, burst=5)
+        taken = []
+
+        def worker():
+            for _ in range(5):
+                bucket.acquire()
+                taken.append(time.time())
+
+        start = time.time()
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # 20 requests with 5 up front leaves 15 at 50/sec: ~0.3 sec.
+        self.assertEqual(len(taken), 20)
+        self.assertGreaterEqual(time.time() - start, 0.25)
+
+    def test_rejects_bad_values(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=1, burst=2).acquire(3)
+
+
+class TestFileTokenBucket(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'bucket')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_buckets_on_one_file_share_tokens(self):
+        first = FileTokenBucket(self.path, rate=1, burst=4)
+        second = FileTokenBucket(self.path, rate=1, burst=4)
+        self.assertTrue(first.try_acquire(2))
+        self.assertTrue(second.try_acquire(2))
+        self.assertFalse(first.try_acquire())
+        self.assertLess(second.tokens, 1)
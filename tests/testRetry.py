@@ -0,0 +1,134 @@
+"""Test the retry policy and budget."""
+import sys
+from unittest import TestCase
+
+import requests
+
+sys.path.append('..')
+from skytap.framework.ApiClient import ApiClient  # noqa
+from skytap.framework.ApiExceptions import Skytap429TooManyRequestsError  # noqa
+from skytap.framework.ApiExceptions import Skytap500SystemError  # noqa
+from skytap.framework.Retry import RetryBudget, RetryPolicy, RetryRule  # noqa
+
+
+def make_response(status, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = b'[]'
+    response.headers.update(headers or {})
+    return response
+
+
+class ScriptedSession(requests.Session):
+    """A requests.Session that answers with a fixed list of outcomes."""
+
+    def __init__(self, outcomes):
+        super(ScriptedSession, self).__init__()
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        response = make_response(outcome)
+        response.url = url
+        response.request = requests.Request(method, url).prepare()
+        return response
+
+
+def quick_policy(**kwargs):
+    """A policy that never really sleeps and never runs out of budget."""
+    rules = {423: RetryRule(base=0, cap=0), 429: RetryRule(base=0, cap=0),
+             '5xx': RetryRule(base=0, cap=0, methods=('GET',)),
+             'connection': RetryRule(base=0, cap=0, methods=('GET',))}
+    kwargs.setdefault('budget', RetryBudget(ratio=1, min_per_second=1000))
+    kwargs.setdefault('max_total_delay', 10)
+    return RetryPolicy(rules=rules, **kwargs)
+
+
+class TestRetryPolicy(TestCase):
+
+    def test_full_jitter_stays_under_cap(self):
+        rule = RetryRule(base=1, cap=8)
+        for attempt in range(1, 10):
+            for _ in range(20):
+                delay = rule.delay(attempt)
+                self.assertGreaterEqual(delay, 0)
+                self.assertLessEqual(delay, min(8, 2 ** (attempt - 1)))
+
+    def test_floor_for_busy(self):
+        policy = RetryPolicy(max_total_delay=1000, budget=RetryBudget())
+        state = policy.start('GET')
+        self.assertGreaterEqual(state.next_delay(make_response(423)),
+                                policy.rules[423].floor)
+
+    def test_retry_after_wins(self):
+        state = quick_policy().start('GET')
+        delay = state.next_delay(make_response(429), retry_after=5)
+        self.assertTrue(5 <= delay <= 6)
+
+    def test_no_retry_for_client_errors(self):
+        state = quick_policy().start('GET')
+        self.assertIsNone(state.next_delay(make_response(404)))
+
+    def test_server_errors_only_retried_for_gets(self):
+        policy = quick_policy()
+        self.assertIsNotNone(policy.start('GET').next_delay(make_response(503)))
+        self.assertIsNone(policy.start('POST').next_delay(make_response(503)))
+
+    def test_max_attempts(self):
+        state = quick_policy(max_attempts=3).start('GET')
+        delays = [state.next_delay(make_response(429)) for _ in range(3)]
+        self.assertEqual(delays[2], None)
+        self.assertNotIn(None, delays[:2])
+
+    def test_max_total_delay(self):
+        state = quick_policy(max_attempts=10, max_total_delay=8).start('GET')
+        self.assertIsNotNone(state.next_delay(make_response(429), retry_after=5))
+        self.assertIsNone(state.next_delay(make_response(429), retry_after=5))
+
+    def test_budget_limits_retries(self):
+        budget = RetryBudget(ratio=0.5, min_per_second=0.001)
+        budget._reserve._tokens = 0
+        for _ in range(4):
+            budget.deposit()
+        self.assertTrue(budget.withdraw())
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+
+
+class TestClientRetries(TestCase):
+
+    def test_retries_then_succeeds(self):
+        session = ScriptedSession([429, 503, 200])
+        api = ApiClient(session=session, retry_policy=quick_policy())
+        self.assertEqual(api.rest_json('/v2/users'), [])
+        self.assertEqual(session.calls, 3)
+
+    def test_gives_up_with_skytap_error(self):
+        session = ScriptedSession([429, 429])
+        api = ApiClient(session=session,
+                        retry_policy=quick_policy(max_attempts=2))
+        self.assertRaises(Skytap429TooManyRequestsError,
+                          api.rest_json, '/v2/users')
+        self.assertEqual(session.calls, 2)
+
+    def test_write_not_retried_on_server_error(self):
+        session = ScriptedSession([500])
+        api = ApiClient(session=session, retry_policy=quick_policy())
+        self.assertRaises(Skytap500SystemError,
+                          api.rest_json, '/v2/users', {}, 'POST', '{}')
+        self.assertEqual(session.calls, 1)
+
+    def test_connection_errors(self):
+        error = requests.exceptions.ConnectionError('reset')
+        session = ScriptedSession([error, 200])
+        api = ApiClient(session=session, retry_policy=quick_policy())
+        self.assertEqual(api.rest_json('/v2/users'), [])
+
+        session = ScriptedSession([error])
+        api = ApiClient(session=session, retry_policy=quick_policy())
+        self.assertRaises(requests.exceptions.ConnectionError,
+                          api.rest_json, '/v2/users', {}, 'PUT', '{}')
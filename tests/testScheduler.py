@@ -0,0 +1,112 @@
+"""Test the priority request scheduler."""
+import sys
+import threading
+import time
+from unittest import TestCase
+
+import requests
+
+sys.path.append('..')
+from skytap.framework.ApiClient import ApiClient  # noqa
+from skytap.framework.Scheduler import RequestScheduler, priority  # noqa
+from skytap.framework.Scheduler import current_priority  # noqa
+from skytap.framework.Fixtures import SkytapSimulator  # noqa
+from skytap.framework.Transport import MemoryTransport  # noqa
+
+
+def queue_up(scheduler, names, order):
+    """Start a thread per name that waits for a slot and notes its turn."""
+    threads = []
+    for name in names:
+        def worker(name=name):
+            scheduler.acquire(name)
+            order.append(name)
+            scheduler.release()
+        thread = threading.Thread(target=worker)
+        thread.start()
+        threads.append(thread)
+    while scheduler.queued < len(names):
+        time.sleep(0.001)
+    return threads
+
+
+class TestRequestScheduler(TestCase):
+
+    def test_interactive_jumps_queued_bulk(self):
+        scheduler = RequestScheduler(slots=1)
+        scheduler.acquire('bulk')
+        order = []
+        threads = queue_up(scheduler, ['bulk'] * 3, order)
+        threads += queue_up(scheduler, ['interactive'], order)
+        scheduler.release()
+        for t in threads:
+            t.join()
+        self.assertEqual(order[0], 'interactive')
+
+    def test_bulk_gets_its_share(self):
+        scheduler = RequestScheduler(slots=1)
+        scheduler.acquire('interactive')
+        order = []
+        threads = queue_up(scheduler, ['interactive'] * 16 + ['bulk'] * 4,
+                           order)
+        scheduler.release()
+        for t in threads:
+            t.join()
+        # One bulk request per 8 interactive ones; never starved.
+        self.assertIn('bulk', order[:10])
+        self.assertEqual(order.count('bulk'), 4)
+
+    def test_timeout_leaves_queue(self):
+        scheduler = RequestScheduler(slots=1)
+        scheduler.acquire()
+        self.assertFalse(scheduler.acquire('bulk', timeout=0.05))
+        self.assertEqual(scheduler.queued, 0)
+
+    def test_unknown_class(self):
+        self.assertRaises(ValueError, RequestScheduler().acquire, 'urgent')
+
+    def test_priority_context(self):
+        self.assertEqual(current_priority(), 'normal')
+        with priority('bulk'):
+            self.assertEqual(current_priority(), 'bulk')
+            with priority('interactive'):
+                self.assertEqual(current_priority(), 'interactive')
+            self.assertEqual(current_priority(), 'bulk')
+        self.assertEqual(current_priority(), 'normal')
+
+
+class OkSession(requests.Session):
+
+    def request(self, method, url, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'[]'
+        response.url = url
+        response.request = requests.Request(method, url).prepare()
+        return response
+
+
+class TestClientScheduling(TestCase):
+
+    def test_requests_go_through_scheduler(self):
+        scheduler = RequestScheduler(slots=2)
+        api = ApiClient(session=OkSession(), scheduler=scheduler,
+                        priority='bulk')
+        api.rest_json('/v2/users')
+        with priority('interactive'):
+            ApiClient(session=OkSession(),
+                      scheduler=scheduler).rest_json('/v2/users')
+        self.assertEqual(scheduler.dispatched['bulk'], 1)
+        self.assertEqual(scheduler.dispatched['interactive'], 1)
+        self.assertEqual(scheduler.queued, 0)
+
+    def test_parallel_pages_keep_priority(self):
+        scheduler = RequestScheduler(slots=2)
+        simulator = SkytapSimulator(environments=50, page_size=10)
+        api = ApiClient(transport=MemoryTransport(simulator.respond),
+                        scheduler=scheduler)
+        with priority('bulk'):
+            pages = list(api.iter_pages('/v2/configurations', parallel=4))
+        self.assertEqual(len(pages), 5)
+        self.assertEqual(scheduler.dispatched['bulk'], 5)
+        self.assertEqual(scheduler.dispatched['normal'], 0)
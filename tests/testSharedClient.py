@@ -0,0 +1,100 @@
+"""Test that one injected client serves a whole object graph."""
+import json
+import sys
+from unittest import TestCase
+
+sys.path.append('..')
+from skytap.Environments import Environments  # noqa
+from skytap.framework.ApiClient import ApiClient, get_default_client  # noqa
+from skytap.framework.Transport import MemoryTransport  # noqa
+from skytap.models.Environment import Environment  # noqa
+from skytap.models.Group import Group  # noqa
+
+
+class RecordingClient(object):
+    """Stand-in client that answers from a dict and records each call."""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = []
+
+    def rest_json(self, url, params=None, req='get', data=None):
+        self.calls.append((req.upper(), url))
+        return self.responses.get(url, [])
+
+    def rest(self, url, params=None, req='get', data=None):
+        return json.dumps(self.rest_json(url, params, req, data))
+
+
+env_list = [
+    {'id': 1, 'name': 'test_1', 'runstate': 'running',
+     'url': 'https://cloud.skytap.com/v2/configurations/1',
+     'vms': [{'id': 11, 'name': 'vm_1', 'runstate': 'running'}]},
+    {'id': 2, 'name': 'test_2', 'runstate': 'suspended',
+     'url': 'https://cloud.skytap.com/v2/configurations/2', 'vms': []},
+]
+
+
+class TestSharedClient(TestCase):
+
+    def setUp(self):
+        self.client = RecordingClient({
+            'https://cloud.skytap.com/v2/configurations/1/notes.json': [
+                {'id': 5, 'text': 'hello', 'user': {}}],
+        })
+        self.envs = Environments(env_list, client=self.client)
+
+    def test_group_passes_client_to_resources(self):
+        self.assertIs(self.envs.client, self.client)
+        for env in self.envs:
+            self.assertIs(env.client, self.client)
+
+    def test_group_with_client_delegates_to_it(self):
+        api = ApiClient(transport=MemoryTransport(
+            lambda request: (200, {'id': 1})))
+        envs = Environments(env_list, client=api)
+        self.assertNotIn('transport', envs.__dict__)
+        self.assertIs(envs.transport, api.transport)
+        self.assertEqual(envs.rest_json('/v2/configurations/1'), {'id': 1})
+        self.assertEqual(api.last_status, 200)
+
+    def test_sub_models_of_clientless_resource_use_default(self):
+        env = Environment(env_list[0])
+        self.assertIs(env.vms.client, get_default_client())
+        self.assertNotIn('transport', env.vms.__dict__)
+
+    def test_sub_models_get_the_client(self):
+        vms = self.envs[1].vms
+        self.assertIs(vms.client, self.client)
+        self.assertIs(vms[11].client, self.client)
+
+    def test_lazy_loads_use_the_client(self):
+        notes = self.envs[1].notes
+        self.assertEqual(self.client.calls, [
+            ('GET', 'https://cloud.skytap.com/v2/configurations/1/notes.json')])
+        self.assertIs(notes.client, self.client)
+        self.assertEqual(len(notes), 1)
+
+    def test_no_labels_is_an_empty_list(self):
+        for resource in (self.envs[2], self.envs[1].vms[11]):
+            labels = resource.labels
+            self.assertEqual(len(labels), 0)
+            self.assertEqual(labels.url, resource.url + '/labels')
+        self.assertNotIn('label_categories', str(self.client.calls))
+
+    def test_group_from_parent_json_has_no_list_url(self):
+        group = Group({'id': 3, 'name': 'devs',
+                       'url': 'https://cloud.skytap.com/v2/groups/3',
+                       'users': [{'id': 7, 'first_name': 'Kermit',
+                                  'last_name': 'Frog'}]},
+                      client=self.client)
+        users = group.users
+        self.assertEqual(len(users), 1)
+        # Not /v2/users: refreshing it mustn't load every user there is.
+        self.assertNotIn('url', users.__dict__)
+
+    def test_resource_without_client_uses_default(self):
+        env = Environment(env_list[1])
+        self.assertIsNone(env.client)
+        self.assertIs(env.api, get_default_client())
+        self.assertIs(get_default_client(), get_default_client())
@@ -0,0 +1,114 @@
+"""Test the simulated Skytap account and its HTTP server."""
+import sys
+from unittest import TestCase
+
+import requests
+
+sys.path.append('..')
+from skytap.Environments import Environments  # noqa
+from skytap.Users import Users  # noqa
+from skytap.framework.ApiClient import ApiClient  # noqa
+from skytap.framework.ApiExceptions import Skytap423BusyError  # noqa
+from skytap.framework.Fixtures import ResponseConfig  # noqa
+from skytap.framework.Fixtures import SimulatorManager  # noqa
+from skytap.framework.Fixtures import SimulatorServer  # noqa
+from skytap.framework.Fixtures import SkytapSimulator  # noqa
+from skytap.framework.Retry import RetryBudget, RetryPolicy, RetryRule  # noqa
+from skytap.framework.Transport import MemoryTransport  # noqa
+from skytap.framework.Transport import RequestsTransport  # noqa
+
+
+def client_for(handler, **kwargs):
+    return ApiClient(transport=MemoryTransport(handler.respond), **kwargs)
+
+
+class TestSkytapSimulator(TestCase):
+
+    def test_environments_are_paged(self):
+        simulator = SkytapSimulator(environments=250, page_size=100)
+        envs = Environments(client=client_for(simulator))
+        self.assertEqual(len(envs), 250)
+        self.assertEqual(envs.vm_count(), 500)
+        self.assertEqual(simulator.calls['GET /configurations'], 3)
+
+    def test_large_account_is_cheap_until_listed(self):
+        simulator = SkytapSimulator(environments=50000)
+        api = client_for(simulator)
+        response = api.request('/v2/configurations', {'count': 10})
+        self.assertEqual(response.total, 50000)
+        self.assertEqual(len(response.json()), 10)
+        env = api.rest_json('/v2/configurations/49999')
+        self.assertEqual(env['name'], 'Environment 49999')
+
+    def test_state_change_adds_note_and_goes_through_busy(self):
+        simulator = SkytapSimulator(environments=2)
+        envs = Environments(client=client_for(simulator))
+        env = envs[1]
+        self.assertEqual(env.runstate, 'running')
+        self.assertTrue(env.change_state('suspended', wait=True))
+        self.assertEqual(env.runstate, 'suspended')
+        self.assertEqual(env.vms.first().runstate, 'suspended')
+        self.assertEqual(len(env.notes), 1)
+        self.assertEqual(simulator.calls['PUT /configurations/:id'], 1)
+
+    def test_busy_resource_is_locked(self):
+        simulator = SkytapSimulator(environments=1, transition_time=60)
+        api = client_for(simulator, retry_policy=RetryPolicy(max_attempts=1))
+        url = '/v2/configurations/1.json'
+        busy = api.rest_json(url, {}, 'PUT', {'runstate': 'suspended'})
+        self.assertEqual(busy['runstate'], 'busy')
+        with self.assertRaises(Skytap423BusyError):
+            api.rest_json(url, {}, 'PUT', {'runstate': 'running'})
+
+    def test_user_data_and_users(self):
+        simulator = SkytapSimulator(environments=1, users=3)
+        api = client_for(simulator)
+        url = '/v2/configurations/1/user_data.json'
+        api.rest_json(url, {}, 'POST', {'contents': 'owner: me\n'})
+        self.assertEqual(api.rest_json(url), {'contents': 'owner: me\n'})
+        self.assertEqual(len(Users(client=api)), 3)
+
+
+class TestFaults(TestCase):
+
+    def test_injected_429s_are_retried(self):
+        manager = SimulatorManager(SkytapSimulator(environments=5))
+        manager.add_response_config(ResponseConfig(
+            match_url='*/v2/configurations', status_code=429,
+            headers={'Retry-After': '0'}, times=2, priority=1))
+        policy = RetryPolicy(rules={429: RetryRule(base=0, cap=0)},
+                             budget=RetryBudget(ratio=1))
+        api = client_for(manager, retry_policy=policy)
+        self.assertEqual(len(api.rest_json('/v2/configurations')), 5)
+        self.assertEqual(manager.requests, 3)
+
+    def test_rate_and_latency(self):
+        manager = SimulatorManager(seed=1)
+        manager.add_response_config(
+            ResponseConfig(match_url='/v2/slow', status_code=None,
+                           latency=0.01),
+            ResponseConfig(match_url='/v2/flaky', status_code=503, rate=0.5),
+            ResponseConfig(match_url='*', text='{}', priority=999))
+        api = client_for(manager, retry_policy=RetryPolicy(max_attempts=1))
+        statuses = []
+        for _ in range(40):
+            try:
+                api.request('/v2/flaky')
+                statuses.append(200)
+            except Exception:
+                statuses.append(503)
+        self.assertTrue(5 < statuses.count(503) < 35)
+        self.assertEqual(api.request('/v2/slow').status_code, 200)
+
+
+class TestSimulatorServer(TestCase):
+
+    def test_serves_over_http(self):
+        simulator = SkytapSimulator(environments=25, page_size=10)
+        with SimulatorServer(simulator) as server:
+            api = ApiClient(transport=RequestsTransport(requests.Session()))
+            envs = api.rest_json(server.url + '/v2/configurations')
+            self.assertEqual(len(envs), 25)
+            self.assertTrue(envs[0]['url'].startswith(server.url))
+            env = api.rest_json(envs[0]['url'])
+        self.assertEqual(env['id'], envs[0]['id'])
@@ -0,0 +1,113 @@
+"""Test coalescing of identical in-flight GETs."""
+import sys
+import threading
+import time
+from unittest import TestCase
+
+import requests
+
+sys.path.append('..')
+from skytap.framework.ApiClient import ApiClient  # noqa
+from skytap.framework.ApiExceptions import Skytap404NotFoundError  # noqa
+from skytap.framework.SingleFlight import SingleFlight  # noqa
+from skytap.framework.Transport import MemoryTransport  # noqa
+
+
+class SlowSession(requests.Session):
+    """A requests.Session that takes a moment to answer and counts calls."""
+
+    def __init__(self, status=200):
+        super(SlowSession, self).__init__()
+        self.status = status
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        time.sleep(0.1)
+        response = requests.Response()
+        response.status_code = self.status
+        response._content = b'{"id": 1}'
+        response.url = url
+        response.request = requests.Request(method, url).prepare()
+        return response
+
+
+def run_threads(count, target):
+    results = [None] * count
+
+    def worker(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,))
+               for i in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+class TestSingleFlight(TestCase):
+
+    def test_concurrent_gets_share_one_request(self):
+        session = SlowSession()
+        api = ApiClient(session=session, single_flight=SingleFlight())
+        results = run_threads(5, lambda: api.rest_json('/v2/configurations/1'))
+        self.assertEqual(session.calls, 1)
+        self.assertEqual(results[0], {'id': 1})
+        for result in results:
+            self.assertIs(result, results[0])
+        self.assertEqual(api.single_flight.coalesced, 4)
+        self.assertEqual(len(api.single_flight), 0)
+
+    def test_followers_get_the_response(self):
+        session = SlowSession()
+        api = ApiClient(session=session, single_flight=SingleFlight())
+        statuses = run_threads(3, lambda: (
+            api.rest_json('/v2/configurations/1'), api.last_status)[1])
+        self.assertEqual(session.calls, 1)
+        self.assertEqual(statuses, [200, 200, 200])
+
+    def test_different_transports_not_shared(self):
+        def slow(name):
+            def handler(request):
+                time.sleep(0.1)
+                return 200, {'from': name}
+            return handler
+
+        single_flight = SingleFlight()
+        first = ApiClient(transport=MemoryTransport(slow('first')),
+                          single_flight=single_flight)
+        second = ApiClient(transport=MemoryTransport(slow('second')),
+                           single_flight=single_flight)
+        clients = [first, second] * 2
+        results = run_threads(4, lambda: clients.pop().rest_json(
+            '/v2/configurations/1'))
+        self.assertEqual(sorted(r['from'] for r in results),
+                         ['first', 'first', 'second', 'second'])
+        self.assertEqual(single_flight.coalesced, 2)
+
+    def test_different_urls_not_shared(self):
+        session = SlowSession()
+        api = ApiClient(session=session, single_flight=SingleFlight())
+        run_threads(2, lambda: api.rest_json('/v2/configurations/1'))
+        run_threads(1, lambda: api.rest_json('/v2/configurations/2'))
+        self.assertEqual(session.calls, 2)
+
+    def test_errors_shared(self):
+        session = SlowSession(status=404)
+        api = ApiClient(session=session, single_flight=SingleFlight())
+        results = run_threads(3, lambda: api.rest_json('/v2/configurations/1'))
+        self.assertEqual(session.calls, 1)
+        for result in results:
+            self.assertIsInstance(result, Skytap404NotFoundError)
+
+    def test_nothing_kept_afterwards(self):
+        session = SlowSession()
+        api = ApiClient(session=session, single_flight=SingleFlight())
+        api.rest_json('/v2/configurations/1')
+        api.rest_json('/v2/configurations/1')
+        self.assertEqual(session.calls, 2)
@@ -0,0 +1,93 @@
+"""Test the latency histograms and per-endpoint stats."""
+import random
+import sys
+from unittest import TestCase
+
+sys.path.append('..')
+from skytap.framework.ApiClient import ApiClient  # noqa
+from skytap.framework.Fixtures import SkytapSimulator  # noqa
+from skytap.framework.Hooks import Hooks  # noqa
+from skytap.framework.Stats import Histogram, StatsCollector  # noqa
+from skytap.framework.Transport import MemoryTransport  # noqa
+
+
+class TestHistogram(TestCase):
+
+    def test_precision(self):
+        histogram = Histogram()
+        rng = random.Random(3)
+        values = sorted(rng.uniform(0.0001, 100) for _ in range(5000))
+        for value in values:
+            histogram.record(value)
+        self.assertEqual(histogram.count, 5000)
+        self.assertEqual(histogram.max, values[-1])
+        for percent in (50, 90, 99):
+            exact = values[int(len(values) * percent / 100.0) - 1]
+            self.assertAlmostEqual(histogram.percentile(percent) / exact, 1,
+                                   delta=0.01)
+        self.assertEqual(histogram.percentile(100), values[-1])
+        self.assertAlmostEqual(histogram.mean, sum(values) / len(values))
+
+    def test_small_values_are_exact(self):
+        histogram = Histogram(resolution=1)
+        for value in range(256):
+            histogram.record(value)
+        self.assertEqual(histogram.percentile(50), 128)
+        self.assertEqual(histogram.count_at_or_below(99), 99)
+
+    def test_buckets_and_merge(self):
+        first, second = Histogram(), Histogram()
+        first.record(0.001, count=3)
+        second.record(2.5)
+        first.merge(second)
+        self.assertEqual(first.count, 4)
+        self.assertEqual(first.min, 0.001)
+        self.assertEqual(first.max, 2.5)
+        self.assertEqual(sum(n for _, n in first.buckets()), 4)
+        self.assertEqual(first.count_at_or_below(1), 3)
+        with self.assertRaises(ValueError):
+            first.merge(Histogram(precision_bits=4))
+
+    def test_empty(self):
+        histogram = Histogram()
+        self.assertIsNone(histogram.percentile(50))
+        self.assertIsNone(histogram.mean)
+
+
+class TestStatsCollector(TestCase):
+
+    def test_collects_per_family(self):
+        simulator = SkytapSimulator(environments=3)
+        hooks = Hooks()
+        stats = StatsCollector()
+        hooks.register(stats)
+        api = ApiClient(transport=MemoryTransport(simulator.respond),
+                        hooks=hooks)
+        api.rest_json('/v2/configurations')
+        api.rest_json('/v2/configurations/1/vms/101')
+        api.rest_json('/v2/configurations/1/vms/102')
+        summary = stats.summary()
+        self.assertEqual(sorted(summary), ['configurations', 'vms'])
+        self.assertEqual(summary['vms']['requests'], 2)
+        self.assertEqual(summary['vms']['statuses'], {200: 2})
+        self.assertEqual(summary['vms']['latency']['count'], 2)
+        self.assertTrue(summary['configurations']['bytes'] > 0)
+        report = stats.report().splitlines()
+        self.assertEqual(len(report), 3)
+        self.assertTrue(report[0].startswith('family'))
+
+        stats.reset()
+        self.assertEqual(stats.summary(), {})
+
+    def test_by_template(self):
+        simulator = SkytapSimulator(environments=3)
+        hooks = Hooks()
+        stats = StatsCollector(by='template')
+        hooks.register(stats)
+        api = ApiClient(transport=MemoryTransport(simulator.respond),
+                        hooks=hooks)
+        api.rest_json('/v2/configurations/1/vms/101')
+        self.assertEqual(list(stats.summary()),
+                         ['/configurations/:id/vms/:id'])
+        with self.assertRaises(ValueError):
+            StatsCollector(by='host')
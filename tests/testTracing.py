@@ -0,0 +1,131 @@
+"""Test span tracing and the Chrome trace export."""
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+from unittest import TestCase
+
+sys.path.append('..')
+from skytap.Environments import Environments  # noqa
+from skytap.framework import Tracing  # noqa
+from skytap.framework.ApiClient import ApiClient  # noqa
+from skytap.framework.Config import Config  # noqa
+from skytap.framework.Fixtures import ResponseConfig  # noqa
+from skytap.framework.Fixtures import SimulatorManager  # noqa
+from skytap.framework.Fixtures import SkytapSimulator  # noqa
+from skytap.framework.Hooks import get_shared_hooks  # noqa
+from skytap.framework.Retry import RetryBudget, RetryPolicy, RetryRule  # noqa
+from skytap.framework.Tracing import Tracer, span  # noqa
+from skytap.framework.Transport import MemoryTransport  # noqa
+
+
+def inside(outer, inner):
+    return (outer.thread == inner.thread and outer.start <= inner.start and
+            inner.end <= outer.end)
+
+
+class TestTracer(TestCase):
+
+    def setUp(self):
+        self.manager = SimulatorManager(SkytapSimulator(environments=2))
+        self.api = ApiClient(transport=MemoryTransport(self.manager.respond),
+                             retry_policy=RetryPolicy(
+                                 rules={429: RetryRule(base=0.01, cap=0.01)},
+                                 budget=RetryBudget(ratio=1)))
+
+    def test_state_change_is_nested(self):
+        env = Environments(client=self.api)[1]
+        with Tracer() as tracer:
+            self.assertTrue(env.change_state('suspended', wait=True))
+        names = [s.name for s in tracer.spans]
+        top = tracer.spans[0]
+        self.assertEqual(top.name, 'Environment.change_state')
+        for name in ('Environment.refresh', 'Notes.add', 'Notes.refresh',
+                     'PUT /configurations/:id', 'wait for suspended'):
+            self.assertIn(name, names)
+        self.assertTrue(all(inside(top, s) for s in tracer.spans[1:]))
+
+        add = tracer.spans[names.index('Notes.add')]
+        post = tracer.spans[names.index('POST /configurations/:id/notes')]
+        self.assertTrue(inside(add, post))
+        self.assertEqual(post.args['status'], 200)
+        self.assertEqual(post.category, 'http')
+
+    def test_retry_wait(self):
+        self.manager.add_response_config(ResponseConfig(
+            match_url='*/v2/users', status_code=429, times=1, priority=1))
+        with Tracer() as tracer:
+            self.api.rest_json('/v2/users')
+        self.assertEqual([s.name for s in tracer.spans], [
+            'GET /users', 'retry wait', 'GET /users'])
+        self.assertEqual(tracer.spans[0].args['status'], 429)
+        self.assertTrue(0 < tracer.spans[1].duration <= 0.01)
+
+    def test_error_is_noted(self):
+        with Tracer() as tracer:
+            with self.assertRaises(ValueError):
+                with span('broken', step=1):
+                    raise ValueError('nope')
+        self.assertEqual(tracer.spans[0].args['step'], 1)
+        self.assertIn('nope', tracer.spans[0].args['error'])
+
+    def test_oldest_spans_dropped(self):
+        with Tracer(max_spans=10) as tracer:
+            for i in range(25):
+                with span('step', i=i):
+                    pass
+        self.assertLessEqual(len(tracer.spans), 10)
+        self.assertEqual(tracer.spans[-1].args['i'], 24)
+        self.assertEqual(tracer.dropped + len(tracer.spans), 25)
+
+    def test_nothing_recorded_when_stopped(self):
+        tracer = Tracer()
+        with span('ignored') as current:
+            self.assertIsNone(current)
+        self.api.rest_json('/v2/users')
+        self.assertEqual(tracer.spans, [])
+        with tracer:
+            self.assertIs(Tracing.current_tracer(), tracer)
+            with Tracer() as other:
+                self.assertIs(Tracing.current_tracer(), other)
+                self.api.rest_json('/v2/users')
+            self.assertIsNone(Tracing.current_tracer())
+        self.assertEqual(len(other.spans), 1)
+        self.assertEqual(tracer.spans, [])
+        self.assertFalse(get_shared_hooks())
+
+    def test_chrome_trace(self):
+        directory = tempfile.mkdtemp()
+        try:
+            with Tracer(os.path.join(directory, 'trace.json')) as tracer:
+                Environments(client=self.api)
+            tracer.save()
+            with open(tracer.path) as f:
+                trace = json.load(f)
+        finally:
+            shutil.rmtree(directory)
+        events = trace['traceEvents']
+        self.assertEqual(events[0]['ph'], 'M')
+        complete = [e for e in events if e['ph'] == 'X']
+        self.assertEqual(complete[0]['name'], 'Environments.load_list_from_api')
+        self.assertEqual(complete[1]['name'], 'GET /configurations')
+        for event in complete:
+            self.assertTrue(event['dur'] >= 0)
+            self.assertEqual(event['pid'], os.getpid())
+        self.assertTrue(complete[0]['ts'] <= complete[1]['ts'])
+
+    def test_shared_tracer(self):
+        original = Tracing._shared_tracer
+        Tracing._shared_tracer = None
+        try:
+            self.assertIsNone(Tracing.get_shared_tracer())
+            Config.trace_file = 'unused.json'
+            tracer = Tracing.get_shared_tracer()
+            self.assertIs(Tracing.current_tracer(), tracer)
+            tracer.stop()
+            atexit.unregister(tracer.save)
+        finally:
+            Config.trace_file = ''
+            Tracing._shared_tracer = original
@@ -0,0 +1,147 @@
+"""Test the requests, urllib3 and in-memory transports."""
+import gzip
+import json
+import socket
+import sys
+import threading
+from unittest import TestCase
+
+import requests
+from six.moves import BaseHTTPServer
+from six.moves.urllib.parse import parse_qs, urlparse
+
+sys.path.append('..')
+from skytap.framework.ApiClient import ApiClient  # noqa
+from skytap.framework.ApiExceptions import Skytap404NotFoundError  # noqa
+from skytap.framework.CircuitBreaker import CircuitBreaker  # noqa
+from skytap.framework.Retry import RetryPolicy  # noqa
+from skytap.framework.Transport import MemoryTransport  # noqa
+from skytap.framework.Transport import RequestsTransport  # noqa
+from skytap.framework.Transport import Urllib3Transport  # noqa
+
+TOTAL = 25
+
+
+def list_page(path):
+    """Return (items, headers) for one page of a TOTAL-item list."""
+    query = parse_qs(urlparse(path).query)
+    offset = int(query.get('offset', [0])[0])
+    count = int(query.get('count', [10])[0])
+    end = min(offset + count, TOTAL)
+    items = [{'id': i, 'name': 'env_%d' % i} for i in range(offset, end)]
+    headers = {'content-range': 'items %d-%d/%d' % (offset, end - 1, TOTAL)}
+    return items, headers
+
+
+class ListHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        items, headers = list_page(self.path)
+        body = gzip.compress(json.dumps(items).encode('utf-8'))
+        self.send_response(200)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestNetworkTransports(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), ListHandler)
+        cls.url = 'http://127.0.0.1:%d/v2/configurations' % (
+            cls.server.server_address[1])
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.daemon = True
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def check_transport(self, transport):
+        api = ApiClient(transport=transport)
+        result = api.rest_json(self.url, {'count': 10})
+        self.assertEqual([item['id'] for item in result], list(range(TOTAL)))
+        streamed = []
+        for page in api.iter_pages(self.url, page_size=10, stream=True):
+            streamed.extend(page)
+        self.assertEqual(streamed, result)
+
+    def test_requests(self):
+        self.check_transport(RequestsTransport(requests.Session()))
+
+    def test_urllib3(self):
+        self.check_transport(Urllib3Transport())
+
+    def test_urllib3_connection_error(self):
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        api = ApiClient(transport=Urllib3Transport(),
+                        retry_policy=RetryPolicy(max_attempts=1),
+                        breaker=CircuitBreaker())
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            api.request('http://127.0.0.1:%d/v2/refused' % port)
+
+
+class TestMemoryTransport(TestCase):
+
+    def test_serves_client(self):
+        def handler(request):
+            items, headers = list_page(request.url)
+            return 200, items, headers
+
+        transport = MemoryTransport(handler)
+        api = ApiClient(transport=transport)
+        result = api.rest_json('/v2/configurations', {'count': 10})
+        self.assertEqual(len(result), TOTAL)
+        self.assertEqual(transport.requests, 3)
+
+    def test_request_details(self):
+        seen = []
+
+        def handler(request):
+            seen.append(request)
+            return 404, 'not here'
+
+        api = ApiClient(transport=MemoryTransport(handler),
+                        retry_policy=RetryPolicy(max_attempts=1))
+        with self.assertRaises(Skytap404NotFoundError):
+            api.request('/v2/configurations/1')
+        self.assertEqual(seen[0].method, 'GET')
+        self.assertTrue(seen[0].headers['Authorization'].startswith('Basic '))
+
+    def test_async_client(self):
+        if sys.version_info < (3, 5):
+            return  # the asyncio client needs Python 3.5
+        import asyncio
+        from skytap.framework.AsyncApiClient import AsyncApiClient
+
+        def handler(request):
+            items, headers = list_page(request.url)
+            return 200, items, headers
+
+        api = AsyncApiClient(transport=MemoryTransport(handler))
+        loop = asyncio.new_event_loop()
+        try:
+            result = loop.run_until_complete(
+                api.rest_json('/v2/configurations', {'count': 10}))
+        finally:
+            loop.close()
+            api.close()
+        self.assertEqual(len(result), TOTAL)
+
+    def test_session_kept(self):
+        session = requests.Session()
+        self.assertIs(ApiClient(session=session).session, session)